@@ -1,14 +1,29 @@
 import sys
 import traceback
 from datetime import datetime
+from typing import List
 
 from botbuilder.core import (
     BotFrameworkAdapter,
     BotFrameworkAdapterSettings,
     ConversationState,
+    MessageFactory,
     TurnContext,
 )
 from botbuilder.schema import ActivityTypes, Activity
+from botframework.connector.aio import ConnectorClient
+from botframework.connector.auth import AppCredentials, ClaimsIdentity, MicrosoftAppCredentials
+
+from auth_cache import AuthCache
+from connector_pool import ConnectorPool
+from outbound_buffer import OutboundBuffer
+from telemetry import TRACER, TracingMiddleware
+from telemetry.metrics import (
+    OUTBOUND_ACTIVITIES,
+    OUTBOUND_ERRORS,
+    OUTBOUND_SENDS,
+    MetricsMiddleware,
+)
 
 
 class AdapterWithErrorHandler(BotFrameworkAdapter):
@@ -16,23 +31,46 @@ class AdapterWithErrorHandler(BotFrameworkAdapter):
         self,
         settings: BotFrameworkAdapterSettings,
         conversation_state: ConversationState,
+        merge_text: bool = False,
+        auth_cache: AuthCache = None,
+        connector_pool: ConnectorPool = None,
     ):
         super().__init__(settings)
         self._conversation_state = conversation_state
 
+        # Identities of the bearer tokens already validated
+        self.auth_cache = auth_cache
+
+        # Connector clients sharing keep-alive connections and service tokens
+        self.connector_pool = connector_pool
+
+        # Turns in flight, their duration and errors
+        self.use(MetricsMiddleware())
+
+        # Root span of the sampled turns
+        self.use(TracingMiddleware())
+
+        # The activities of a turn are sent together at its end
+        self.outbound_buffer = OutboundBuffer(merge_text)
+        self.use(self.outbound_buffer)
+
         # Catch-all for errors.
         async def on_error(context: TurnContext, error: Exception):
+            nonlocal self
+
             # This check writes out errors to console log
             # NOTE: In production environment, you should consider logging this to Azure
             #       application insights.
             print(f"\n [on_turn_error] unhandled error: {error}", file=sys.stderr)
             traceback.print_exc()
 
-            # Send a message to the user
-            await context.send_activity("The bot encountered an error or bug.")
-            await context.send_activity(
-                "To continue to run this bot, please fix the bot source code."
-            )
+            # Send a message to the user, in a single message when merge_text is on
+            activities = [
+                MessageFactory.text("The bot encountered an error or bug."),
+                MessageFactory.text("To continue to run this bot, please fix the bot source code."),
+            ]
+            if self.outbound_buffer.merge_text:
+                activities = self.outbound_buffer.merge(activities)
             # Send a trace activity if we're talking to the Bot Framework Emulator
             if context.activity.channel_id == "emulator":
                 # Create a trace activity that contains the error object
@@ -45,10 +83,43 @@ class AdapterWithErrorHandler(BotFrameworkAdapter):
                     value_type="https://www.botframework.com/schemas/error",
                 )
                 # Send a trace activity, which will be displayed in Bot Framework Emulator
-                await context.send_activity(trace_activity)
+                activities.append(trace_activity)
+            await context.send_activities(activities)
 
             # Clear out state
-            nonlocal self
             await self._conversation_state.delete(context)
 
         self.on_turn_error = on_error
+
+    def _get_or_create_connector_client(self, service_url: str, credentials: AppCredentials) -> ConnectorClient:
+        if self.connector_pool is None:
+            return super()._get_or_create_connector_client(service_url, credentials)
+        return self.connector_pool.client(service_url, credentials or MicrosoftAppCredentials.empty())
+
+    async def _authenticate_request(self, request: Activity, auth_header: str) -> ClaimsIdentity:
+        if not auth_header or self.auth_cache is None:
+            return await super()._authenticate_request(request, auth_header)
+
+        key = self.auth_cache.key(auth_header, request.channel_id, request.service_url)
+        identity = self.auth_cache.get(key)
+        if identity is not None:
+            # As the full validation does, for the replies of the turn
+            MicrosoftAppCredentials.trust_service_url(request.service_url)
+            return identity
+
+        identity = await super()._authenticate_request(request, auth_header)
+        self.auth_cache.put(key, auth_header, identity)
+        return identity
+
+    async def send_activities(self, context: TurnContext, activities: List[Activity]):
+        if not activities:
+            return []
+        OUTBOUND_SENDS.inc()
+        for activity in activities:
+            OUTBOUND_ACTIVITIES.inc(type=activity.type)
+        with TRACER.span("send_activities", count=len(activities)):
+            try:
+                return await super().send_activities(context, activities)
+            except Exception:
+                OUTBOUND_ERRORS.inc()
+                raise
@@ -5,31 +5,50 @@ This sample shows how to create a bot that demonstrates the following:
 - Handle user interruptions for such things as `Help` or `Cancel`.
 - Prompt for and validate requests for information from the user.
 """
+import asyncio
+import hmac
+import time
 from http import HTTPStatus
 
 from aiohttp import web
 from aiohttp.web import Request, Response, json_response
 from botbuilder.core import (
     BotFrameworkAdapterSettings,
-    ConversationState,
-    MemoryStorage,
-    UserState,
     TelemetryLoggerMiddleware,
 )
 from botbuilder.core.integration import aiohttp_error_middleware
-from botbuilder.schema import Activity
-from botbuilder.applicationinsights import ApplicationInsightsTelemetryClient
-from botbuilder.integration.applicationinsights.aiohttp import (
-    AiohttpTelemetryProcessor,
-    bot_telemetry_middleware,
-)
+from botframework.connector.auth import AuthenticationConstants, ChannelValidation, MicrosoftAppCredentials
 
 from config import DefaultConfig
-from dialogs import MainDialog, BookingDialog
+from dialogs import MainDialog, BookingDialog, FastDateTimePrompt
 from bots import DialogAndWelcomeBot
+from storage import (
+    TrackedConversationState,
+    TrackedUserState,
+    create_storage,
+)
+from telemetry import (
+    METRICS,
+    PROFILER,
+    TRACER,
+    LoopLagProbe,
+    PipelineSpanExporter,
+    PipelineTelemetryClient,
+    ProcessSampler,
+    ProfileRing,
+    create_pipeline,
+    create_span_exporter,
+    install_log_handler,
+)
 
 from adapter_with_error_handler import AdapterWithErrorHandler
+from auth_cache import AuthCache, OpenIdKeyStore
+from connector_pool import ConnectorPool
 from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.activity_decoder import ACTIVITY_DECODER, loads
+from helpers.timex_service import TIMEX_SERVICE
+from prefork_server import PreforkServer
+from scheduled_delivery import ScheduledDelivery
 import os
 
 CONFIG = DefaultConfig()
@@ -38,23 +57,68 @@ CONFIG = DefaultConfig()
 # See https://aka.ms/about-bot-adapter to learn more about how bots work.
 SETTINGS = BotFrameworkAdapterSettings(CONFIG.APP_ID, CONFIG.APP_PASSWORD)
 
-# Create MemoryStorage, UserState and ConversationState
-MEMORY = MemoryStorage()
-USER_STATE = UserState(MEMORY)
-CONVERSATION_STATE = ConversationState(MEMORY)
+# Create the storage selected in the configuration, UserState and ConversationState
+MEMORY = create_storage(CONFIG)
+USER_STATE = TrackedUserState(MEMORY)
+CONVERSATION_STATE = TrackedConversationState(MEMORY)
+
+# Signing keys of the channel and Emulator tokens, refreshed in the background, and identities of the
+# tokens already validated
+if CONFIG.OPENID_METADATA_URL:
+    ChannelValidation.open_id_metadata_endpoint = CONFIG.OPENID_METADATA_URL
+KEY_STORES = {
+    "channel": OpenIdKeyStore(
+        CONFIG.OPENID_METADATA_URL or AuthenticationConstants.TO_BOT_FROM_CHANNEL_OPEN_ID_METADATA_URL,
+        CONFIG.AUTH_KEYS_REFRESH_INTERVAL,
+    ),
+    "emulator": OpenIdKeyStore(
+        AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPEN_ID_METADATA_URL, CONFIG.AUTH_KEYS_REFRESH_INTERVAL
+    ),
+}
+for KEY_STORE in KEY_STORES.values():
+    KEY_STORE.install()
+AUTH_CACHE = (
+    AuthCache(KEY_STORES.values(), CONFIG.AUTH_CACHE_SIZE, CONFIG.AUTH_CACHE_TTL)
+    if CONFIG.AUTH_CACHE_SIZE > 0
+    else None
+)
+
+# Replies sent over shared keep-alive connections, with service tokens refreshed in the background
+CONNECTOR_POOL = (
+    ConnectorPool(CONFIG.CONNECTOR_POOL_SIZE, timeout=CONFIG.CONNECTOR_TIMEOUT)
+    if CONFIG.CONNECTOR_POOL_SIZE > 0
+    else None
+)
 
 # Create adapter.
 # See https://aka.ms/about-bot-adapter to learn more about how bots work.
-ADAPTER = AdapterWithErrorHandler(SETTINGS, CONVERSATION_STATE)
+ADAPTER = AdapterWithErrorHandler(
+    SETTINGS, CONVERSATION_STATE, CONFIG.OUTBOUND_MERGE_TEXT, AUTH_CACHE, CONNECTOR_POOL
+)
+
+# Activities following a "delay" are sent later, as proactive messages, instead of holding the turn
+SCHEDULED_DELIVERY = ScheduledDelivery(ADAPTER, CONFIG.APP_ID, CONFIG.DELIVERY_MAX_CONVERSATIONS)
+ADAPTER.use(SCHEDULED_DELIVERY)
 
 # Create telemetry client.
-# Note the small 'client_queue_size'.  This is for demonstration purposes.  Larger queue sizes
-# result in fewer calls to ApplicationInsights, improving bot performance at the expense of
-# less frequent updates.
-INSTRUMENTATION_KEY = CONFIG.APPINSIGHTS_INSTRUMENTATION_KEY
-TELEMETRY_CLIENT = ApplicationInsightsTelemetryClient(
-    INSTRUMENTATION_KEY, telemetry_processor=AiohttpTelemetryProcessor(), client_queue_size=10
+# Events are queued in memory and written in batches by a background thread, to Application
+# Insights when an instrumentation key is set and to TELEMETRY_PATH. The dialogs' log records
+# join the same pipeline.
+TELEMETRY_PIPELINE = create_pipeline(CONFIG)
+TELEMETRY_CLIENT = PipelineTelemetryClient(TELEMETRY_PIPELINE)
+install_log_handler(TELEMETRY_PIPELINE)
+
+# Tracing spans of a sample of the turns (TRACE_EXPORTER, TRACE_SAMPLE_RATE)
+SPAN_EXPORTER = create_span_exporter(CONFIG)
+TRACER.configure(SPAN_EXPORTER, CONFIG.TRACE_SAMPLE_RATE)
+
+# Stack samples of the turns slower than SLOW_TURN_THRESHOLD, and on-demand profiles of the process
+PROFILER.configure(
+    ProfileRing(CONFIG.SLOW_TURN_PATH, CONFIG.SLOW_TURN_MAX_PROFILES),
+    CONFIG.SLOW_TURN_THRESHOLD,
+    CONFIG.PROFILE_INTERVAL,
 )
+PROCESS_SAMPLER = ProcessSampler(CONFIG.PROFILE_INTERVAL)
 
 # Code for enabling activity and personal information logging.
 # TELEMETRY_LOGGER_MIDDLEWARE = TelemetryLoggerMiddleware(telemetry_client=TELEMETRY_CLIENT, log_personal_information=True)
@@ -66,6 +130,56 @@ BOOKING_DIALOG = BookingDialog(telemetry_client=TELEMETRY_CLIENT)
 DIALOG = MainDialog(RECOGNIZER, BOOKING_DIALOG, telemetry_client=TELEMETRY_CLIENT)
 BOT = DialogAndWelcomeBot(CONVERSATION_STATE, USER_STATE, DIALOG, TELEMETRY_CLIENT)
 
+# Metrics of the components, read on each scrape of /metrics
+METRICS.register_stats(
+    "bot_state_tracker", lambda: BOT.state_tracker.stats, counters=("skipped", "saved", "writes")
+)
+if hasattr(MEMORY, "stats"):
+    METRICS.register_stats("bot_state_store", lambda: MEMORY.stats, counters=("evictions",))
+if RECOGNIZER.cache is not None:
+    METRICS.register_stats(
+        "bot_recognizer_cache",
+        lambda: RECOGNIZER.cache.stats,
+        counters=("hits", "misses", "coalesced", "evictions"),
+    )
+if RECOGNIZER.cascade is not None:
+    METRICS.register_stats(
+        "bot_recognizer_cascade", lambda: RECOGNIZER.cascade.stats, counters=("local", "fallback")
+    )
+if AUTH_CACHE is not None:
+    METRICS.register_stats(
+        "bot_auth_cache", lambda: AUTH_CACHE.stats, counters=("hits", "misses", "expired", "revoked", "evictions")
+    )
+for NAME, KEY_STORE in KEY_STORES.items():
+    METRICS.register_stats(
+        f"bot_openid_keys_{NAME}",
+        lambda key_store=KEY_STORE: key_store.stats,
+        counters=("refreshes", "failures", "unknown_keys"),
+    )
+if CONNECTOR_POOL is not None:
+    METRICS.register_stats(
+        "bot_connector_pool",
+        lambda: CONNECTOR_POOL.stats,
+        counters=("connections", "hits", "waits", "fetches", "failures"),
+    )
+METRICS.register_stats("bot_activity_decoder", lambda: ACTIVITY_DECODER.stats, counters=("fast", "fallback"))
+METRICS.register_stats("bot_timex_cache", lambda: TIMEX_SERVICE.stats, counters=("hits", "misses", "evictions"))
+METRICS.register_stats(
+    "bot_outbound_buffer", lambda: ADAPTER.outbound_buffer.stats, counters=("turns", "flushes", "activities")
+)
+METRICS.register_stats(
+    "bot_scheduled_delivery",
+    lambda: SCHEDULED_DELIVERY.stats,
+    counters=("scheduled", "delivered", "failed", "refused"),
+)
+METRICS.register_stats(
+    "bot_telemetry",
+    lambda: TELEMETRY_PIPELINE.stats,
+    counters=("emitted", "dropped", "written", "failed", "batches"),
+)
+LOOP_LAG_PROBE = LoopLagProbe(CONFIG.LOOP_LAG_INTERVAL)
+
+
 def print_keys():
     print("LUIS_APP_ID : ", os.environ.get("LUIS_APP_ID"))
     print("LUIS_API_KEY : ", os.environ.get("LUIS_API_KEY"))
@@ -78,11 +192,11 @@ def print_keys():
 async def messages(req: Request) -> Response:
     # Main bot message handler.
     if "application/json" in req.headers["Content-Type"]:
-        body = await req.json()
+        body = loads(await req.read())
     else:
         return Response(status=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
 
-    activity = Activity().deserialize(body)
+    activity = ACTIVITY_DECODER.decode(body)
     auth_header = req.headers["Authorization"] if "Authorization" in req.headers else ""
 
     response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
@@ -91,9 +205,103 @@ async def messages(req: Request) -> Response:
     return Response(status=HTTPStatus.OK)
 
 
+async def metrics(req: Request) -> Response:
+    # Prometheus text exposition format
+    return Response(text=METRICS.render(), content_type="text/plain")
+
+
+async def admin_profile(req: Request) -> Response:
+    # Samples every thread for ?seconds=N and returns the collapsed stacks (flame graph input)
+    token = req.headers.get("Authorization", "")
+    if not hmac.compare_digest(token.encode(), f"Bearer {CONFIG.ADMIN_TOKEN}".encode()):
+        return Response(status=HTTPStatus.UNAUTHORIZED)
+    try:
+        seconds = float(req.query.get("seconds", 10))
+    except ValueError:
+        return Response(status=HTTPStatus.BAD_REQUEST)
+    if not 0 < seconds <= CONFIG.ADMIN_PROFILE_MAX_SECONDS:
+        return Response(status=HTTPStatus.BAD_REQUEST)
+
+    loop = asyncio.get_event_loop()
+    stacks = await loop.run_in_executor(None, PROCESS_SAMPLER.sample, seconds)
+    if stacks is None:
+        return Response(status=HTTPStatus.CONFLICT, text="A profile is already running.")
+    filename = f"profile-{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}.folded"
+    return Response(
+        text=stacks,
+        content_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def warm_up(app: web.Application):
+    # Off the event loop, while the server starts listening: the first date the fast path cannot read
+    # would otherwise wait for the full recognizer to build its models
+    app["warm_up"] = asyncio.get_event_loop().run_in_executor(None, FastDateTimePrompt.warm_up)
+
+
+async def start_key_stores(app: web.Application):
+    # Without an app id the bot takes no token (Emulator without credentials)
+    if CONFIG.APP_ID:
+        for key_store in KEY_STORES.values():
+            key_store.start()
+
+
+async def close_key_stores(app: web.Application):
+    for key_store in KEY_STORES.values():
+        await key_store.close()
+
+
+async def start_connector_pool(app: web.Application):
+    # The service token of the first reply is fetched before it is sent
+    if CONNECTOR_POOL is not None and CONFIG.APP_ID:
+        CONNECTOR_POOL.tokens.prefetch(MicrosoftAppCredentials(CONFIG.APP_ID, CONFIG.APP_PASSWORD))
+
+
+async def close_connector_pool(app: web.Application):
+    if CONNECTOR_POOL is not None:
+        await CONNECTOR_POOL.close()
+
+
+async def start_loop_lag_probe(app: web.Application):
+    LOOP_LAG_PROBE.start()
+
+
+async def stop_loop_lag_probe(app: web.Application):
+    await LOOP_LAG_PROBE.stop()
+
+
+async def close_recognizer(app: web.Application):
+    await RECOGNIZER.close()
+
+
+async def close_scheduled_delivery(app: web.Application):
+    await SCHEDULED_DELIVERY.close()
+
+
+async def close_telemetry(app: web.Application):
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, TELEMETRY_PIPELINE.close)
+    if isinstance(SPAN_EXPORTER, PipelineSpanExporter):
+        await loop.run_in_executor(None, SPAN_EXPORTER.pipeline.close)
+
+
 def init_func(argv):
-    APP = web.Application(middlewares=[bot_telemetry_middleware, aiohttp_error_middleware])
+    APP = web.Application(middlewares=[aiohttp_error_middleware])
     APP.router.add_post("/api/messages", messages)
+    APP.router.add_get("/metrics", metrics)
+    if CONFIG.ADMIN_TOKEN:
+        APP.router.add_post("/admin/profile", admin_profile)
+    APP.on_startup.append(warm_up)
+    APP.on_startup.append(start_loop_lag_probe)
+    APP.on_startup.append(start_key_stores)
+    APP.on_startup.append(start_connector_pool)
+    APP.on_cleanup.append(stop_loop_lag_probe)
+    APP.on_cleanup.append(close_recognizer)
+    APP.on_cleanup.append(close_key_stores)
+    APP.on_cleanup.append(close_scheduled_delivery)
+    APP.on_cleanup.append(close_connector_pool)
+    APP.on_cleanup.append(close_telemetry)
     return APP
 
 if __name__ == "__main__":
@@ -101,6 +309,18 @@ if __name__ == "__main__":
     try:
         # Run app in production
         print_keys()
-        web.run_app(APP, host="0.0.0.0", port=CONFIG.PORT)
+        if CONFIG.WORKERS > 1:
+            if CONFIG.STORAGE != "sqlite":
+                # Each worker would keep its own conversations, and a dialog would restart whenever a turn lands on
+                # another worker
+                raise ValueError(
+                    f'WORKERS={CONFIG.WORKERS} needs a storage shared between workers: set STORAGE=sqlite '
+                    f'(STORAGE is "{CONFIG.STORAGE}")'
+                )
+            # Workers are forked once the recognizer, dialogs and bot are built and warmed up
+            FastDateTimePrompt.warm_up()
+            PreforkServer(APP, "0.0.0.0", CONFIG.PORT, CONFIG.WORKERS).run()
+        else:
+            web.run_app(APP, host="0.0.0.0", port=CONFIG.PORT)
     except Exception as error:
         raise error
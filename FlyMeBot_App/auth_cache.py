@@ -0,0 +1,231 @@
+"""Inbound authentication without a signature check for every activity.
+
+The connector validates the bearer token of each activity: the token is
+decoded, its signing key is parsed from the cached JWK set and its signature
+verified, and the signing keys are fetched with blocking requests inside the
+turn once a day or when a key is unknown.
+
+`OpenIdKeyStore` takes the place of the connector's metadata cache for one
+OpenID metadata endpoint: its keys are parsed once and refreshed by a
+background task, so no request waits on a key rotation. `AuthCache` keeps
+the identity of the tokens that passed the full validation, keyed by a hash
+of the token with the channel and service URL it was validated for. An
+entry lasts until the token expires (or `ttl`, whichever comes first) and is
+dropped as soon as its signing key leaves the key set, so expired and revoked
+tokens go through the full validation again and are rejected by it.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+import aiohttp
+import jwt
+from botframework.connector.auth import ClaimsIdentity
+from botframework.connector.auth.jwt_token_extractor import JwtTokenExtractor
+from jwt.algorithms import RSAAlgorithm
+
+logger = logging.getLogger(__name__)
+
+
+class SigningKey(NamedTuple):
+    """What the connector's `JwtTokenExtractor` reads from its metadata cache."""
+
+    public_key: object
+    endorsements: list
+
+
+class OpenIdKeyStore:
+    """Signing keys of an OpenID metadata endpoint, refreshed in the background.
+
+    A key id that is not in the set schedules an early refresh (at most once
+    per `min_refresh_interval` seconds) and the token is rejected: the
+    channels sign with keys published well before their first use.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = 3600,
+        retry_interval: float = 60,
+        min_refresh_interval: float = 300,
+        timeout: float = 10,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._keys: Dict[str, SigningKey] = {}
+        self._session: aiohttp.ClientSession = None
+        self._task: asyncio.Task = None
+        # Refresh in progress, shared by the background task and the requests
+        self._pending: asyncio.Task = None
+        # time.monotonic() of the last refresh attempt
+        self._attempted: float = None
+
+        self.refreshes = 0
+        self.failures = 0
+        self.unknown_keys = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._keys),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "unknown_keys": self.unknown_keys,
+        }
+
+    def install(self):
+        """Serve the connector's token validation for `url` from this store."""
+        JwtTokenExtractor.metadataCache[self.url] = self
+
+    def has_key(self, key_id: str) -> bool:
+        return key_id in self._keys
+
+    async def get(self, key_id: str) -> SigningKey:
+        refreshing = self._pending is not None and not self._pending.done()
+        if not self._keys and (self._attempted is None or refreshing):
+            # No key set yet: the token waits for the first one, as with the connector's cache
+            await self._refresh_soon()
+        key = self._keys.get(key_id)
+        if key is None:
+            self.unknown_keys += 1
+            if time.monotonic() - self._attempted >= self.min_refresh_interval:
+                self._refresh_soon()
+            raise PermissionError(f"Unauthorized. Unknown signing key {key_id}.")
+        return key
+
+    async def refresh(self):
+        """Fetch the metadata document and its key set; the previous keys are kept on failure."""
+        self._attempted = time.monotonic()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+        async with self._session.get(self.url) as response:
+            response.raise_for_status()
+            jwks_uri = (await response.json(content_type=None))["jwks_uri"]
+        async with self._session.get(jwks_uri) as response:
+            response.raise_for_status()
+            key_set = (await response.json(content_type=None))["keys"]
+        self._keys = {
+            key["kid"]: SigningKey(RSAAlgorithm.from_jwk(json.dumps(key)), key.get("endorsements", []))
+            for key in key_set
+        }
+        self.refreshes += 1
+
+    async def _try_refresh(self) -> bool:
+        try:
+            await self.refresh()
+            return True
+        except Exception as error:  # pylint: disable=broad-except
+            self.failures += 1
+            logger.warning("Signing keys of %s not refreshed: %s", self.url, error)
+            return False
+
+    def _refresh_soon(self) -> asyncio.Task:
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.ensure_future(self._try_refresh())
+        return self._pending
+
+    async def _run(self):
+        while True:
+            refreshed = await self._refresh_soon()
+            await asyncio.sleep(self.refresh_interval if refreshed else self.retry_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        for task in (self._task, self._pending):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._pending = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class AuthCache:
+    """Identities of the validated tokens, in a bounded LRU cache.
+
+    Only successful validations are cached. The cached claims are copied
+    into a new `ClaimsIdentity` for each turn.
+    """
+
+    def __init__(
+        self,
+        key_stores: Iterable[OpenIdKeyStore] = (),
+        max_size: int = 1024,
+        ttl: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.key_stores = list(key_stores)
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (expiry timestamp, key id, claims, authentication type)
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.revoked = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "revoked": self.revoked,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    @staticmethod
+    def key(auth_header: str, channel_id: str, service_url: str) -> bytes:
+        # The endorsements and the service URL claim are checked against the activity
+        return hashlib.sha256(f"{auth_header}\n{channel_id}\n{service_url}".encode()).digest()
+
+    def get(self, key: bytes) -> Optional[ClaimsIdentity]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expiry, key_id, claims, authentication_type = entry
+        if expiry <= self._clock():
+            self.expired += 1
+        elif self.key_stores and not any(store.has_key(key_id) for store in self.key_stores):
+            self.revoked += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ClaimsIdentity(dict(claims), True, authentication_type)
+        del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, auth_header: str, identity: ClaimsIdentity):
+        if self.max_size <= 0 or identity is None or not identity.is_authenticated:
+            return
+        expiry = self._clock() + self.ttl
+        expires = identity.claims.get("exp")
+        if isinstance(expires, (int, float)):
+            expiry = min(expiry, expires)
+        token = auth_header.split(" ", 1)[-1]
+        key_id = jwt.get_unverified_header(token).get("kid")
+        self._entries[key] = (expiry, key_id, dict(identity.claims), identity.authentication_type)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,5 @@
+"""Benchmarks module.
+
+Each benchmark is run from the FlyMeBot_App folder, e.g.
+`python -m benchmarks.bench_card_template`.
+"""
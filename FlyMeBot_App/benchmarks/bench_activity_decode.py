@@ -0,0 +1,68 @@
+"""Decoding time of the activities posted to /api/messages.
+
+The request bodies of `tests/resources/activities_sample.json` (message,
+conversationUpdate and typing activities of the Emulator, Web Chat, Direct
+Line and Teams) are parsed and decoded the former way, `json.loads` then
+`Activity().deserialize`, and with the field maps of `ActivityDecoder`,
+after `json.loads` and after `loads` (orjson when it is installed).
+"""
+import json
+import os
+import timeit
+from collections import defaultdict
+
+from botbuilder.schema import Activity
+
+from helpers import activity_decoder
+from helpers.activity_decoder import ActivityDecoder
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SAMPLE = os.path.join(ROOT, "tests", "resources", "activities_sample.json")
+
+
+def bodies() -> dict:
+    """Request bodies of the corpus by activity type."""
+    with open(SAMPLE, encoding="utf-8") as file:
+        corpus = json.load(file)
+    by_type = defaultdict(list)
+    for activity in corpus:
+        by_type[activity["type"]].append(json.dumps(activity).encode())
+    return by_type
+
+
+def per_body(decode, payloads: list, number: int) -> float:
+    """Best time of a body, in microseconds."""
+    best = min(
+        timeit.repeat(lambda: [decode(payload) for payload in payloads], number=number, repeat=5)
+    )
+    return best / number / len(payloads) * 1e6
+
+
+def main(number: int = 500):
+    decoder = ActivityDecoder()
+    ways = {
+        "json + deserialize": lambda payload: Activity().deserialize(json.loads(payload)),
+        "json + field maps": lambda payload: decoder.decode(json.loads(payload)),
+    }
+    if activity_decoder.orjson is not None:
+        ways["orjson + field maps"] = lambda payload: decoder.decode(activity_decoder.loads(payload))
+
+    by_type = bodies()
+    for payloads in by_type.values():
+        for payload in payloads:
+            expected = Activity().deserialize(json.loads(payload))
+            assert all(decode(payload) == expected for decode in ways.values())
+
+    print(f"{'activity':<20}" + "".join(f"{way:>22}" for way in ways) + f"{'speedup':>10}")
+    for kind, payloads in sorted(by_type.items()):
+        times = [per_body(decode, payloads, number) for decode in ways.values()]
+        print(
+            f"{kind + ' (%d)' % len(payloads):<20}"
+            + "".join(f"{time:19.1f} us" for time in times)
+            + f"{times[0] / times[-1]:9.1f}x"
+        )
+    print(f"\nfast path: {decoder.fast}, fallback: {decoder.fallback}")
+
+
+if __name__ == "__main__":
+    main()
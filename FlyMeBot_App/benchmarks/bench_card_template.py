@@ -0,0 +1,67 @@
+"""Compare the precompiled card template with the previous rendering path."""
+import json
+import os
+import re
+import timeit
+
+from booking_details import BookingDetails
+from helpers.card_template import RESOURCES_DIR, CardTemplate
+
+CARD_PATH = os.path.join(RESOURCES_DIR, "bookedFlightCard.json")
+
+BOOKING = BookingDetails(
+    destination="Berlin",
+    origin="Paris",
+    start_date="2023-01-05",
+    end_date="2023-01-12",
+    budget="500 €",
+)
+
+
+def legacy_render(result):
+    """Former `MainDialog.create_adaptive_card_attachment` body."""
+    with open(CARD_PATH) as card_file:
+        card = json.load(card_file)
+
+    data = {
+        "origin": result.origin,
+        "destination": result.destination,
+        "start_date": result.start_date,
+        "end_date": result.end_date,
+        "budget": result.budget,
+    }
+    string_temp = str(card)
+    for key in data:
+        pattern = "\\${" + key + "}"
+        string_temp = re.sub(pattern, str(data[key]), string_temp)
+    return eval(string_temp)  # pylint: disable=eval-used
+
+
+def compiled_render(template, result):
+    return template.render(
+        {
+            "origin": result.origin,
+            "destination": result.destination,
+            "start_date": result.start_date,
+            "end_date": result.end_date,
+            "budget": result.budget,
+        }
+    )
+
+
+def main(number: int = 2000):
+    template = CardTemplate.from_file(CARD_PATH)
+    assert legacy_render(BOOKING) == compiled_render(template, BOOKING)
+
+    legacy = min(timeit.repeat(lambda: legacy_render(BOOKING), number=number, repeat=3))
+    compiled = min(
+        timeit.repeat(lambda: compiled_render(template, BOOKING), number=number, repeat=3)
+    )
+
+    print(f"legacy   : {number / legacy:12.0f} renders/s")
+    print(f"compiled : {number / compiled:12.0f} renders/s")
+    print(f"speedup  : {legacy / compiled:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
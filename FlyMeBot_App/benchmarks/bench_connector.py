@@ -0,0 +1,161 @@
+"""Outbound send latency and connector connections per 1,000 turns.
+
+Turns of concurrent conversations are run through `AdapterWithErrorHandler`
+posting one reply each to the local connector stand-in
+(`fake_connector.py`): once with the adapter's own connector clients
+(a `requests` session per client, used from the thread pool, and
+`signed_session` on each send) and once with `ConnectorPool`.
+
+The app credentials are simulated: like MSAL, they hand out a cached token
+until `--msal-margin` seconds before its expiry, then fetch a new one, which
+blocks for `--token-latency` seconds. Tokens last `--token-lifetime`
+seconds, so a run sees several of them.
+
+    python -m benchmarks.bench_connector --turns 1000 --users 20
+"""
+import argparse
+import asyncio
+import threading
+import time
+import uuid
+from statistics import median
+
+import jwt
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage, TurnContext
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+from botframework.connector.auth import ClaimsIdentity, MicrosoftAppCredentials
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from connector_pool import ConnectorPool, ServiceTokenCache
+from .fake_connector import FakeConnector
+from .fake_luis import BackgroundServer
+
+APP_ID = "0b1c2d3e-4f5a-6b7c-8d9e-0f1a2b3c4d5e"
+
+
+class SimulatedCredentials(MicrosoftAppCredentials):
+    """App credentials whose token fetch blocks, as MSAL's does on a cache miss."""
+
+    def __init__(self, connector: FakeConnector, lifetime: float, latency: float, msal_margin: float):
+        super().__init__(APP_ID, "password")
+        self.connector = connector
+        self.lifetime = lifetime
+        self.latency = latency
+        self.msal_margin = msal_margin
+        self.fetches = 0
+        self._token = None
+        self._expiry = 0.0
+        self._lock = threading.Lock()
+
+    def get_access_token(self, force_refresh: bool = False) -> str:
+        with self._lock:
+            if self._token is None or time.time() > self._expiry - self.msal_margin:
+                time.sleep(self.latency)
+                self.fetches += 1
+                self._expiry = time.time() + self.lifetime
+                self._token = jwt.encode(
+                    {"aud": "https://api.botframework.com", "exp": self._expiry, "jti": self.fetches},
+                    "secret",
+                ).decode()
+                self.connector.tokens.add(self._token)
+            return self._token
+
+
+async def run(args, pooled: bool) -> dict:
+    connector = FakeConnector(tokens=["unused"])
+    credentials = SimulatedCredentials(connector, args.token_lifetime, args.token_latency, args.msal_margin)
+    pool = None
+    if pooled:
+        pool = ConnectorPool(
+            tokens=ServiceTokenCache(refresh_margin=args.msal_margin * 0.8, retry_interval=0.1)
+        )
+    adapter = AdapterWithErrorHandler(
+        BotFrameworkAdapterSettings(APP_ID, "password", app_credentials=credentials),
+        ConversationState(MemoryStorage()),
+        connector_pool=pool,
+    )
+    identity = ClaimsIdentity({"aud": APP_ID, "ver": "1.0"}, True)
+
+    latencies = []
+    send = adapter.send_activities
+
+    async def timed_send(context, activities):
+        start = time.perf_counter()
+        try:
+            return await send(context, activities)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    adapter.send_activities = timed_send
+
+    async def logic(context: TurnContext):
+        await context.send_activity(f"echo: {context.activity.text}")
+
+    with BackgroundServer(connector.app()) as server:
+        if pool is not None:
+            # As app.py does on startup
+            pool.tokens.prefetch(credentials)
+            await asyncio.sleep(args.token_latency * 2)
+
+        async def user(index: int, turns: int):
+            conversation = ConversationAccount(id=f"conversation-{index}")
+            for turn in range(turns):
+                activity = Activity(
+                    type=ActivityTypes.message,
+                    id=str(uuid.uuid4()),
+                    channel_id="msteams",
+                    service_url=server.url,
+                    conversation=conversation,
+                    from_property=ChannelAccount(id=f"user-{index}"),
+                    recipient=ChannelAccount(id=APP_ID),
+                    text=f"message {turn}",
+                )
+                await adapter.process_activity_with_identity(activity, identity, logic)
+
+        start = time.perf_counter()
+        per_user = args.turns // args.users
+        await asyncio.gather(*(user(index, per_user) for index in range(args.users)))
+        elapsed = time.perf_counter() - start
+        waits = pool.tokens.waits if pool is not None else None
+        if pool is not None:
+            await pool.close()
+
+    turns = per_user * args.users
+    latencies.sort()
+    return {
+        "turns": turns,
+        "elapsed": elapsed,
+        "p50": median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "max": latencies[-1],
+        "connections": len(connector.connections) * 1000 / turns,
+        "token_fetches": credentials.fetches,
+        "token_waits": waits,
+        "unauthorized": connector.unauthorized,
+    }
+
+
+async def main(args):
+    results = {"adapter clients": await run(args, False), "ConnectorPool": await run(args, True)}
+    print(
+        f"{'clients':<16} {'turns/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}"
+        f" {'conn./1k turns':>15} {'token fetches':>14} {'refused':>8}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<16} {result['turns'] / result['elapsed']:8.0f} {result['p50'] * 1000:9.2f}"
+            f" {result['p95'] * 1000:9.2f} {result['max'] * 1000:9.2f} {result['connections']:15.1f}"
+            f" {result['token_fetches']:14d} {result['unauthorized']:8d}"
+        )
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    PARSER.add_argument("--turns", type=int, default=1000)
+    PARSER.add_argument("--users", type=int, default=20)
+    PARSER.add_argument("--token-lifetime", type=float, default=2.0, help="seconds")
+    PARSER.add_argument("--token-latency", type=float, default=0.1, help="seconds")
+    PARSER.add_argument("--msal-margin", type=float, default=0.5, help="seconds")
+    asyncio.run(main(PARSER.parse_args()))
@@ -0,0 +1,81 @@
+"""Latency of the date prompt: recognition and validation of a reply.
+
+The same replies go through the former `DateTimePrompt` and through
+`FastDateTimePrompt`, which only calls the full datetime recognizer for the
+replies it cannot read itself.
+"""
+import asyncio
+import statistics
+import time
+from copy import copy
+
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs.prompts import DateTimePrompt, PromptOptions, PromptValidatorContext
+from botbuilder.schema import ActivityTypes
+
+from dialogs import FastDateTimePrompt
+from dialogs.date_resolver_dialog import DateResolverDialog
+
+# Replies to "What is your desired departure date ? (example: 10/18/2026 is today)"
+REPLIES = [
+    "10/18/2026",
+    "11/2/2026",
+    "2026-12-24",
+    "December 24, 2026",
+    "Jan 5th 2027",
+    "5 march 2027",
+    "the 1st of May, 2027",
+    "12/31/2026",
+    "next friday",
+    "tomorrow",
+]
+
+
+def turn_context(adapter: TestAdapter, text: str) -> TurnContext:
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = text
+    return TurnContext(adapter, activity)
+
+
+async def validate(prompt: DateTimePrompt, context: TurnContext) -> bool:
+    options = PromptOptions()
+    recognized = await prompt.on_recognize(context, {}, options)
+    return await DateResolverDialog.datetime_prompt_validator(
+        PromptValidatorContext(context, recognized, {}, options)
+    )
+
+
+async def latencies(prompt: DateTimePrompt, rounds: int) -> list:
+    adapter = TestAdapter()
+    contexts = [turn_context(adapter, reply) for reply in REPLIES]
+    times = []
+    for _ in range(rounds):
+        for context in contexts:
+            start = time.perf_counter()
+            await validate(prompt, context)
+            times.append(time.perf_counter() - start)
+    return times
+
+
+async def main(rounds: int = 20):
+    full = DateTimePrompt(DateTimePrompt.__name__)
+    fast = FastDateTimePrompt(DateTimePrompt.__name__)
+    adapter = TestAdapter()
+    for reply in REPLIES:
+        context = turn_context(adapter, reply)
+        assert await validate(full, context) == await validate(fast, context), reply
+
+    for name, prompt in (("DateTimePrompt", full), ("FastDateTimePrompt", fast)):
+        times = sorted(await latencies(prompt, rounds))
+        print(
+            f"{name:<20} mean {statistics.mean(times) * 1000:8.3f} ms"
+            f"   p50 {times[len(times) // 2] * 1000:8.3f} ms"
+            f"   p95 {times[int(len(times) * 0.95)] * 1000:8.3f} ms"
+        )
+    print(f"replies read without the full recognizer: {fast.fast / (fast.fast + fast.fallback):.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""Entity resolution time on recorded LUIS payloads of increasing entity count.
+
+Bigger payloads are built by repeating the recorded utterance, which keeps
+the real entity layout while multiplying the number of instances.
+"""
+import json
+import os
+import timeit
+
+from azure.cognitiveservices.language.luis.runtime.models import LuisResult
+from botbuilder.ai.luis.luis_util import LuisUtil
+from botbuilder.core import RecognizerResult
+
+from helpers.luis_helper import ENTITY_RESOLVER, MAP_KEY_TYPE
+from .fake_luis import RECORDINGS_DIR
+
+
+def legacy_get_entity(recognizer_result, key, type):
+    """Former `LuisHelper._get_entity`."""
+    if (recognizer_result.entities.get("$instance") is None
+        or recognizer_result.entities.get(key) is None
+        or len(recognizer_result.entities.get(key)) == 0):
+        return None
+
+    score = 0
+    index = None
+    for i, entity in enumerate(recognizer_result.entities.get("$instance").get(key)):
+        if entity['score'] > score:
+            score = entity['score']
+            index = i
+
+    selected_entity = recognizer_result.entities.get("$instance").get(key)[index]
+
+    score = 100
+    index = None
+    for i, entity in enumerate(recognizer_result.entities.get("$instance").get(type)):
+        s = abs(entity['startIndex'] - selected_entity['startIndex']) + abs(entity['endIndex'] - selected_entity['endIndex'])
+        if s < score:
+            score = s
+            index = i
+
+    if (index is None
+        or recognizer_result.entities.get(type) is None
+        or len(recognizer_result.entities.get(type)) <= index):
+        return None
+
+    return (
+        recognizer_result.entities.get(type)[index].capitalize()
+        if type == 'geographyV2_city'
+        else recognizer_result.entities.get(type)[index]["timex"][0]
+        if type == 'datetime'
+        else recognizer_result.entities.get(type)[index]
+        if type == 'number'
+        else None
+    )
+
+
+def legacy_resolve(recognizer_result):
+    resolved = {}
+    for key, type in MAP_KEY_TYPE.items():
+        entity = legacy_get_entity(recognizer_result, key, type)
+        if entity is not None:
+            resolved[key] = entity
+    return resolved
+
+
+def repeated_payload(payload: dict, times: int) -> RecognizerResult:
+    offset = len(payload["query"]) + 1
+    entities = []
+    for repetition in range(times):
+        for entity in payload["entities"]:
+            entity = dict(entity)
+            entity["startIndex"] += repetition * offset
+            entity["endIndex"] += repetition * offset
+            entities.append(entity)
+
+    luis_result = LuisResult.deserialize(
+        dict(payload, query=" ".join([payload["query"]] * times), entities=entities)
+    )
+    return RecognizerResult(
+        text=luis_result.query,
+        intents=LuisUtil.get_intents(luis_result),
+        entities=LuisUtil.extract_entities_and_metadata(
+            luis_result.entities, luis_result.composite_entities, True
+        ),
+    )
+
+
+def main(number: int = 500):
+    with open(os.path.join(RECORDINGS_DIR, "luis_book_flight.json"), encoding="utf-8") as recording:
+        payload = json.load(recording)
+
+    print(f"{'entities':>8} {'legacy (us)':>12} {'resolver (us)':>14} {'speedup':>8}")
+    for times in (1, 4, 16, 64, 256):
+        recognizer_result = repeated_payload(payload, times)
+        assert legacy_resolve(recognizer_result) == ENTITY_RESOLVER.resolve(recognizer_result)
+
+        legacy = min(timeit.repeat(lambda: legacy_resolve(recognizer_result), number=number, repeat=3))
+        resolver = min(
+            timeit.repeat(lambda: ENTITY_RESOLVER.resolve(recognizer_result), number=number, repeat=3)
+        )
+        print(
+            f"{len(payload['entities']) * times:8d} {legacy / number * 1e6:12.1f} "
+            f"{resolver / number * 1e6:14.1f} {legacy / resolver:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
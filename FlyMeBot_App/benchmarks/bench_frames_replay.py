@@ -0,0 +1,326 @@
+"""In-process replay of Frames dialogues through the booking dialogs.
+
+Each Frames dialogue becomes a scripted conversation: its first user turn
+is the booking request, answered by a recognizer stub with the entities the
+dataset labels in it, and the user then answers each prompt of the booking
+dialog with the values labelled later in the dialogue (or seeded random
+ones). The conversations are driven through `MainDialog`/`BookingDialog`
+with botbuilder's `TestAdapter`: no HTTP, no LUIS.
+
+The report gives the turns per second, the time spent in each waterfall step
+(excluding the steps of the dialogs it begins) and, over a second traced
+pass, the memory allocated and retained per turn.
+
+    python -m benchmarks.bench_frames_replay --frames ../data/frames.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import time
+import tracemalloc
+from collections import defaultdict
+from copy import copy
+from datetime import date, timedelta
+from statistics import mean, quantiles
+from typing import Dict, List
+
+from botbuilder.core import (
+    ConversationState,
+    IntentScore,
+    MemoryStorage,
+    Recognizer,
+    RecognizerResult,
+    TurnContext,
+    UserState,
+)
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import ComponentDialog, Dialog, WaterfallDialog
+from botbuilder.schema import ActivityTypes, ConversationAccount
+
+from bots import DialogBot
+from dialogs import BookingDialog, MainDialog
+from helpers.luis_helper import Intent
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# Where the notebook downloads the dataset
+FRAMES = os.path.join(ROOT, os.pardir, "data", "frames.json")
+SAMPLE = os.path.join(ROOT, "tests", "resources", "frames_sample.json")
+
+SLOTS = ("or_city", "dst_city", "str_date", "end_date", "budget")
+CITIES = ["Paris", "Berlin", "Madrid", "Toronto", "Tokyo", "London"]
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+class Conversation:
+    """Scripted user turns, with the recognizer results of the utterances."""
+
+    def __init__(self, dialogue_id: str, turns: List[str], results: Dict[str, RecognizerResult]):
+        self.dialogue_id = dialogue_id
+        self.turns = turns
+        self.results = results
+
+
+def labelled_slots(turn: dict) -> Dict[str, str]:
+    slots = {}
+    for act in turn.get("labels", {}).get("acts", []):
+        for arg in act.get("args", []):
+            value = arg.get("val")
+            if arg.get("key") in SLOTS and isinstance(value, str) and value != "-1":
+                slots.setdefault(arg["key"], value)
+    return slots
+
+
+def add_entity(entities: dict, key: str, prebuilt: str, text: str, value: str, resolution):
+    """Add a custom entity and its prebuilt entity, shaped like a LUIS result."""
+    start = text.lower().find(value.lower())
+    if start < 0:
+        return False
+    end = start + len(value)
+    instances = entities.setdefault("$instance", {})
+    instances.setdefault(key, []).append(
+        {"startIndex": start, "endIndex": end, "text": text[start:end], "type": key, "score": 0.95}
+    )
+    entities.setdefault(key, []).append(text[start:end])
+    instances.setdefault(prebuilt, []).append(
+        {"startIndex": start, "endIndex": end, "text": text[start:end], "type": prebuilt}
+    )
+    entities.setdefault(prebuilt, []).append(resolution)
+    return True
+
+
+def booking_result(text: str, slots: Dict[str, str]) -> (RecognizerResult, set):
+    """Recognizer result of a booking request, and the slots it resolves."""
+    entities = {}
+    resolved = set()
+    for key in ("or_city", "dst_city"):
+        if key in slots and add_entity(entities, key, "geographyV2_city", text, slots[key], slots[key].lower()):
+            resolved.add(key)
+    for key in ("str_date", "end_date"):
+        # The booking dialog only accepts definite dates
+        value = slots.get(key)
+        if value and ISO_DATE.match(value):
+            if add_entity(entities, key, "datetime", text, value, {"type": "date", "timex": [value]}):
+                resolved.add(key)
+    number = NUMBER.search(slots.get("budget", ""))
+    if number and add_entity(entities, "budget", "number", text, number.group(), float(number.group())):
+        resolved.add("budget")
+
+    result = RecognizerResult(
+        text=text, intents={Intent.BOOK_FLIGHT.value: IntentScore(0.95)}, entities=entities
+    )
+    return result, resolved
+
+
+def convert(dialogue: dict, rng: random.Random) -> Conversation:
+    """Scripted conversation of a Frames dialogue, None without user turns."""
+    user_turns = [turn for turn in dialogue["turns"] if turn["author"] == "user"]
+    if not user_turns:
+        return None
+
+    request = user_turns[0]["text"]
+    result, resolved = booking_result(request, labelled_slots(user_turns[0]))
+    slots = {}
+    for turn in user_turns:
+        for key, value in labelled_slots(turn).items():
+            slots.setdefault(key, value)
+
+    start = date(2016, 8, 1) + timedelta(days=rng.randrange(120))
+    if ISO_DATE.match(slots.get("str_date", "")):
+        start = date.fromisoformat(slots["str_date"])
+    end = start + timedelta(days=rng.randrange(2, 21))
+    answers = {
+        "or_city": slots.get("or_city") or rng.choice(CITIES),
+        "dst_city": slots.get("dst_city") or rng.choice(CITIES),
+        # DateTimePrompt needs a complete date
+        "str_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "budget": slots.get("budget") or "%d euros" % rng.randrange(500, 5000, 100),
+    }
+
+    # The first message starts the main dialog, which asks what to do
+    turns = ["hi", request]
+    turns.extend(answers[key] for key in SLOTS if key not in resolved)
+    turns.append(rng.choice(["Yep", "Yep", "Yep", "Nope"]))
+    return Conversation(dialogue.get("id", ""), turns, {request: result})
+
+
+class ScriptedRecognizer(Recognizer):
+    """Stand-in for LUIS answering with the results of the scripted requests."""
+
+    is_configured = True
+
+    def __init__(self):
+        self.results: Dict[str, RecognizerResult] = {}
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        text = turn_context.activity.text
+        return self.results.get(text) or RecognizerResult(
+            text=text, intents={Intent.NONE_INTENT.value: IntentScore(0.9)}, entities={}
+        )
+
+
+class StepTimer:
+    """Self time of each waterfall step: the nested steps are not counted."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._stack: List[float] = []
+
+    def instrument(self, dialog: Dialog, owner: str = None):
+        if isinstance(dialog, WaterfallDialog):
+            # pylint: disable=protected-access
+            dialog._steps = [
+                self._wrap(f"{owner or dialog.id}.{step.__name__}", step) for step in dialog._steps
+            ]
+        if isinstance(dialog, ComponentDialog):
+            for child in dialog._dialogs._dialogs.values():  # pylint: disable=protected-access
+                self.instrument(child, dialog.id)
+
+    def _wrap(self, name: str, step):
+        async def timed_step(step_context):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return await step(step_context)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.samples[name].append(elapsed - self._stack.pop())
+                if self._stack:
+                    self._stack[-1] += elapsed
+
+        timed_step.__name__ = step.__name__
+        return timed_step
+
+
+class Replay:
+    def __init__(self, timer: StepTimer = None):
+        self.recognizer = ScriptedRecognizer()
+        dialog = MainDialog(self.recognizer, BookingDialog())
+        if timer is not None:
+            timer.instrument(dialog)
+        storage = MemoryStorage()
+        self.bot = DialogBot(ConversationState(storage), UserState(storage), dialog, None)
+        self.adapter = TestAdapter(self.bot.on_turn)
+        self.errors = 0
+
+    async def turn(self, conversation_id: str, text: str):
+        activity = copy(self.adapter.template)
+        activity.type = ActivityTypes.message
+        activity.conversation = ConversationAccount(id=conversation_id)
+        activity.text = text
+        try:
+            await self.adapter.run_pipeline(TurnContext(self.adapter, activity), self.bot.on_turn)
+        except Exception:  # pylint: disable=broad-except
+            self.errors += 1
+        self.adapter.activity_buffer.clear()
+
+    async def run(self, conversations: List[Conversation], on_turn=None) -> List[float]:
+        latencies = []
+        for index, conversation in enumerate(conversations):
+            self.recognizer.results.update(conversation.results)
+            conversation_id = f"{conversation.dialogue_id}-{index}"
+            for text in conversation.turns:
+                if on_turn is not None:
+                    on_turn(True)
+                start = time.perf_counter()
+                await self.turn(conversation_id, text)
+                latencies.append(time.perf_counter() - start)
+                if on_turn is not None:
+                    on_turn(False)
+        return latencies
+
+
+def load_conversations(path: str, count: int, seed: int) -> List[Conversation]:
+    with open(path, encoding="utf-8") as frames:
+        dialogues = json.load(frames)
+    rng = random.Random(seed)
+    conversations = []
+    # Small datasets are cycled, each pass draws new answers
+    while len(conversations) < count:
+        for dialogue in dialogues:
+            conversation = convert(dialogue, rng)
+            if conversation is not None:
+                conversations.append(conversation)
+            if len(conversations) == count:
+                break
+    return conversations
+
+
+def allocations(conversations: List[Conversation], seed: int):
+    """Peak and retained traced memory per turn, in KB."""
+    peaks, retained = [], []
+    before = [0]
+
+    def on_turn(starting: bool):
+        current, peak = tracemalloc.get_traced_memory()
+        if starting:
+            tracemalloc.reset_peak()
+            before[0] = current
+        else:
+            peaks.append(peak - before[0])
+            retained.append(current - before[0])
+
+    random.seed(seed)
+    replay = Replay()
+    tracemalloc.start()
+    try:
+        asyncio.run(replay.run(conversations, on_turn))
+    finally:
+        tracemalloc.stop()
+    return mean(peaks) / 1024, mean(retained) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--frames", default=FRAMES, help="frames.json of the Frames dataset")
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--traced", type=int, default=200, help="conversations of the traced pass")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = args.frames
+    if not os.path.exists(path):
+        print(f"{path} not found, replaying the sample dialogues of {SAMPLE}")
+        path = SAMPLE
+    conversations = load_conversations(path, args.conversations, args.seed)
+
+    timer = StepTimer()
+    random.seed(args.seed)
+    replay = Replay(timer)
+    # The dialogs print and log every booking
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(
+        devnull
+    ):
+        start = time.perf_counter()
+        latencies = asyncio.run(replay.run(conversations))
+        elapsed = time.perf_counter() - start
+        peak, retained = allocations(conversations[: args.traced], args.seed)
+
+    print(f"{len(conversations)} conversations, {len(latencies)} turns, {replay.errors} errors")
+    print(f"turns per second: {len(latencies) / elapsed:.0f}")
+    turn_percentiles = quantiles(latencies, n=100)
+    print(
+        f"turn latency (us): p50 {turn_percentiles[49] * 1e6:.0f}, "
+        f"p95 {turn_percentiles[94] * 1e6:.0f}, p99 {turn_percentiles[98] * 1e6:.0f}"
+    )
+    print(f"memory per turn (KB): {peak:.1f} allocated at peak, {retained:.1f} retained")
+
+    total = sum(sum(samples) for samples in timer.samples.values())
+    print(f"\n{'waterfall step':<36} {'calls':>7} {'mean (us)':>10} {'p95 (us)':>9} {'share':>6}")
+    for name, samples in sorted(timer.samples.items(), key=lambda item: -sum(item[1])):
+        p95 = quantiles(samples, n=20)[18] if len(samples) > 1 else samples[0]
+        print(
+            f"{name:<36} {len(samples):7d} {mean(samples) * 1e6:10.1f} "
+            f"{p95 * 1e6:9.1f} {sum(samples) / total:6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
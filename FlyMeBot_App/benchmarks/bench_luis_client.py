@@ -0,0 +1,53 @@
+"""Turns per second of concurrent LUIS calls, blocking SDK client against aiohttp."""
+import argparse
+import asyncio
+import time
+from copy import copy
+
+from botbuilder.ai.luis import LuisApplication, LuisPredictionOptions, LuisRecognizer
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes
+
+from recognizers.async_luis_recognizer import AsyncLuisRecognizer
+from .fake_luis import APP_ID, ENDPOINT_KEY, BackgroundServer, FakeLuis
+
+UTTERANCE = "book a flight from paris to berlin on 2023-01-05 until 2023-01-12 with a budget of 500 euros"
+
+
+def turn_context(adapter: TestAdapter) -> TurnContext:
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = UTTERANCE
+    return TurnContext(adapter, activity)
+
+
+async def run(recognizer, users: int, rounds: int) -> float:
+    adapter = TestAdapter()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(
+            *(recognizer.recognize(turn_context(adapter)) for _ in range(users))
+        )
+    return users * rounds / (time.perf_counter() - start)
+
+
+async def main(users: int, rounds: int, latency: float):
+    with BackgroundServer(FakeLuis(latency=latency).app()) as server:
+        application = LuisApplication(APP_ID, ENDPOINT_KEY, server.url)
+
+        blocking = LuisRecognizer(application, LuisPredictionOptions())
+        print(f"blocking : {await run(blocking, users, rounds):8.1f} calls/s")
+
+        pooled = AsyncLuisRecognizer(application, LuisPredictionOptions())
+        print(f"pooled   : {await run(pooled, users, rounds):8.1f} calls/s")
+        await pooled.close()
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__)
+    PARSER.add_argument("--users", type=int, default=20)
+    PARSER.add_argument("--rounds", type=int, default=5)
+    PARSER.add_argument("--latency", type=float, default=0.05)
+    ARGS = PARSER.parse_args()
+    asyncio.run(main(ARGS.users, ARGS.rounds, ARGS.latency))
@@ -0,0 +1,129 @@
+"""Connector calls per turn, with and without the outbound buffer.
+
+The booking conversations below are replayed through a `BotFrameworkAdapter`
+posting to the local connector stand-in (`fake_connector.py`), once as the
+adapter was (one POST per activity) and once with `OutboundBuffer`. Messages
+sent after a delay are delivered by `ScheduledDelivery` in both cases and
+counted with the turn that sent them; as their delays are real, a run
+lasts a minute or two.
+
+    python -m benchmarks.bench_outbound
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+from statistics import mean
+
+from botbuilder.core import (
+    BotFrameworkAdapter,
+    BotFrameworkAdapterSettings,
+    ConversationState,
+    MemoryStorage,
+    UserState,
+)
+from botbuilder.schema import Activity
+
+from bots import DialogBot
+from dialogs import BookingDialog, MainDialog
+from outbound_buffer import OutboundBuffer
+from scheduled_delivery import ScheduledDelivery
+from .bench_frames_replay import ScriptedRecognizer, booking_result
+from .fake_connector import FakeConnector
+from .fake_luis import BackgroundServer
+
+REQUEST = "book a flight from paris to berlin"
+BOOKING = "book a flight from paris to berlin on 2023-01-05 until 2023-01-12 with a budget of 500 euros"
+
+SCRIPTS = {
+    # The return date is before the departure: TARDIS messages, then an apology
+    "tardis": ["hi", REQUEST, "2023-01-12", "2023-01-05", "500 euros", "Nope"],
+    # Everything in one message: the booked flight card
+    "booked": ["hi", BOOKING, "Yep"],
+}
+
+
+def recognizer() -> ScriptedRecognizer:
+    scripted = ScriptedRecognizer()
+    scripted.results[REQUEST], _ = booking_result(REQUEST, {"or_city": "paris", "dst_city": "berlin"})
+    scripted.results[BOOKING], _ = booking_result(
+        BOOKING,
+        {
+            "or_city": "paris",
+            "dst_city": "berlin",
+            "str_date": "2023-01-05",
+            "end_date": "2023-01-12",
+            "budget": "500",
+        },
+    )
+    return scripted
+
+
+async def replay(connector: FakeConnector, service_url: str, buffered: bool, conversations: int, seed: int):
+    """Connector calls of each turn of each script."""
+    random.seed(seed)
+    adapter = BotFrameworkAdapter(BotFrameworkAdapterSettings("", ""))
+    if buffered:
+        adapter.use(OutboundBuffer())
+    delivery = ScheduledDelivery(adapter)
+    adapter.use(delivery)
+    storage = MemoryStorage()
+    bot = DialogBot(
+        ConversationState(storage), UserState(storage), MainDialog(recognizer(), BookingDialog()), None
+    )
+
+    calls = {name: [[] for _ in script] for name, script in SCRIPTS.items()}
+    for index in range(conversations):
+        for name, script in SCRIPTS.items():
+            conversation_id = f"{name}-{buffered}-{index}"
+            for turn, text in enumerate(script):
+                before = connector.calls
+                activity = Activity().deserialize(
+                    {
+                        "type": "message",
+                        "channelId": "emulator",
+                        "serviceUrl": service_url,
+                        "from": {"id": "user"},
+                        "recipient": {"id": "bot"},
+                        "conversation": {"id": conversation_id},
+                        "text": text,
+                    }
+                )
+                await adapter.process_activity(activity, "", bot.on_turn)
+                await delivery.join()
+                calls[name][turn].append(connector.calls - before)
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--conversations", type=int, default=20, help="replays of each script")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    connector = FakeConnector()
+    with BackgroundServer(connector.app()) as server:
+        # The dialogs print and log every booking
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(
+            devnull
+        ):
+            before = asyncio.run(replay(connector, server.url, False, args.conversations, args.seed))
+            after = asyncio.run(replay(connector, server.url, True, args.conversations, args.seed))
+
+    print(f"{'script':<8} {'turn':<36} {'calls before':>12} {'calls after':>11}")
+    for name, script in SCRIPTS.items():
+        for turn, text in enumerate(script):
+            label = text if len(text) <= 36 else text[:33] + "..."
+            print(f"{name:<8} {label:<36} {mean(before[name][turn]):12.2f} {mean(after[name][turn]):11.2f}")
+    total_before = sum(sum(map(sum, turns)) for turns in before.values())
+    total_after = sum(sum(map(sum, turns)) for turns in after.values())
+    turns = args.conversations * sum(len(script) for script in SCRIPTS.values())
+    print(f"per turn: {total_before / turns:.2f} calls before, {total_after / turns:.2f} after")
+    print(f"unauthorized calls: {connector.unauthorized}")
+
+
+if __name__ == "__main__":
+    main()
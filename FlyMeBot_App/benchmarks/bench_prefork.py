@@ -0,0 +1,92 @@
+"""Memory of the pre-fork workers: what each extra worker really costs.
+
+Starts `app.py` with `WORKERS=N` and reads `/proc/<pid>/smaps_rollup` of the
+supervisor and of every worker (Linux only). `Private` is the memory a
+worker does not share with the others; `Rss` counts the shared pages too.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def memory(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                values[name] = int(value.split()[0])
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "private": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as listing:
+        return [int(child) for child in listing.read().split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=3978)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    # More than one worker needs the shared storage
+    directory = tempfile.TemporaryDirectory()
+    env = dict(
+        os.environ,
+        WORKERS=str(args.workers),
+        STORAGE="sqlite",
+        STORAGE_PATH=os.path.join(directory.name, "state.sqlite3"),
+        PORT=str(args.port),
+        APPINSIGHTS_INSTRUMENTATION_KEY=os.environ.get(
+            "APPINSIGHTS_INSTRUMENTATION_KEY",
+            "InstrumentationKey=00000000-0000-0000-0000-000000000000",
+        ),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "app.py"], cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(5)
+        # Touch every worker once so the measure includes a served request.
+        for _ in range(args.requests):
+            try:
+                urllib.request.urlopen(
+                    urllib.request.Request(
+                        f"http://127.0.0.1:{args.port}/",
+                        headers={"Content-Type": "application/json"},
+                    )
+                ).read()
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+        supervisor = memory(server.pid)
+        print(f"{'process':>12} {'rss (kB)':>10} {'pss (kB)':>10} {'private (kB)':>13}")
+        print(f"{'supervisor':>12} {supervisor['rss']:10d} {supervisor['pss']:10d} {supervisor['private']:13d}")
+        workers = [memory(pid) for pid in children(server.pid)]
+        for index, worker in enumerate(workers):
+            print(f"{'worker ' + str(index):>12} {worker['rss']:10d} {worker['pss']:10d} {worker['private']:13d}")
+        if workers:
+            private = sum(worker["private"] for worker in workers) / len(workers)
+            print(f"\nmean private memory per extra worker: {private:.0f} kB "
+                  f"({private / workers[0]['rss']:.0%} of a worker's rss)")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(30)
+        directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
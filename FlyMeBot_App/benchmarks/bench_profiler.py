@@ -0,0 +1,78 @@
+"""Event loop overhead of the slow-turn profiler.
+
+`--turns` turns run concurrently for `--duration` seconds, each waking up
+every millisecond inside `PROFILER.profile_turn`; the event loop is
+saturated, so the wake-ups counted measure its throughput. The best of
+`--repeat` runs is compared without the profiler, with every turn sampled
+every 5 ms from its start (the former schedule), and with the defaults of
+`DefaultConfig`, with turns shorter and longer than the threshold.
+
+    python -m benchmarks.bench_profiler --turns 200 --duration 0.4 --repeat 5
+"""
+import argparse
+import asyncio
+import tempfile
+
+from config import DefaultConfig
+from telemetry import ProfileRing, SlowTurnProfiler
+from telemetry import profiling
+
+
+async def turn(profiler: SlowTurnProfiler, index: int, duration: float, wakeups: list):
+    async with profiler.profile_turn(f"conversation-{index}", "activity-1"):
+        loop = asyncio.get_event_loop()
+        end = loop.time() + duration
+        while loop.time() < end:
+            await asyncio.sleep(0.001)
+            wakeups[0] += 1
+
+
+async def iterations(profiler: SlowTurnProfiler, turns: int, duration: float) -> int:
+    """Wake-ups of the turns, one event loop callback each."""
+    wakeups = [0]
+    await asyncio.gather(*(turn(profiler, index, duration, wakeups) for index in range(turns)))
+    return wakeups[0]
+
+
+async def main(args):
+    config = DefaultConfig()
+    with tempfile.TemporaryDirectory() as directory:
+        ring = ProfileRing(directory)
+        variants = [
+            ("off", SlowTurnProfiler(), profiling.ENROL_FRACTION),
+            ("every turn, 5 ms", SlowTurnProfiler(ring, 1e-9, 0.005), 0.0),
+            (
+                f"default, turns < {config.SLOW_TURN_THRESHOLD:g} s",
+                SlowTurnProfiler(ring, config.SLOW_TURN_THRESHOLD, config.PROFILE_INTERVAL),
+                profiling.ENROL_FRACTION,
+            ),
+            (
+                f"default, turns > {args.duration / 2:g} s",
+                SlowTurnProfiler(ring, args.duration / 2, config.PROFILE_INTERVAL),
+                profiling.ENROL_FRACTION,
+            ),
+        ]
+        default_fraction = profiling.ENROL_FRACTION
+        results = {name: 0 for name, _, _ in variants}
+        for _ in range(args.repeat):
+            for name, profiler, fraction in variants:
+                profiling.ENROL_FRACTION = fraction
+                try:
+                    results[name] = max(results[name], await iterations(profiler, args.turns, args.duration))
+                finally:
+                    profiling.ENROL_FRACTION = default_fraction
+
+    print(f"{args.turns} turns of {args.duration:g} s, PROFILE_INTERVAL={config.PROFILE_INTERVAL:g} s")
+    print(f"{'profiler':<28} {'turn wake-ups':>16} {'vs off':>8}")
+    for name, count in results.items():
+        print(f"{name:<28} {count:16d} {count / results['off']:8.0%}")
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    PARSER.add_argument("--turns", type=int, default=200)
+    PARSER.add_argument("--duration", type=float, default=0.4, help="seconds")
+    PARSER.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(PARSER.parse_args()))
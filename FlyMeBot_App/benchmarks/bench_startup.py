@@ -0,0 +1,166 @@
+"""Cold start of the bot, gated against a time budget.
+
+Reports the import time of `app.py` and of each module it imports directly
+(`python -X importtime`), then starts `app.py` in a new process and measures
+the time until its port accepts connections and until its first successful
+`/api/messages` response, with the local connector stand-in receiving the
+replies. Each measure is the median of --runs cold starts. The run fails
+(exit status 1) when the import time or the time to the first response
+exceeds its budget.
+
+    python -m benchmarks.bench_startup --import-budget 0.8 --first-response-budget 1.3
+"""
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import aiohttp
+
+from .fake_connector import FakeConnector
+from .fake_luis import BackgroundServer
+from .load_test import free_port
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# "import time:       self |  cumulative | <indentation>module"
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+# Cold start without LUIS, App Insights nor app credentials
+ENVIRONMENT = {
+    "LUIS_APP_ID": "",
+    "LUIS_API_KEY": "",
+    "LUIS_API_HOST_NAME": "",
+    "MicrosoftAppId": "",
+    "MicrosoftAppPassword": "",
+    "APPINSIGHTS_INSTRUMENTATION_KEY": "",
+    "WORKERS": "1",
+}
+
+
+def import_times() -> dict:
+    """Cumulative import time (seconds) of `app` and of the modules it imports directly."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=APP_DIR,
+        env=dict(os.environ, **ENVIRONMENT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    times = {}
+    # A module is reported once all its imports are, so the direct imports of `app` precede it
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        cumulative, depth, name = int(match[2]) / 1e6, len(match[3]) // 2, match[4]
+        if depth == 1:
+            times[name] = cumulative
+        elif depth == 0:
+            if name == "app":
+                times["app"] = cumulative
+                return times
+            times.clear()
+    raise RuntimeError("app was not imported")
+
+
+def message(connector_url: str) -> dict:
+    return {
+        "type": "message",
+        "id": str(uuid.uuid4()),
+        "channelId": "emulator",
+        "serviceUrl": connector_url,
+        "from": {"id": "user", "name": "user"},
+        "recipient": {"id": "bot", "name": "bot"},
+        "conversation": {"id": str(uuid.uuid4())},
+        "locale": "en-US",
+        "text": "hi",
+    }
+
+
+async def cold_start(connector_url: str, timeout: float = 60.0) -> tuple:
+    """Seconds from the start of `app.py` to its first accepted connection and to its first response."""
+    port = free_port()
+    start = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "app.py"],
+        cwd=APP_DIR,
+        env=dict(os.environ, PORT=str(port), **ENVIRONMENT),
+        stdout=subprocess.DEVNULL,
+        # Run app.py directly to see why it does not answer
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                break
+            except OSError:
+                if time.monotonic() - start > timeout:
+                    raise
+                await asyncio.sleep(0.005)
+        listening = time.monotonic() - start
+
+        async with aiohttp.ClientSession() as session:
+            while time.monotonic() - start < timeout:
+                async with session.post(
+                    f"http://127.0.0.1:{port}/api/messages", json=message(connector_url)
+                ) as response:
+                    await response.read()
+                    if response.status == 200:
+                        return listening, time.monotonic() - start
+                await asyncio.sleep(0.005)
+        raise TimeoutError(f"no successful response from app.py in {timeout} s")
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+async def main(args) -> int:
+    runs = [import_times() for _ in range(args.runs)]
+    total = statistics.median(run["app"] for run in runs)
+    modules = sorted(
+        ((name, statistics.median(run.get(name, 0.0) for run in runs)) for name in runs[0] if name != "app"),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    print(f"{'module':<48} {'import (ms)':>11}")
+    for name, seconds in modules[: args.top]:
+        print(f"{name:<48} {seconds * 1000:11.1f}")
+    print(f"{'app (total)':<48} {total * 1000:11.1f}")
+
+    connector = FakeConnector()
+    with BackgroundServer(connector.app()) as connector_server:
+        starts = [await cold_start(connector_server.url) for _ in range(args.runs)]
+    listening = statistics.median(start[0] for start in starts)
+    first_response = statistics.median(start[1] for start in starts)
+    print(f"\nlistening after        {listening * 1000:8.0f} ms")
+    print(f"first response after   {first_response * 1000:8.0f} ms")
+
+    failed = False
+    if total > args.import_budget:
+        print(f"import time over its budget of {args.import_budget * 1000:.0f} ms")
+        failed = True
+    if first_response > args.first_response_budget:
+        print(f"first response over its budget of {args.first_response_budget * 1000:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    PARSER.add_argument("--runs", type=int, default=3)
+    PARSER.add_argument("--top", type=int, default=15)
+    PARSER.add_argument("--import-budget", type=float, default=0.8, help="seconds")
+    PARSER.add_argument("--first-response-budget", type=float, default=1.3, help="seconds")
+    sys.exit(asyncio.run(main(PARSER.parse_args())))
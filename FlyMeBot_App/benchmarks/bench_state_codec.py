@@ -0,0 +1,100 @@
+"""Stored bytes and encode/decode time of a conversation state.
+
+The states are captured after each turn of a booking conversation run
+through the real dialogs (LUIS disabled, so the booking dialog asks for
+every slot) and encoded with jsonpickle, the format of the SDK's own storages,
+and with `StateCodec` with and without compression.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from copy import copy
+from statistics import mean
+
+os.environ.setdefault(
+    "APPINSIGHTS_INSTRUMENTATION_KEY", "InstrumentationKey=00000000-0000-0000-0000-000000000000"
+)
+
+# pylint: disable=wrong-import-position
+import jsonpickle
+from botbuilder.core import ConversationState, MemoryStorage, TurnContext, UserState
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes
+
+from bots import DialogBot
+from dialogs import BookingDialog, MainDialog
+from storage import StateCodec
+
+UTTERANCES = ["hi", "Paris", "Berlin", "2023-01-05", "2023-01-12"]
+
+
+class LuisDisabled:
+    is_configured = False
+
+
+async def conversation_states() -> list:
+    random.seed(0)
+    storage = MemoryStorage()
+    dialog = MainDialog(LuisDisabled(), BookingDialog())
+    bot = DialogBot(ConversationState(storage), UserState(storage), dialog, None)
+    adapter = TestAdapter(bot.on_turn)
+
+    states = []
+    for text in UTTERANCES:
+        activity = copy(adapter.template)
+        activity.type = ActivityTypes.message
+        activity.text = text
+        await adapter.run_pipeline(TurnContext(adapter, activity), bot.on_turn)
+        states.extend(
+            state for key, state in storage.memory.items() if "/conversations/" in key
+        )
+    return states
+
+
+def measure(encode, decode, states: list, repeat: int):
+    encoded = [encode(state) for state in states]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for state in states:
+            encode(state)
+    encode_time = (time.perf_counter() - start) / (repeat * len(states))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in encoded:
+            decode(data)
+    decode_time = (time.perf_counter() - start) / (repeat * len(states))
+
+    return mean(len(data) for data in encoded), encode_time, decode_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    states = asyncio.run(conversation_states())
+    codec = StateCodec()
+    uncompressed = StateCodec(compress_threshold=None)
+    encodings = [
+        (
+            "jsonpickle",
+            lambda state: jsonpickle.encode(state, keys=True).encode(),
+            lambda data: jsonpickle.decode(data.decode(), keys=True),
+        ),
+        ("msgpack", uncompressed.encode, uncompressed.decode),
+        ("msgpack+zlib", codec.encode, codec.decode),
+    ]
+
+    print(f"{len(states)} conversation states")
+    print(f"{'encoding':>12} {'bytes':>7} {'encode (us)':>12} {'decode (us)':>12}")
+    for name, encode, decode in encodings:
+        size, encode_time, decode_time = measure(encode, decode, states, args.repeat)
+        print(f"{name:>12} {size:7.0f} {encode_time * 1e6:12.1f} {decode_time * 1e6:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Turns per second of the state storages with 1, 4 and 16 worker processes.
+
+A turn reads the conversation and user state, advances the booking dialog
+and writes both back, as `DialogBot.on_message_activity` does. Each worker
+owns its conversations. MemoryStorage is private to each worker and is only
+shown as the upper bound: it cannot be shared between workers.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from botbuilder.core import MemoryStorage
+from botbuilder.dialogs import DialogInstance, DialogState
+
+from booking_details import BookingDetails
+from storage import SqliteStorage
+
+
+def conversation_state() -> dict:
+    booking = DialogInstance()
+    booking.id = "BookingDialog"
+    booking.state = {
+        "dialogs": DialogState([DialogInstance()]),
+        "options": BookingDetails(destination="Berlin", origin="Paris"),
+        "values": {"instanceId": "5f3c", "stepIndex": 0},
+    }
+    return {"DialogState": DialogState([booking])}
+
+
+async def run_worker(storage, worker: int, conversations: int, turns: int):
+    async def conversation(index: int):
+        conversation_key = f"emulator/conversations/{worker}-{index}/"
+        user_key = f"emulator/users/{worker}-{index}/"
+        for step in range(turns):
+            items = await storage.read([conversation_key, user_key])
+            state = items.get(conversation_key) or conversation_state()
+            user = items.get(user_key) or {}
+            state["DialogState"].dialog_stack[0].state["values"]["stepIndex"] = step
+            await storage.write({conversation_key: state, user_key: user})
+
+    await asyncio.gather(*(conversation(index) for index in range(conversations)))
+
+
+def worker_main(kind, path, worker, conversations, turns, barrier, results):
+    storage = SqliteStorage(path) if kind == "sqlite" else MemoryStorage()
+    barrier.wait()
+    start = time.perf_counter()
+    asyncio.run(run_worker(storage, worker, conversations, turns))
+    results.put(time.perf_counter() - start)
+    if kind == "sqlite":
+        storage.close()
+
+
+def measure(kind: str, workers: int, conversations: int, turns: int) -> float:
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.sqlite3")
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=worker_main,
+                args=(kind, path, worker, conversations, turns, barrier, results),
+            )
+            for worker in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        elapsed = max(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+    return workers * conversations * turns / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'memory (turns/s)':>17} {'sqlite (turns/s)':>17}")
+    for workers in (1, 4, 16):
+        memory = measure("memory", workers, args.conversations, args.turns)
+        sqlite = measure("sqlite", workers, args.conversations, args.turns)
+        print(f"{workers:7d} {memory:17.0f} {sqlite:17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare the memoized timex service with the former repeated parsing.
+
+Each booking checks its start and end dates in the booking dialog, again in
+the date prompt validator, and compares them in the budget step.
+"""
+import random
+import timeit
+from datetime import date, datetime, timedelta
+
+from datatypes_date_time.timex import Timex
+
+from helpers.timex_service import TimexService
+
+
+def bookings(count: int, seed: int = 0) -> list:
+    """(start, end) timex pairs over a year of departures."""
+    generator = random.Random(seed)
+    first = date(2023, 1, 1)
+    pairs = []
+    for _ in range(count):
+        start = first + timedelta(days=generator.randrange(365))
+        end = start + timedelta(days=generator.randrange(-2, 21))
+        pairs.append((start.isoformat(), end.isoformat()))
+    return pairs
+
+
+def legacy_booking(start: str, end: str) -> bool:
+    """Former checks: a `Timex` per check and `strptime` for the comparison."""
+    for timex in (start, end):
+        assert "definite" in Timex(timex).types
+        assert "definite" in Timex(timex.split("T")[0]).types
+    return datetime.strptime(end, "%Y-%m-%d") < datetime.strptime(start, "%Y-%m-%d")
+
+
+def service_booking(service: TimexService, start: str, end: str) -> bool:
+    for timex in (start, end):
+        assert service.is_definite(timex)
+        assert service.is_definite(timex.split("T")[0])
+    return service.is_before(end, start)
+
+
+def main(count: int = 2000):
+    pairs = bookings(count)
+    service = TimexService()
+    assert [legacy_booking(*pair) for pair in pairs] == [service_booking(service, *pair) for pair in pairs]
+
+    legacy = min(timeit.repeat(lambda: [legacy_booking(*pair) for pair in pairs], number=1, repeat=5))
+    memoized = min(
+        timeit.repeat(
+            lambda: [service_booking(service, *pair) for pair in pairs], number=1, repeat=5
+        )
+    )
+    print(f"legacy   : {count / legacy:12.0f} bookings/s")
+    print(f"memoized : {count / memoized:12.0f} bookings/s ({service.stats['size']} cached values)")
+    print(f"speedup  : {legacy / memoized:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
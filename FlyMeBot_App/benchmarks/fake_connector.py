@@ -0,0 +1,60 @@
+"""Local stand-in for the Bot Framework connector service.
+
+The bot posts its replies to the `serviceUrl` of the incoming activity; this
+application records them by conversation. Requests that do not carry the
+expected authorization are refused, like the real connector does. The
+connections the bot opened are counted by client address.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from aiohttp import web
+from botbuilder.schema import Activity
+
+
+class FakeConnector:
+    """aiohttp application answering the `/v3/conversations` activity routes.
+
+    With a `token`, replies must be sent with `Authorization: Bearer <token>`;
+    with `tokens`, with any of them. Without either, the bot runs without app
+    credentials (as with the emulator) and must not send an Authorization
+    header.
+    """
+
+    def __init__(self, token: str = None, tokens: Iterable[str] = None):
+        self.tokens: Set[str] = set(tokens or ())
+        if token is not None:
+            self.tokens.add(token)
+        self.replies: Dict[str, List[Activity]] = defaultdict(list)
+        self.calls = 0
+        self.unauthorized = 0
+        # (host, port) of each client connection
+        self.connections: Set[tuple] = set()
+
+    def _authorized(self, request: web.Request) -> bool:
+        authorization = request.headers.get("Authorization")
+        if not self.tokens:
+            return authorization is None
+        return authorization is not None and authorization[len("Bearer "):] in self.tokens
+
+    async def send_to_conversation(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        if not self._authorized(request):
+            self.unauthorized += 1
+            return web.Response(status=401)
+
+        activity = Activity().deserialize(await request.json())
+        self.replies[request.match_info["conversation_id"]].append(activity)
+        return web.json_response({"id": f"reply-{self.calls}"})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(
+            "/v3/conversations/{conversation_id}/activities", self.send_to_conversation
+        )
+        app.router.add_post(
+            "/v3/conversations/{conversation_id}/activities/{activity_id}",
+            self.send_to_conversation,
+        )
+        return app
@@ -0,0 +1,76 @@
+"""Local stand-in for the Bot Framework OpenID metadata endpoint.
+
+It serves a metadata document and the JWK set of its RSA signing keys, and
+issues bearer tokens shaped like the ones the channels send to the bot.
+Removing a key from the set revokes the tokens it signed.
+"""
+import json
+import time
+import uuid
+from typing import Dict, Tuple
+
+import jwt
+from aiohttp import web
+from botframework.connector.auth import AuthenticationConstants
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+METADATA_PATH = "/v1/.well-known/openidconfiguration"
+KEYS_PATH = "/v1/.well-known/keys"
+
+ENDORSEMENTS = ("msteams", "webchat", "directline", "emulator")
+
+
+class FakeOpenId:
+    """aiohttp application answering the metadata and key set routes."""
+
+    def __init__(self, issuer: str = AuthenticationConstants.TO_BOT_FROM_CHANNEL_TOKEN_ISSUER):
+        self.issuer = issuer
+        # kid -> (private key, endorsements)
+        self.keys: Dict[str, Tuple[object, tuple]] = {}
+        self.metadata_calls = 0
+        self.keys_calls = 0
+
+    def add_key(self, endorsements: tuple = ENDORSEMENTS) -> str:
+        key_id = uuid.uuid4().hex
+        private_key = rsa.generate_private_key(65537, 2048, default_backend())
+        self.keys[key_id] = (private_key, tuple(endorsements))
+        return key_id
+
+    def revoke(self, key_id: str):
+        del self.keys[key_id]
+
+    def token(self, key_id: str, audience: str, service_url: str, lifetime: float = 3600, **claims) -> str:
+        """Token of a channel calling the bot `audience`, signed with `key_id`."""
+        now = int(time.time())
+        payload = {
+            "iss": self.issuer,
+            "aud": audience,
+            "serviceurl": service_url,
+            "nbf": now - 5,
+            "exp": now + int(lifetime),
+            **claims,
+        }
+        private_key = self.keys[key_id][0]
+        return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": key_id}).decode()
+
+    async def metadata(self, request: web.Request) -> web.Response:
+        self.metadata_calls += 1
+        base = f"{request.scheme}://{request.host}"
+        return web.json_response({"issuer": self.issuer, "jwks_uri": base + KEYS_PATH})
+
+    async def key_set(self, request: web.Request) -> web.Response:
+        self.keys_calls += 1
+        keys = []
+        for key_id, (private_key, endorsements) in self.keys.items():
+            key = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+            key.update(kid=key_id, use="sig", endorsements=list(endorsements))
+            keys.append(key)
+        return web.json_response({"keys": keys})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get(METADATA_PATH, self.metadata)
+        app.router.add_get(KEYS_PATH, self.key_set)
+        return app
@@ -0,0 +1,263 @@
+"""Offline end-to-end load test of the bot.
+
+The aiohttp application of `app.py` (`init_func`) is served from a child
+process, with LUIS and the Bot Framework connector replaced by local
+stand-ins (`fake_luis.py`, `fake_connector.py`). Simulated users replay
+multi-turn booking conversations on /api/messages. A turn lasts from the
+POST of the user's message until the bot answered it, replies included, or
+until its first reply when the bot sent it later (see `scheduled_delivery.py`).
+
+Each level of concurrent users runs for --duration seconds. The report gives
+the turn latency percentiles, turns per second and error rate of each level,
+and the level past which adding users no longer adds throughput. The exit
+status is 1 when a level exceeds --max-error-rate.
+
+Run it from the FlyMeBot_App folder before each deploy:
+
+    python -m benchmarks.load_test
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import time
+import uuid
+from statistics import quantiles
+
+import aiohttp
+
+from .fake_connector import FakeConnector
+from .fake_luis import APP_ID, ENDPOINT_KEY, BackgroundServer, FakeLuis
+
+BOOKING = "book a flight from paris to berlin on 2023-01-05 until 2023-01-12 with a budget of 500 euros"
+
+# Conversations replayed by the users, the first message starts the main dialog
+SCRIPTS = [
+    ["hi", BOOKING, "Yep"],
+    ["hi", "I want to book a flight", "Paris", "Berlin", "2023-01-05", "2023-01-12", "500 euros", "Yep"],
+    ["hi", "what is the weather like", "I want to book a flight", "cancel"],
+]
+
+ERROR_REPLY = "The bot encountered an error or bug."
+# Seconds a user waits for the first reply to a message
+REPLY_TIMEOUT = 30
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port: int, seed: int):
+    """Child process: run the bot the way `app.py` does."""
+    # pylint: disable=import-outside-toplevel
+    from aiohttp import web
+
+    random.seed(seed)
+    # The dialogs print every booking: keep the report readable.
+    sys.stdout = open(os.devnull, "w")
+
+    import app
+
+    async def start():
+        runner = web.AppRunner(app.init_func(None))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    # Served until the parent terminates the process
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start())
+    loop.run_forever()
+
+
+async def wait_for_port(port: int, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+class Level:
+    """Results of one level of concurrent users."""
+
+    def __init__(self, users: int):
+        self.users = users
+        self.latencies = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    @property
+    def turns(self) -> int:
+        return len(self.latencies) + self.errors
+
+    @property
+    def turns_per_second(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.turns if self.turns else 0.0
+
+    def percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else float("nan")
+        return quantiles(self.latencies, n=100)[percent - 1]
+
+
+class LoadGenerator:
+    def __init__(self, bot_url: str, connector: FakeConnector, connector_url: str):
+        self.bot_url = bot_url
+        self.connector = connector
+        self.connector_url = connector_url
+
+    def activity(self, conversation_id: str, user_id: str, text: str) -> dict:
+        return {
+            "type": "message",
+            "id": str(uuid.uuid4()),
+            "channelId": "emulator",
+            "serviceUrl": self.connector_url,
+            "from": {"id": user_id, "name": user_id},
+            "recipient": {"id": "bot", "name": "bot"},
+            "conversation": {"id": conversation_id},
+            "locale": "en-US",
+            "text": text,
+        }
+
+    async def turn(
+        self,
+        session: aiohttp.ClientSession,
+        conversation_id: str,
+        user_id: str,
+        text: str,
+        level: Level,
+    ):
+        replies = self.connector.replies[conversation_id]
+        replied = len(replies)
+        start = time.perf_counter()
+        try:
+            async with session.post(
+                self.bot_url, json=self.activity(conversation_id, user_id, text)
+            ) as response:
+                await response.read()
+                ok = response.status < 300
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            ok = False
+        # Replies queued behind delayed messages arrive after the turn
+        deadline = start + REPLY_TIMEOUT
+        while ok and len(replies) == replied and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        latency = time.perf_counter() - start
+
+        new_replies = replies[replied:]
+        if ok and new_replies and not any((reply.text or "").startswith(ERROR_REPLY) for reply in new_replies):
+            level.latencies.append(latency)
+        else:
+            level.errors += 1
+
+    async def user(self, session: aiohttp.ClientSession, index: int, deadline: float, level: Level):
+        user_id = f"user-{level.users}-{index}"
+        conversation = 0
+        while time.monotonic() < deadline:
+            script = SCRIPTS[(index + conversation) % len(SCRIPTS)]
+            conversation_id = f"{user_id}-{conversation}"
+            conversation += 1
+            for text in script:
+                if time.monotonic() >= deadline:
+                    break
+                await self.turn(session, conversation_id, user_id, text, level)
+
+    async def run(self, users: int, duration: float) -> Level:
+        level = Level(users)
+        timeout = aiohttp.ClientTimeout(total=30)
+        connector = aiohttp.TCPConnector(limit=users)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            start = time.monotonic()
+            await asyncio.gather(
+                *(self.user(session, index, start + duration, level) for index in range(users))
+            )
+            level.elapsed = time.monotonic() - start
+        return level
+
+
+def saturation(levels: list) -> Level:
+    """Last level before throughput grows by less than 5% or errors appear."""
+    for level, following in zip(levels, levels[1:]):
+        if following.error_rate > 0.01 or following.turns_per_second < level.turns_per_second * 1.05:
+            return level
+    return None
+
+
+async def main(args) -> int:
+    luis = FakeLuis(latency=args.luis_latency)
+    connector = FakeConnector()
+    with BackgroundServer(luis.app()) as luis_server, BackgroundServer(connector.app()) as connector_server:
+        os.environ.update(
+            {
+                "LUIS_APP_ID": APP_ID,
+                "LUIS_API_KEY": ENDPOINT_KEY,
+                "LUIS_API_HOST_NAME": luis_server.url,
+                "MicrosoftAppId": "",
+                "MicrosoftAppPassword": "",
+                "APPINSIGHTS_INSTRUMENTATION_KEY": "",
+            }
+        )
+        port = args.port or free_port()
+        server = multiprocessing.get_context("spawn").Process(
+            target=serve, args=(port, args.seed), daemon=True
+        )
+        server.start()
+        try:
+            await wait_for_port(port)
+            generator = LoadGenerator(
+                f"http://127.0.0.1:{port}/api/messages", connector, connector_server.url
+            )
+
+            print(f"LUIS latency {args.luis_latency * 1000:.0f} ms, {args.duration:.0f} s per level")
+            print(
+                f"{'users':>5} {'turns':>7} {'turns/s':>8} {'p50 (ms)':>9} "
+                f"{'p95 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}"
+            )
+            levels = []
+            for users in args.users:
+                level = await generator.run(users, args.duration)
+                levels.append(level)
+                print(
+                    f"{users:5d} {level.turns:7d} {level.turns_per_second:8.1f} "
+                    f"{level.percentile(50) * 1000:9.1f} {level.percentile(95) * 1000:9.1f} "
+                    f"{level.percentile(99) * 1000:9.1f} {level.error_rate:7.1%}"
+                )
+        finally:
+            server.terminate()
+            server.join()
+
+    saturated = saturation(levels)
+    if saturated is None:
+        print("throughput still growing at the last level")
+    else:
+        print(f"saturation: {saturated.users} users, {saturated.turns_per_second:.1f} turns/s")
+    print(f"LUIS calls: {luis.calls}, connector calls: {connector.calls} ({connector.unauthorized} unauthorized)")
+
+    return 1 if any(level.error_rate > args.max_error_rate for level in levels) else 0
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    PARSER.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    PARSER.add_argument("--duration", type=float, default=10.0)
+    PARSER.add_argument("--luis-latency", type=float, default=0.1)
+    PARSER.add_argument("--max-error-rate", type=float, default=0.01)
+    PARSER.add_argument("--seed", type=int, default=0)
+    PARSER.add_argument("--port", type=int, default=0)
+    sys.exit(asyncio.run(main(PARSER.parse_args())))
@@ -0,0 +1,289 @@
+"""Microbenchmarks of the code each turn runs, gated against a JSON baseline.
+
+Each component is timed in isolation on a typical input and compared with
+the time recorded in the baseline. The run fails (exit status 1) when a
+component got slower than the baseline by more than --threshold percent.
+
+    python -m benchmarks.microbench             # compare with the baseline
+    python -m benchmarks.microbench --save      # record the baseline
+
+Timings depend on the machine: record the baseline on the machine that runs
+the gate.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from copy import copy
+from typing import Callable, Dict
+
+from botbuilder.ai.luis.luis_util import LuisUtil
+from botbuilder.core import (
+    ConversationState,
+    MemoryStorage,
+    Recognizer,
+    RecognizerResult,
+    TurnContext,
+)
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import DialogContext, DialogSet, DialogState
+from botbuilder.dialogs.prompts import (
+    DateTimeResolution,
+    PromptRecognizerResult,
+    PromptValidatorContext,
+)
+from botbuilder.schema import Activity, ActivityTypes
+from azure.cognitiveservices.language.luis.runtime.models import LuisResult
+
+from booking_details import BookingDetails
+from dialogs import BookingDialog, MainDialog
+from dialogs.cancel_and_help_dialog import CancelAndHelpDialog
+from dialogs.date_resolver_dialog import DateResolverDialog
+from helpers.activity_helper import create_activity_reply
+from helpers.card_template import RESOURCES_DIR
+from helpers.luis_helper import LuisHelper
+from .fake_luis import load_recordings
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "microbench.json")
+
+BOOKING = BookingDetails(
+    destination="Berlin",
+    origin="Paris",
+    start_date="2023-01-05",
+    end_date="2023-01-12",
+    budget=500,
+)
+
+MESSAGE_BODY = {
+    "type": "message",
+    "id": "4f6b2c1e-0a51-4d2e-9d0b-6d2f7c2a1b3e",
+    "timestamp": "2023-01-04T09:12:45.123Z",
+    "localTimestamp": "2023-01-04T10:12:45.123+01:00",
+    "serviceUrl": "https://webchat.botframework.com/",
+    "channelId": "webchat",
+    "from": {"id": "dl_2b6c7b0e", "name": "You"},
+    "conversation": {"id": "9KZ3pC0uQ1kJ7g-eu|0000001"},
+    "recipient": {"id": "flymebot@Q1w2E3r4", "name": "FlyMeBot"},
+    "textFormat": "plain",
+    "locale": "en-US",
+    "text": "book a flight from paris to berlin on 2023-01-05 until 2023-01-12 with a budget of 500 euros",
+    "channelData": {"clientActivityID": "1672823565123abcdef"},
+}
+
+CONVERSATION_UPDATE_BODY = {
+    "type": "conversationUpdate",
+    "id": "6c1f5a2e-7b3d-4e9f-8a0c-2d4b6e8f0a1c",
+    "timestamp": "2023-01-04T09:12:40.001Z",
+    "serviceUrl": "https://webchat.botframework.com/",
+    "channelId": "webchat",
+    "from": {"id": "dl_2b6c7b0e"},
+    "conversation": {"id": "9KZ3pC0uQ1kJ7g-eu|0000001"},
+    "recipient": {"id": "flymebot@Q1w2E3r4", "name": "FlyMeBot"},
+    "membersAdded": [{"id": "flymebot@Q1w2E3r4", "name": "FlyMeBot"}, {"id": "dl_2b6c7b0e"}],
+}
+
+
+class LuisDisabled:
+    is_configured = False
+
+
+class RecordedRecognizer(Recognizer):
+    """Answer with the recognizer result of a recorded LUIS response."""
+
+    def __init__(self, payload: dict):
+        luis_result = LuisResult.deserialize(payload)
+        self.recognizer_result = RecognizerResult(
+            text=payload["query"],
+            intents=LuisUtil.get_intents(luis_result),
+            entities=LuisUtil.extract_entities_and_metadata(
+                luis_result.entities, luis_result.composite_entities, True
+            ),
+        )
+        LuisUtil.add_properties(luis_result, self.recognizer_result)
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        return self.recognizer_result
+
+
+def turn_context(adapter: TestAdapter, text: str) -> TurnContext:
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = text
+    return TurnContext(adapter, activity)
+
+
+def cases() -> Dict[str, Callable]:
+    """Benchmarked callables by name; the coroutines they return are awaited."""
+    adapter = TestAdapter()
+    main_dialog = MainDialog(LuisDisabled(), BookingDialog())
+    booking_dialog = BookingDialog()
+    with open(os.path.join(RESOURCES_DIR, "bookedFlightCard.json"), encoding="utf-8") as card:
+        card_template = json.load(card)
+
+    benchmarks = {}
+
+    for query, payload in load_recordings().items():
+        recognizer = RecordedRecognizer(payload)
+        context = turn_context(adapter, query)
+        name = "luis_helper.execute_luis_query[%d entities]" % len(payload["entities"])
+        benchmarks[name] = lambda recognizer=recognizer, context=context: LuisHelper.execute_luis_query(
+            recognizer, context
+        )
+
+    benchmarks["main_dialog.create_adaptive_card_attachment"] = lambda: (
+        main_dialog.create_adaptive_card_attachment(BOOKING)
+    )
+    benchmarks["main_dialog.replace"] = lambda: main_dialog.replace(card_template, BOOKING.to_dict())
+
+    benchmarks["booking_dialog.is_ambiguous[definite]"] = lambda: booking_dialog.is_ambiguous("2023-01-05")
+    benchmarks["booking_dialog.is_ambiguous[XXXX]"] = lambda: booking_dialog.is_ambiguous("XXXX-01-05")
+
+    validator_context = PromptValidatorContext(
+        turn_context(adapter, "2023-01-05"),
+        PromptRecognizerResult(
+            True, [DateTimeResolution(value="2023-01-05", timex="2023-01-05")]
+        ),
+        {},
+        None,
+    )
+    benchmarks["date_resolver.datetime_prompt_validator"] = lambda: (
+        DateResolverDialog.datetime_prompt_validator(validator_context)
+    )
+
+    cancel_and_help = CancelAndHelpDialog("CancelAndHelpDialog")
+    dialog_set = DialogSet(ConversationState(MemoryStorage()).create_property("DialogState"))
+    for text in ("Paris", "help"):
+        dialog_context = DialogContext(dialog_set, turn_context(adapter, text), DialogState())
+
+        async def interrupt(dialog_context=dialog_context):
+            await cancel_and_help.interrupt(dialog_context)
+            adapter.activity_buffer.clear()
+
+        benchmarks["cancel_and_help.interrupt[%s]" % text] = interrupt
+
+    inbound = Activity().deserialize(MESSAGE_BODY)
+    benchmarks["activity_helper.create_activity_reply"] = lambda: create_activity_reply(inbound)
+
+    benchmarks["activity.deserialize[message]"] = lambda: Activity().deserialize(MESSAGE_BODY)
+    benchmarks["activity.deserialize[conversationUpdate]"] = lambda: (
+        Activity().deserialize(CONVERSATION_UPDATE_BODY)
+    )
+    return benchmarks
+
+
+def _calls(function: Callable, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    return time.perf_counter() - start
+
+
+async def _async_calls(function: Callable, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        await function()
+    return time.perf_counter() - start
+
+
+def measure(function: Callable, loop: asyncio.AbstractEventLoop, min_time: float, repeat: int) -> float:
+    """Best time per call over `repeat` runs of at least `min_time` seconds."""
+    # The warm-up call tells whether the calls must be awaited
+    warm_up = function()
+    if asyncio.iscoroutine(warm_up):
+        loop.run_until_complete(warm_up)
+
+        def run(number: int) -> float:
+            return loop.run_until_complete(_async_calls(function, number))
+
+    else:
+
+        def run(number: int) -> float:
+            return _calls(function, number)
+
+    # Like timeit, keep the garbage collector out of the timings
+    gc.collect()
+    gc.disable()
+    try:
+        number = 1
+        while run(number) < min_time / 10:
+            number *= 10
+        number = max(1, int(number * min_time / max(run(number), 1e-9)))
+        return min(run(number) for _ in range(repeat)) / number
+    finally:
+        gc.enable()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="record the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=25.0, help="allowed slowdown (percent)")
+    parser.add_argument("--filter", default="", help="only run the benchmarks whose name contains it")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--retries", type=int, default=2, help="measurements of a suspected regression")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    loop = asyncio.new_event_loop()
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<48} {'baseline (us)':>13} {'current (us)':>12} {'change':>8}")
+    for name, function in cases().items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(function, loop, args.min_time, args.repeat)
+
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<48} {'-':>13} {results[name] * 1e6:12.2f} {'new':>8}")
+            continue
+        # A noisy neighbour can slow a whole measurement down: confirm a
+        # regression before reporting it.
+        for _ in range(args.retries):
+            if results[name] <= reference * (1 + args.threshold / 100):
+                break
+            results[name] = min(results[name], measure(function, loop, args.min_time, args.repeat))
+        change = (results[name] - reference) / reference * 100
+        status = ""
+        if change > args.threshold:
+            regressions.append(name)
+            status = "  REGRESSION"
+        print(f"{name:<48} {reference * 1e6:13.2f} {results[name] * 1e6:12.2f} {change:+7.1f}%{status}")
+    loop.close()
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": dict(baseline, **results),
+                },
+                baseline_file,
+                indent=2,
+                sort_keys=True,
+            )
+            baseline_file.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:g}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
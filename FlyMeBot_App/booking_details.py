@@ -1,4 +1,6 @@
 class BookingDetails:
+    __slots__ = ("destination", "origin", "start_date", "end_date", "budget")
+
     def __init__(
         self,
         destination: str = None,
@@ -13,3 +15,6 @@ class BookingDetails:
         self.start_date = start_date
         self.end_date = end_date
         self.budget = budget
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -1,7 +1,4 @@
 """Main dialog to welcome users."""
-import json
-import os.path
-
 from typing import List
 from botbuilder.dialogs import Dialog
 from botbuilder.core import (
@@ -12,6 +9,7 @@ from botbuilder.core import (
 )
 from botbuilder.schema import Activity, Attachment, ChannelAccount
 from helpers.activity_helper import create_activity_reply
+from helpers.card_template import CardTemplate
 from .dialog_bot import DialogBot
 
 
@@ -29,6 +27,7 @@ class DialogAndWelcomeBot(DialogBot):
             conversation_state, user_state, dialog, telemetry_client
         )
         self.telemetry_client = telemetry_client
+        self._welcome_card = CardTemplate.from_resource("welcomeCard.json")
 
     async def on_members_added_activity(
         self, members_added: List[ChannelAccount], turn_context: TurnContext
@@ -48,14 +47,9 @@ class DialogAndWelcomeBot(DialogBot):
         response.attachments = [attachment]
         return response
 
-    # Load attachment from file.
     def create_adaptive_card_attachment(self):
         """Create an adaptive card."""
-        relative_path = os.path.abspath(os.path.dirname(__file__))
-        path = os.path.join(relative_path, "resources/welcomeCard.json")
-        with open(path) as card_file:
-            card = json.load(card_file)
-
         return Attachment(
-            content_type="application/vnd.microsoft.card.adaptive", content=card
+            content_type="application/vnd.microsoft.card.adaptive",
+            content=self._welcome_card.render(),
         )
@@ -10,6 +10,8 @@ from botbuilder.core import (
 )
 from botbuilder.dialogs import Dialog, DialogExtensions
 from helpers.dialog_helper import DialogHelper
+from storage import StateTracker
+from telemetry import NOOP_PROFILE, PROFILER, TRACER, traced
 
 
 class DialogBot(ActivityHandler):
@@ -35,17 +37,23 @@ class DialogBot(ActivityHandler):
         self.user_state = user_state
         self.dialog = dialog
         self.telemetry_client = telemetry_client
+        self.state_tracker = StateTracker(conversation_state, user_state)
 
+    @traced()
     async def on_message_activity(self, turn_context: TurnContext):
-        await DialogExtensions.run_dialog(
-            self.dialog,
-            turn_context,
-            self.conversation_state.create_property("DialogState"),
-        )
+        dialog_state = self.conversation_state.create_property("DialogState")
+        activity = turn_context.activity
+        async with PROFILER.profile_turn(activity.conversation.id, activity.id) as profile:
+            if profile is not NOOP_PROFILE:
+                # The step receiving the message
+                step = await DialogHelper.active_step(self.dialog, await dialog_state.get(turn_context))
+                profile.set_attribute("dialog_step", step)
 
-        # Save any state changes that might have occured during the turn.
-        await self.conversation_state.save_changes(turn_context, False)
-        await self.user_state.save_changes(turn_context, False)
+            with TRACER.span("DialogExtensions.run_dialog"):
+                await DialogExtensions.run_dialog(self.dialog, turn_context, dialog_state)
+
+            # Save any state changes that might have occured during the turn.
+            await self.state_tracker.save_changes(turn_context)
 
     @property
     def telemetry_client(self) -> BotTelemetryClient:
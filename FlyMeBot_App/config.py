@@ -6,7 +6,7 @@ import os
 class DefaultConfig:
     """ Bot Configuration """
 
-    PORT = 8000
+    PORT = int(os.environ.get("PORT", 8000))
     APP_ID = os.environ.get("MicrosoftAppId", "")
     APP_PASSWORD = os.environ.get("MicrosoftAppPassword", "")
     LUIS_APP_ID = os.environ.get("LUIS_APP_ID", "")
@@ -14,5 +14,67 @@ class DefaultConfig:
     # LUIS endpoint host name, ie "westus.api.cognitive.microsoft.com"
     LUIS_API_HOST_NAME = os.environ.get("LUIS_API_HOST_NAME", "")
     APPINSIGHTS_INSTRUMENTATION_KEY = os.environ.get("APPINSIGHTS_INSTRUMENTATION_KEY", "")
+    # Telemetry is also written to this JSONL file when set, rotated past TELEMETRY_MAX_BYTES bytes
+    TELEMETRY_PATH = os.environ.get("TELEMETRY_PATH", "")
+    TELEMETRY_MAX_BYTES = int(os.environ.get("TELEMETRY_MAX_BYTES", 10 * 1024 * 1024))
+    TELEMETRY_BACKUPS = int(os.environ.get("TELEMETRY_BACKUPS", 5))
+    # Events waiting to be written (the next ones are dropped), written by batches of TELEMETRY_BATCH_SIZE
+    # at least every TELEMETRY_FLUSH_INTERVAL seconds
+    TELEMETRY_QUEUE_SIZE = int(os.environ.get("TELEMETRY_QUEUE_SIZE", 10000))
+    TELEMETRY_BATCH_SIZE = int(os.environ.get("TELEMETRY_BATCH_SIZE", 100))
+    TELEMETRY_FLUSH_INTERVAL = float(os.environ.get("TELEMETRY_FLUSH_INTERVAL", 1.0))
+    # Period (seconds) of the event loop lag probe reported on /metrics
+    LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", 0.5))
+    # Turns of DialogBot lasting more than SLOW_TURN_THRESHOLD seconds (0 disables it) are profiled, sampling
+    # their stacks every PROFILE_INTERVAL seconds once they reach half of it; the last SLOW_TURN_MAX_PROFILES
+    # are kept in SLOW_TURN_PATH
+    SLOW_TURN_THRESHOLD = float(os.environ.get("SLOW_TURN_THRESHOLD", 2.0))
+    SLOW_TURN_PATH = os.environ.get("SLOW_TURN_PATH", "slow_turns")
+    SLOW_TURN_MAX_PROFILES = int(os.environ.get("SLOW_TURN_MAX_PROFILES", 50))
+    PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.05))
+    # Bearer token of the /admin endpoints (unset: they are not served); longest on-demand profile (seconds)
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+    ADMIN_PROFILE_MAX_SECONDS = float(os.environ.get("ADMIN_PROFILE_MAX_SECONDS", 60))
+    # Tracing of a TRACE_SAMPLE_RATE fraction of the turns, printed ("console") or written to TRACE_PATH ("file")
+    TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "")
+    TRACE_PATH = os.environ.get("TRACE_PATH", "traces.jsonl")
+    TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0.01))
     LUIS_API_ENDPOINT = os.environ.get("LUIS_API_ENDPOINT", "")
+    # Per-call LUIS timeout (milliseconds) and size of the keep-alive connection pool
+    LUIS_TIMEOUT = int(os.environ.get("LUIS_TIMEOUT", 5000))
+    LUIS_POOL_SIZE = int(os.environ.get("LUIS_POOL_SIZE", 100))
+    # Recognition cache: number of utterances kept (0 disables it) and their lifetime (seconds)
+    RECOGNIZER_CACHE_SIZE = int(os.environ.get("RECOGNIZER_CACHE_SIZE", 1024))
+    RECOGNIZER_CACHE_TTL = float(os.environ.get("RECOGNIZER_CACHE_TTL", 3600))
+    # Minimum confidence of the in-process recognizer before LUIS is skipped (above 1 disables it)
+    LOCAL_RECOGNIZER_THRESHOLD = float(os.environ.get("LOCAL_RECOGNIZER_THRESHOLD", 0.6))
+    # Conversation and user state storage: "memory" (single worker) or "sqlite"
+    STORAGE = os.environ.get("STORAGE", "memory")
+    STORAGE_PATH = os.environ.get("STORAGE_PATH", "bot_state.sqlite3")
+    # Stored states larger than this many bytes are compressed
+    STATE_COMPRESS_THRESHOLD = int(os.environ.get("STATE_COMPRESS_THRESHOLD", 512))
+    # In-memory state: idle conversations are forgotten after STATE_IDLE_TTL seconds, and the least
+    # recently used ones above STATE_MAX_ENTRIES keys or STATE_MAX_BYTES encoded bytes (0: no limit).
+    # A byte budget encodes every state written to measure it
+    STATE_IDLE_TTL = float(os.environ.get("STATE_IDLE_TTL", 24 * 3600))
+    STATE_MAX_ENTRIES = int(os.environ.get("STATE_MAX_ENTRIES", 100000))
+    STATE_MAX_BYTES = int(os.environ.get("STATE_MAX_BYTES", 0))
+    # Consecutive text messages of a turn are merged into one message (one paragraph each)
+    OUTBOUND_MERGE_TEXT = os.environ.get("OUTBOUND_MERGE_TEXT", "false").lower() == "true"
+    # Conversations that can wait for activities sent after a "delay" (above it, delays are dropped)
+    DELIVERY_MAX_CONVERSATIONS = int(os.environ.get("DELIVERY_MAX_CONVERSATIONS", 1000))
+    # Inbound authentication: validated bearer tokens kept (0 disables the cache) and their longest
+    # lifetime in seconds (a token is never kept past its expiry)
+    AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 1024))
+    AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", 3600))
+    # Seconds between two background refreshes of the channels' signing keys
+    AUTH_KEYS_REFRESH_INTERVAL = float(os.environ.get("AUTH_KEYS_REFRESH_INTERVAL", 3600))
+    # OpenID metadata of the channel tokens (empty: the Bot Framework's)
+    OPENID_METADATA_URL = os.environ.get("OPENID_METADATA_URL", "")
+    # Outbound connector calls: keep-alive connections shared by the service URLs (0: the adapter's own
+    # connector clients) and the timeout of a call, in seconds
+    CONNECTOR_POOL_SIZE = int(os.environ.get("CONNECTOR_POOL_SIZE", 100))
+    CONNECTOR_TIMEOUT = float(os.environ.get("CONNECTOR_TIMEOUT", 30))
+    # Number of worker processes (more than 1 needs STORAGE=sqlite, shared between workers: app.py refuses to start)
+    WORKERS = int(os.environ.get("WORKERS", 1))
     
\ No newline at end of file
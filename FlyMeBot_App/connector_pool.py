@@ -0,0 +1,251 @@
+"""Outbound connector calls over one keep-alive session, with cached service tokens.
+
+`BotFrameworkAdapter` keeps a `ConnectorClient` per service URL and
+credentials, but each client sends through its own `requests` session in
+the default thread pool, and signs every request with
+`AppCredentials.signed_session`: MSAL is asked for a token on the event
+loop, and fetches a new one from AAD, blocking the loop, whenever its cached
+token is about to expire.
+
+`ConnectorPool` builds the clients of the adapter with a pipeline of its
+own: requests go through one aiohttp session whose keep-alive connections
+are shared by every service URL, and the Authorization header comes from
+`ServiceTokenCache`, which fetches the tokens in the thread pool and
+refreshes them in the background before they expire.
+"""
+import asyncio
+import time
+from typing import Dict, Tuple
+
+import aiohttp
+import jwt
+from botbuilder.core import BotFrameworkAdapter
+from botbuilder.core.bot_framework_adapter import USER_AGENT
+from botframework.connector.aio import ConnectorClient
+from botframework.connector.auth import AppCredentials
+from msrest.pipeline import AsyncPipeline
+from msrest.pipeline.aiohttp import AioHTTPSender
+from msrest.pipeline.async_abc import AsyncHTTPPolicy
+from msrest.pipeline.universal import RawDeserializer
+from msrest.universal_http import ClientRequest
+from msrest.universal_http.aiohttp import AioHttpClientResponse
+from msrest.universal_http.async_abc import AsyncHTTPSender
+
+# Assumed lifetime (seconds) of a token that is not a JWT
+DEFAULT_TOKEN_LIFETIME = 3600
+
+
+def _expiry(token: str, now: float) -> float:
+    try:
+        return float(jwt.decode(token, verify=False)["exp"])
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        return now + DEFAULT_TOKEN_LIFETIME
+
+
+class ServiceTokenCache:
+    """Access tokens of the app credentials, by app id and OAuth scope.
+
+    A token is fetched once, off the event loop, and fetched again in the
+    background `refresh_margin` seconds before it expires (4 minutes by
+    default: inside MSAL's own 5 minute margin, so MSAL gets a new token).
+    A send only waits for a token when none is valid, on the first send of
+    the process or after failed refreshes.
+    """
+
+    def __init__(self, refresh_margin: float = 240, retry_interval: float = 30, clock=time.time):
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._clock = clock
+        # key -> (token, expiry timestamp)
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+        self.hits = 0
+        self.waits = 0
+        self.fetches = 0
+        self.failures = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "waits": self.waits,
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "tokens": len(self._tokens),
+        }
+
+    @staticmethod
+    def _key(credentials: AppCredentials) -> str:
+        return f"{credentials.microsoft_app_id}:{credentials.oauth_scope}"
+
+    async def token(self, credentials: AppCredentials) -> str:
+        key = self._key(credentials)
+        entry = self._tokens.get(key)
+        if entry is not None and entry[1] > self._clock():
+            self.hits += 1
+            return entry[0]
+        self.waits += 1
+        return await self._fetch(key, credentials)
+
+    def prefetch(self, credentials: AppCredentials):
+        """Fetch the token of `credentials` in the background, before the first send needs it."""
+        self._refresh(self._key(credentials), credentials)
+
+    def _fetch(self, key: str, credentials: AppCredentials) -> asyncio.Task:
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = asyncio.ensure_future(self._get_token(key, credentials))
+        return pending
+
+    async def _get_token(self, key: str, credentials: AppCredentials) -> str:
+        loop = asyncio.get_event_loop()
+        try:
+            token = await loop.run_in_executor(None, credentials.get_access_token)
+        except Exception:
+            self.failures += 1
+            self._schedule(key, credentials, self.retry_interval)
+            raise
+        finally:
+            del self._pending[key]
+        self.fetches += 1
+        now = self._clock()
+        expiry = _expiry(token, now)
+        self._tokens[key] = (token, expiry)
+        self._schedule(key, credentials, expiry - self.refresh_margin - now)
+        return token
+
+    def _schedule(self, key: str, credentials: AppCredentials, delay: float):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[key] = asyncio.get_event_loop().call_later(
+            max(delay, self.retry_interval), self._refresh, key, credentials
+        )
+
+    def _refresh(self, key: str, credentials: AppCredentials):
+        # Failures are counted and retried by `_get_token`
+        self._fetch(key, credentials).add_done_callback(
+            lambda task: task.cancelled() or task.exception()
+        )
+
+    async def close(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        pending = list(self._pending.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class _TokenPolicy(AsyncHTTPPolicy):
+    """Authorization header of the connector requests, from the token cache."""
+
+    def __init__(self, tokens: ServiceTokenCache, credentials: AppCredentials):
+        super().__init__()
+        self._tokens = tokens
+        self._credentials = credentials
+        # Without an app id and password, the requests go unsigned, as with `signed_session`
+        self._authorize = bool(credentials._should_authorize(None))  # pylint: disable=protected-access
+
+    async def send(self, request, **kwargs):
+        if self._authorize:
+            token = await self._tokens.token(self._credentials)
+            request.http_request.headers["Authorization"] = f"Bearer {token}"
+        return await self.next.send(request, **kwargs)
+
+
+class _SessionSender(AsyncHTTPSender):
+    """msrest sender posting through the pool's shared aiohttp session."""
+
+    def __init__(self, pool: "ConnectorPool"):
+        self._pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):  # pylint: disable=arguments-differ
+        # The session belongs to the pool
+        pass
+
+    async def send(self, request: ClientRequest, **config) -> AioHttpClientResponse:
+        response = await self._pool.session.request(
+            request.method, request.url, headers=request.headers, data=request.data
+        )
+        result = AioHttpClientResponse(request, response)
+        # Reading the body returns the connection to the pool
+        await result.load_body()
+        return result
+
+
+class ConnectorPool:
+    """Connector clients by service URL and credentials, sharing one keep-alive session.
+
+    The session is created lazily, inside the running event loop, and must be
+    closed on shutdown with `close`.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 100,
+        keepalive_timeout: float = 60.0,
+        timeout: float = 30.0,
+        tokens: ServiceTokenCache = None,
+    ):
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.tokens = tokens or ServiceTokenCache()
+        self._clients: Dict[str, ConnectorClient] = {}
+        self._sender = AioHTTPSender(_SessionSender(self))
+        self._session: aiohttp.ClientSession = None
+
+        self.connections = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"clients": len(self._clients), "connections": self.connections, **self.tokens.stats}
+
+    async def _on_connection(self, session, trace_context, params):
+        self.connections += 1
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace],
+            )
+        return self._session
+
+    def client(self, service_url: str, credentials: AppCredentials) -> ConnectorClient:
+        key = BotFrameworkAdapter.key_for_connector_client(
+            service_url, credentials.microsoft_app_id, credentials.oauth_scope
+        )
+        client = self._clients.get(key)
+        if client is None:
+            client = ConnectorClient(credentials, base_url=service_url)
+            config = client.config
+            config.add_user_agent(USER_AGENT)
+            config.pipeline = AsyncPipeline(
+                [
+                    config.user_agent_policy,
+                    _TokenPolicy(self.tokens, credentials),
+                    RawDeserializer(),
+                    config.http_logger_policy,
+                ],
+                self._sender,
+            )
+            self._clients[key] = client
+        return client
+
+    async def close(self):
+        await self.tokens.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -4,6 +4,7 @@
 from .booking_dialog import BookingDialog
 from .cancel_and_help_dialog import CancelAndHelpDialog
 from .date_resolver_dialog import DateResolverDialog
+from .fast_datetime_prompt import FastDateTimePrompt
 from .main_dialog import MainDialog
 
-__all__ = ["BookingDialog", "CancelAndHelpDialog", "DateResolverDialog", "MainDialog"]
+__all__ = ["BookingDialog", "CancelAndHelpDialog", "DateResolverDialog", "FastDateTimePrompt", "MainDialog"]
@@ -1,25 +1,22 @@
 """Flight booking dialog."""
 
-from datatypes_date_time.timex import Timex
-
 from botbuilder.dialogs import WaterfallDialog, WaterfallStepContext, DialogTurnResult, Choice
 from botbuilder.dialogs.prompts import ConfirmPrompt, TextPrompt, PromptOptions, ChoicePrompt
 from botbuilder.core import MessageFactory, BotTelemetryClient, NullTelemetryClient, CardFactory
 from botbuilder.schema import InputHints, HeroCard, CardImage
 from .cancel_and_help_dialog import CancelAndHelpDialog
 from .date_resolver_dialog import DateResolverDialog
+from helpers.timex_service import TIMEX_SERVICE
+from telemetry import traced
 
-from config import DefaultConfig
 import logging
-from opencensus.ext.azure.log_exporter import AzureLogHandler
 
 import random
-from datetime import datetime
 import sys
 
 
-CONFIG = DefaultConfig()
-INSTRUMENTATION_KEY = CONFIG.APPINSIGHTS_INSTRUMENTATION_KEY
+# Where the records go is set up once for the process (see `telemetry.install_log_handler`)
+LOGGER = logging.getLogger(__name__)
 
 class BookingDialog(CancelAndHelpDialog):
     """Flight booking implementation."""
@@ -34,13 +31,7 @@ class BookingDialog(CancelAndHelpDialog):
         )
         self.telemetry_client = telemetry_client
 
-        self.logger = logging.getLogger(__name__)
-        
-        self.logger.addHandler(
-            AzureLogHandler(
-                connection_string = INSTRUMENTATION_KEY
-            )
-        )
+        self.logger = LOGGER
 
         text_prompt = TextPrompt(TextPrompt.__name__)
 
@@ -71,6 +62,7 @@ class BookingDialog(CancelAndHelpDialog):
         self.add_dialog(waterfall_dialog)
 
     # Ville d'origine : première étape du waterfall
+    @traced()
     async def origin_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         """Prompt for origin city."""
         
@@ -114,6 +106,7 @@ class BookingDialog(CancelAndHelpDialog):
         return await step_context.next(booking_details.origin)
 
     # Ville de destination
+    @traced()
     async def destination_step(
         self, step_context: WaterfallStepContext
     ) -> DialogTurnResult:
@@ -165,6 +158,7 @@ class BookingDialog(CancelAndHelpDialog):
         return await step_context.next(booking_details.destination)
 
     # Date de départ
+    @traced()
     async def start_date_step(
         self, step_context: WaterfallStepContext
     ) -> DialogTurnResult:
@@ -198,6 +192,7 @@ class BookingDialog(CancelAndHelpDialog):
         return await step_context.next(booking_details.start_date)
 
     # Date de fin
+    @traced()
     async def end_date_step(
         self, step_context: WaterfallStepContext
     ) -> DialogTurnResult:
@@ -219,6 +214,7 @@ class BookingDialog(CancelAndHelpDialog):
         return await step_context.next(booking_details.end_date)
 
     # Budget
+    @traced()
     async def budget_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         """Prompt for budget."""
         booking_details = step_context.options
@@ -229,9 +225,7 @@ class BookingDialog(CancelAndHelpDialog):
         # Let's compare date. If the return date is prior to departure date, we'll need a TARDIS
         print("start date : "+booking_details.start_date, file=sys.stdout)
         print("end date : "+booking_details.end_date, file=sys.stdout)
-        start_date = datetime.strptime(booking_details.start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(booking_details.end_date, "%Y-%m-%d")
-        if end_date < start_date:
+        if TIMEX_SERVICE.is_before(booking_details.end_date, booking_details.start_date):
             msg_tardis = f"Wait a second... Your return date ({ booking_details.end_date }) is prior to your departure date ({booking_details.start_date})!!!"
             prompt_tardis = MessageFactory.text(msg_tardis, msg_tardis, InputHints.ignoring_input)
             await step_context.context.send_activity(prompt_tardis)
@@ -277,6 +271,7 @@ class BookingDialog(CancelAndHelpDialog):
 
         return await step_context.next(booking_details.budget)
 
+    @traced()
     async def confirm_step(
         self, step_context: WaterfallStepContext
     ) -> DialogTurnResult:
@@ -308,6 +303,7 @@ class BookingDialog(CancelAndHelpDialog):
             ChoicePrompt.__name__, prompt_options
         )
 
+    @traced()
     async def final_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         """Complete the interaction and end the dialog."""
         booking_details = step_context.options
@@ -316,13 +312,11 @@ class BookingDialog(CancelAndHelpDialog):
 
         # Customer is happy
         if step_context.result.value == "Yep":
-            self.logger.setLevel(logging.INFO)
             self.logger.info('Flight booked with success : the customer is satisfied')
             return await step_context.end_dialog(booking_details)
 
         # Customer is not happy
-        properties = {'custom_dimensions': booking_details.__dict__}
-        self.logger.setLevel(logging.ERROR)
+        properties = {'custom_dimensions': booking_details.to_dict()}
         self.logger.error("The customer is not satisfied with the Bot's proposition", extra=properties)
         
         ls_apology_msg = [
@@ -347,5 +341,4 @@ class BookingDialog(CancelAndHelpDialog):
 
     def is_ambiguous(self, timex: str) -> bool:
         """Ensure time is correct."""
-        timex_property = Timex(timex)
-        return "definite" not in timex_property.types
+        return not TIMEX_SERVICE.is_definite(timex)
@@ -1,7 +1,5 @@
 """Handle date/time resolution for booking dialog."""
 
-from datatypes_date_time.timex import Timex
-
 from botbuilder.core import MessageFactory, BotTelemetryClient, NullTelemetryClient
 from botbuilder.dialogs import WaterfallDialog, DialogTurnResult, WaterfallStepContext
 from botbuilder.dialogs.prompts import (
@@ -11,6 +9,8 @@ from botbuilder.dialogs.prompts import (
     DateTimeResolution,
 )
 from .cancel_and_help_dialog import CancelAndHelpDialog
+from .fast_datetime_prompt import FastDateTimePrompt
+from helpers.timex_service import TIMEX_SERVICE
 from datetime import datetime
 
 class DateResolverDialog(CancelAndHelpDialog):
@@ -30,7 +30,8 @@ class DateResolverDialog(CancelAndHelpDialog):
         self.dialog_id = dialog_id
         self.telemetry_client = telemetry_client
 
-        date_time_prompt = DateTimePrompt(
+        # Explicit dates are read without the full recognizer; the dialog id is kept for the stored states
+        date_time_prompt = FastDateTimePrompt(
             DateTimePrompt.__name__, DateResolverDialog.datetime_prompt_validator
         )
         date_time_prompt.telemetry_client = telemetry_client
@@ -77,7 +78,7 @@ class DateResolverDialog(CancelAndHelpDialog):
             )
 
         # We have a Date we just need to check it is unambiguous.
-        if "definite" in Timex(timex).types:
+        if not TIMEX_SERVICE.is_definite(timex):
             # This is essentially a "reprompt" of the data we were given up front.
             return await step_context.prompt(
                 DateTimePrompt.__name__, PromptOptions(prompt=reprompt_msg)
@@ -99,7 +100,6 @@ class DateResolverDialog(CancelAndHelpDialog):
         if prompt_context.recognized.succeeded:
             timex = prompt_context.recognized.value[0].timex.split("T")[0]
 
-            # TODO: Needs TimexProperty
-            return "definite" in Timex(timex).types
+            return TIMEX_SERVICE.is_definite(timex)
 
         return False
@@ -0,0 +1,53 @@
+"""Date prompt recognizing explicit dates without the full datetime recognizer."""
+from typing import Dict
+
+from botbuilder.core import TurnContext
+from botbuilder.dialogs.prompts import (
+    DateTimePrompt,
+    DateTimeResolution,
+    PromptOptions,
+    PromptRecognizerResult,
+)
+from botbuilder.schema import ActivityTypes
+from recognizers_date_time import recognize_datetime
+
+from helpers.date_parser import parse_explicit_date
+
+
+class FastDateTimePrompt(DateTimePrompt):
+    """`DateTimePrompt` reading the replies made of an explicit date itself.
+
+    The result is the one of the full recognizer (a single resolution whose
+    timex and value are the ISO date); any other reply goes to it.
+    """
+
+    # Set once the full recognizer has built its models
+    warm = False
+
+    def __init__(self, dialog_id: str, validator: object = None, default_locale: str = None):
+        super(FastDateTimePrompt, self).__init__(dialog_id, validator, default_locale)
+        self.fast = 0
+        self.fallback = 0
+
+    async def on_recognize(
+        self,
+        turn_context: TurnContext,
+        state: Dict[str, object],
+        options: PromptOptions,
+    ) -> PromptRecognizerResult:
+        activity = turn_context.activity
+        if activity.type == ActivityTypes.message:
+            timex = parse_explicit_date(activity.text, activity.locale)
+            if timex is not None:
+                self.fast += 1
+                return PromptRecognizerResult(True, [DateTimeResolution(value=timex, timex=timex)])
+
+        self.fallback += 1
+        return await super().on_recognize(turn_context, state, options)
+
+    @classmethod
+    def warm_up(cls):
+        """Call the full recognizer once: its first call compiles its models (several hundred ms)."""
+        if not cls.warm:
+            recognize_datetime("tomorrow", "English")
+            cls.warm = True
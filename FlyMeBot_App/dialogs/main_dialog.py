@@ -13,12 +13,12 @@ from botbuilder.core import (
 )
 from botbuilder.dialogs.choices import Choice
 from botbuilder.schema import InputHints, Attachment, Activity, ActivityTypes
-import json, re
 from booking_details import BookingDetails
 from flight_booking_recognizer import FlightBookingRecognizer
+from helpers.card_template import CardTemplate
 from helpers.luis_helper import LuisHelper, Intent
+from telemetry import traced
 from .booking_dialog import BookingDialog
-import os
 import random
 
 
@@ -52,6 +52,10 @@ class MainDialog(ComponentDialog):
 
         self.initial_dialog_id = "WFDialog"
 
+        # The card is parsed once, each booking only fills its placeholders.
+        self._booked_flight_card = CardTemplate.from_resource("bookedFlightCard.json")
+
+    @traced()
     async def intro_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         if not self._luis_recognizer.is_configured:
             await step_context.context.send_activity(
@@ -122,6 +126,7 @@ class MainDialog(ComponentDialog):
                 )
         )
 
+    @traced()
     async def act_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         if not self._luis_recognizer.is_configured:
             # LUIS is not configured, we just run the BookingDialog path with an empty BookingDetailsInstance.
@@ -159,6 +164,7 @@ class MainDialog(ComponentDialog):
 
         return await step_context.next(None)
 
+    @traced()
     async def final_step(self, step_context: WaterfallStepContext) -> DialogTurnResult:
         # If the child dialog ("BookingDialog") was cancelled or the user failed to confirm,
         # the Result here will be null.
@@ -181,36 +187,18 @@ class MainDialog(ComponentDialog):
         return await step_context.replace_dialog(self.id, prompt_message)
 
     def replace(self, templateCard: dict, data: dict):
-        string_temp = str(templateCard)
-        for key in data:
-            pattern = "\${" + key + "}"
-            string_temp = re.sub(pattern, str(data[key]), string_temp)
-        return eval(string_temp)
+        return CardTemplate(templateCard).render(data)
 
-    # Load attachment from file.
     def create_adaptive_card_attachment(self, result):
         """Create an adaptive card."""
-        
-        relative_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-        path = os.path.join(relative_path, "bots", "resources", "bookedFlightCard.json")
-
-        with open(path) as card_file:
-            card = json.load(card_file)
-        
-        origin = result.origin
-        destination = result.destination
-        start_date = result.start_date
-        end_date = result.end_date
-        budget = result.budget
-
         templateCard = {
-            "origin": origin, 
-            "destination": destination,
-            "start_date": start_date,
-            "end_date": end_date,
-            "budget": budget}
+            "origin": result.origin,
+            "destination": result.destination,
+            "start_date": result.start_date,
+            "end_date": result.end_date,
+            "budget": result.budget}
 
-        flightCard = self.replace(card, templateCard)
+        flightCard = self._booked_flight_card.render(templateCard)
 
         return Attachment(
-            content_type="application/vnd.microsoft.card.adaptive", content=flightCard)
\ No newline at end of file
+            content_type="application/vnd.microsoft.card.adaptive", content=flightCard)
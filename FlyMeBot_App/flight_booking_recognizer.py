@@ -1,7 +1,7 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
+import time
 
-from botbuilder.ai.luis import LuisApplication, LuisRecognizer, LuisPredictionOptions
 from botbuilder.core import (
     Recognizer,
     RecognizerResult,
@@ -11,6 +11,9 @@ from botbuilder.core import (
 )
 
 from config import DefaultConfig
+from recognizers import CachingRecognizer, CascadeRecognizer, LocalBookingRecognizer
+from telemetry import traced
+from telemetry.metrics import RECOGNIZER_ERRORS, RECOGNIZER_LATENCY
 
 
 class FlightBookingRecognizer(Recognizer):
@@ -18,6 +21,9 @@ class FlightBookingRecognizer(Recognizer):
         self, configuration: DefaultConfig, telemetry_client: BotTelemetryClient = None
     ):
         self._recognizer = None
+        self._pipeline = None
+        self.cache = None
+        self.cascade = None
 
         luis_is_configured = (
             configuration.LUIS_APP_ID
@@ -25,25 +31,71 @@ class FlightBookingRecognizer(Recognizer):
             and configuration.LUIS_API_HOST_NAME
         )
         if luis_is_configured:
+            # The LUIS SDK takes about 100 ms to import: only when it is used
+            # pylint: disable=import-outside-toplevel
+            from botbuilder.ai.luis import LuisApplication, LuisPredictionOptions
+            from recognizers.async_luis_recognizer import AsyncLuisRecognizer, LuisClientSession
+
             # Set the recognizer options depending on which endpoint version you want to use e.g v2 or v3.
             # More details can be found in https://docs.microsoft.com/azure/cognitive-services/luis/luis-migration-api-v3
+            # A host name may also be given as a full URL (local LUIS stand-in)
+            endpoint = configuration.LUIS_API_HOST_NAME
+            if not endpoint.startswith(("http://", "https://")):
+                endpoint = "https://" + endpoint
             luis_application = LuisApplication(
                 configuration.LUIS_APP_ID,
                 configuration.LUIS_API_KEY,
-                "https://" + configuration.LUIS_API_HOST_NAME,
+                endpoint,
             )
 
-            options = LuisPredictionOptions()
+            options = LuisPredictionOptions(timeout=configuration.LUIS_TIMEOUT)
             options.telemetry_client = telemetry_client or NullTelemetryClient()
 
-            self._recognizer = LuisRecognizer(
-                luis_application, prediction_options=options
+            # LUIS is queried through a shared keep-alive session so a pending
+            # prediction never blocks the other conversations.
+            self._recognizer = AsyncLuisRecognizer(
+                luis_application,
+                prediction_options=options,
+                client_session=LuisClientSession(configuration.LUIS_POOL_SIZE),
             )
 
+            self._pipeline = self._recognizer
+
+            # Repeated utterances ("book a flight") are answered without calling LUIS.
+            if configuration.RECOGNIZER_CACHE_SIZE > 0:
+                self.cache = CachingRecognizer(
+                    self._pipeline,
+                    max_size=configuration.RECOGNIZER_CACHE_SIZE,
+                    ttl=configuration.RECOGNIZER_CACHE_TTL,
+                )
+                self._pipeline = self.cache
+
+            # Trivial requests ("from Paris to Berlin on 2023-01-05") are parsed in-process.
+            if configuration.LOCAL_RECOGNIZER_THRESHOLD <= 1:
+                self.cascade = CascadeRecognizer(
+                    LocalBookingRecognizer(),
+                    self._pipeline,
+                    threshold=configuration.LOCAL_RECOGNIZER_THRESHOLD,
+                )
+                self._pipeline = self.cascade
+
     @property
     def is_configured(self) -> bool:
         # Returns true if luis is configured in the config.py and initialized.
         return self._recognizer is not None
 
+    @traced()
     async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
-        return await self._recognizer.recognize(turn_context)
+        start = time.perf_counter()
+        try:
+            return await self._pipeline.recognize(turn_context)
+        except Exception:
+            RECOGNIZER_ERRORS.inc()
+            raise
+        finally:
+            RECOGNIZER_LATENCY.observe(time.perf_counter() - start)
+
+    async def close(self):
+        # Releases the pooled LUIS connections.
+        if self._recognizer is not None:
+            await self._recognizer.close()
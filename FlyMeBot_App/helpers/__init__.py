@@ -1,5 +1,5 @@
 """Helpers module."""
 
-from . import activity_helper, luis_helper, dialog_helper
+from . import activity_helper, card_template, luis_helper, dialog_helper
 
-__all__ = ["activity_helper", "dialog_helper", "luis_helper"]
+__all__ = ["activity_helper", "card_template", "dialog_helper", "luis_helper"]
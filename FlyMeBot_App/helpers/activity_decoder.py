@@ -0,0 +1,195 @@
+"""Decoding of the activities posted to /api/messages.
+
+`Activity().deserialize` walks msrest's model graph for each request: every
+attribute of every model is looked up through key extractors and converted
+through a type dispatch. Here the attribute maps of the schema models are
+read once into field maps (JSON key -> attribute, converter) and the models
+are built by calling their constructors, as msrest does, so the activity is
+equal to the one `deserialize` returns. The payloads the field maps do not
+decode like msrest (a "true" string for a boolean, an invalid timestamp...)
+are left to `deserialize`.
+"""
+import json
+from typing import Callable, Dict, Tuple
+
+from botbuilder import schema
+from botbuilder.schema import Activity
+from msrest.serialization import DeserializationError, Deserializer, Model
+
+try:
+    import orjson
+except ImportError:
+    # Optional: the standard json module parses the same documents, slower
+    orjson = None
+
+
+def loads(data: bytes):
+    """JSON document of a request body, parsed with orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN, integers past 64 bits or a body not encoded in UTF-8
+            pass
+    return json.loads(data)
+
+
+class _Unsupported(Exception):
+    """A value the field maps do not decode like msrest."""
+
+
+_Converter = Callable[[object], object]
+
+
+def _string(value):
+    if isinstance(value, str):
+        return value
+    raise _Unsupported()
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    raise _Unsupported()
+
+
+def _integer(value):
+    if type(value) is int:  # pylint: disable=unidiomatic-typecheck
+        return value
+    raise _Unsupported()
+
+
+def _json(value):
+    # A parsed JSON document holds nothing msrest would convert
+    return value
+
+
+def _datetime(value):
+    if not isinstance(value, str):
+        raise _Unsupported()
+    try:
+        return Deserializer.deserialize_iso(value)
+    except DeserializationError:
+        raise _Unsupported()
+
+
+def _unsupported(value):
+    raise _Unsupported()
+
+
+def _list(item: _Converter) -> _Converter:
+    def convert(value):
+        if not isinstance(value, list):
+            raise _Unsupported()
+        return [None if element is None else item(element) for element in value]
+
+    return convert
+
+
+def _dict(item: _Converter) -> _Converter:
+    def convert(value):
+        if not isinstance(value, dict):
+            raise _Unsupported()
+        return {key: None if element is None else item(element) for key, element in value.items()}
+
+    return convert
+
+
+_BASIC = {
+    "str": _string,
+    "bool": _boolean,
+    "int": _integer,
+    "object": _json,
+    "iso-8601": _datetime,
+}
+
+
+class _ModelDecoder:
+    """Build a model from a JSON object with the model's field map."""
+
+    def __init__(self, model: type):
+        self.model = model
+        # JSON key -> (attribute, converter), filled once every model has its decoder
+        self.fields: Dict[str, Tuple[str, _Converter]] = {}
+
+    def __call__(self, data):
+        if not isinstance(data, dict):
+            raise _Unsupported()
+        fields = self.fields
+        attributes = {}
+        additional_properties = None
+        for key, value in data.items():
+            field = fields.get(key)
+            if field is None:
+                # Kept aside, like msrest does
+                if additional_properties is None:
+                    additional_properties = {}
+                additional_properties[key] = value
+            elif value is not None:
+                attributes[field[0]] = field[1](value)
+        result = self.model(**attributes)
+        if additional_properties:
+            result.additional_properties = additional_properties
+        return result
+
+
+def _field_maps(model: type) -> _Converter:
+    """Decoder of `model` and of the schema models its attributes refer to."""
+    decoders: Dict[str, _Converter] = {}
+
+    def converter(data_type: str) -> _Converter:
+        if data_type in _BASIC:
+            return _BASIC[data_type]
+        if data_type.startswith("[") and data_type.endswith("]"):
+            return _list(converter(data_type[1:-1]))
+        if data_type.startswith("{") and data_type.endswith("}"):
+            return _dict(converter(data_type[1:-1]))
+        nested = getattr(schema, data_type, None)
+        if isinstance(nested, type) and issubclass(nested, Model):
+            return decoder(nested)
+        return _unsupported
+
+    def decoder(nested: type) -> _Converter:
+        if nested.__name__ in decoders:
+            return decoders[nested.__name__]
+        # Polymorphic models, read-only attributes and flattened keys are msrest's business
+        if (
+            getattr(nested, "_subtype_map", None)
+            or any(rule.get("readonly") or rule.get("constant") for rule in nested._validation.values())
+            or any("." in description["key"] or not description["key"]
+                   for description in nested._attribute_map.values())
+        ):
+            decoders[nested.__name__] = _unsupported
+            return _unsupported
+        decoders[nested.__name__] = result = _ModelDecoder(nested)
+        for attribute, description in nested._attribute_map.items():
+            result.fields[description["key"]] = (attribute, converter(description["type"]))
+        return result
+
+    return decoder(model)
+
+
+class ActivityDecoder:
+    """`Activity().deserialize(body)`, built from the field maps when they cover the payload."""
+
+    def __init__(self):
+        self._decode = _field_maps(Activity)
+        self.fast = 0
+        self.fallback = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"fast": self.fast, "fallback": self.fallback}
+
+    def decode(self, body) -> Activity:
+        try:
+            activity = self._decode(body)
+        except _Unsupported:
+            self.fallback += 1
+            return Activity().deserialize(body)
+        self.fast += 1
+        return activity
+
+
+# Shared by the requests of the process
+ACTIVITY_DECODER = ActivityDecoder()
@@ -0,0 +1,120 @@
+"""Precompiled adaptive card templates.
+
+A card is parsed once and every ``${field}`` placeholder is compiled into a
+direct slot of the card structure. Rendering only rebuilds the containers that
+hold a placeholder: the other parts of the card are shared between renders.
+"""
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Optional
+
+RESOURCES_DIR = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)),
+    "bots",
+    "resources",
+)
+
+# Only used when compiling a card, never when rendering one.
+_PLACEHOLDER = re.compile(r"\$\{([^}]+)\}")
+
+_Filler = Callable[[Dict[str, Any]], Any]
+
+
+def _compile_string(text: str) -> Optional[_Filler]:
+    parts = _PLACEHOLDER.split(text)
+    if len(parts) == 1:
+        return None
+
+    # Odd indexes of `parts` are field names, even indexes are literal text.
+    if len(parts) == 3 and not parts[0] and not parts[2]:
+        field = parts[1]
+        return lambda values: str(values.get(field, ""))
+
+    chunks = tuple(parts)
+
+    def fill(values: Dict[str, Any]) -> str:
+        return "".join(
+            str(values.get(chunk, "")) if index % 2 else chunk
+            for index, chunk in enumerate(chunks)
+        )
+
+    return fill
+
+
+def _compile_dict(node: dict) -> Optional[_Filler]:
+    slots = []
+    for key, value in node.items():
+        filler = _compile(value)
+        if filler is not None:
+            slots.append((key, filler))
+
+    if not slots:
+        return None
+
+    def fill(values: Dict[str, Any]) -> dict:
+        filled = dict(node)
+        for key, filler in slots:
+            filled[key] = filler(values)
+        return filled
+
+    return fill
+
+
+def _compile_list(node: list) -> Optional[_Filler]:
+    slots = []
+    for index, value in enumerate(node):
+        filler = _compile(value)
+        if filler is not None:
+            slots.append((index, filler))
+
+    if not slots:
+        return None
+
+    def fill(values: Dict[str, Any]) -> list:
+        filled = list(node)
+        for index, filler in slots:
+            filled[index] = filler(values)
+        return filled
+
+    return fill
+
+
+def _compile(node: Any) -> Optional[_Filler]:
+    """Return a function filling `node`, or None when `node` has no placeholder."""
+    if isinstance(node, str):
+        return _compile_string(node)
+    if isinstance(node, dict):
+        return _compile_dict(node)
+    if isinstance(node, list):
+        return _compile_list(node)
+    return None
+
+
+class CardTemplate:
+    """Adaptive card whose placeholders are compiled once."""
+
+    def __init__(self, card: dict):
+        self._card = card
+        self._filler = _compile(card)
+
+    @staticmethod
+    def from_file(path: str) -> "CardTemplate":
+        """Parse a card stored as JSON."""
+        with open(path) as card_file:
+            return CardTemplate(json.load(card_file))
+
+    @staticmethod
+    def from_resource(name: str) -> "CardTemplate":
+        """Parse a card stored in `bots/resources`."""
+        return CardTemplate.from_file(os.path.join(RESOURCES_DIR, name))
+
+    def render(self, values: Dict[str, Any] = None) -> dict:
+        """Fill the placeholders with `values`.
+
+        Unknown fields are rendered as empty strings. The returned card must be
+        treated as read-only since the static parts are shared between renders.
+        """
+        if self._filler is None:
+            return self._card
+        return self._filler(values or {})
@@ -0,0 +1,101 @@
+"""Fast recognition of the explicit dates typed at the date prompt."""
+import re
+from datetime import date
+from typing import Optional
+
+# Cultures in which the full recognizer reads "01/05/2023" as January 5th
+CULTURES = ("english", "en-us")
+
+MONTHS = {
+    "january": 1,
+    "jan": 1,
+    "february": 2,
+    "feb": 2,
+    "march": 3,
+    "mar": 3,
+    "april": 4,
+    "apr": 4,
+    "may": 5,
+    "june": 6,
+    "jun": 6,
+    "july": 7,
+    "jul": 7,
+    "august": 8,
+    "aug": 8,
+    "september": 9,
+    "sept": 9,
+    "sep": 9,
+    "october": 10,
+    "oct": 10,
+    "november": 11,
+    "nov": 11,
+    "december": 12,
+    "dec": 12,
+}
+
+_MONTH = r"(?P<month>" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_DAY = r"(?P<day>\d{1,2})(?P<suffix>st|nd|rd|th)?"
+_YEAR = r"(?P<year>(?:19|20)\d\d)"
+
+# 2023-01-05, 2023/1/5
+_ISO = re.compile(r"(?P<year>(?:19|20)\d\d)(?P<sep>[-/])(?P<first>\d{1,2})(?P=sep)(?P<second>\d{1,2})")
+# 01/05/2023 (month first), 13/01/2023 (day first when the month cannot come first)
+_NUMERIC = re.compile(r"(?P<first>\d{1,2})(?P<sep>[-/])(?P<second>\d{1,2})(?P=sep)" + _YEAR)
+# January 5th, 2023 / Jan. 5 2023
+_MONTH_FIRST = re.compile(_MONTH + r"\s+" + _DAY + r",?\s+" + _YEAR)
+# 5 January 2023 / the 5th of January, 2023
+_DAY_FIRST = re.compile(r"(?:the\s+)?" + _DAY + r"\s+(?:of\s+)?" + _MONTH + r",?\s+" + _YEAR)
+
+_TRAILING = ".!"
+
+
+def _ordinal_suffix(day: int) -> str:
+    if day % 10 == 1 and day != 11:
+        return "st"
+    if day % 10 == 2 and day != 12:
+        return "nd"
+    if day % 10 == 3 and day != 13:
+        return "rd"
+    return "th"
+
+
+def _to_timex(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        # Left to the full recognizer, which reports it as not resolved
+        return None
+
+
+def parse_explicit_date(text: str, culture: str = None) -> Optional[str]:
+    """Timex of a reply made of an explicit date alone, None when the full recognizer must decide.
+
+    Only the forms for which the full English recognizer returns a single
+    definite date are handled: ISO dates, numeric dates with a four digit
+    year and dates with a month name. Relative dates ("tomorrow"), dates
+    without a year and replies holding other words are not.
+    """
+    if not text or (culture is not None and culture.lower() not in CULTURES):
+        return None
+    text = text.strip().rstrip(_TRAILING).lower()
+
+    match = _ISO.fullmatch(text)
+    if match:
+        return _to_timex(int(match["year"]), int(match["first"]), int(match["second"]))
+
+    match = _NUMERIC.fullmatch(text)
+    if match:
+        first, second = int(match["first"]), int(match["second"])
+        if first > 12 and second > 12:
+            return None
+        month, day = (first, second) if first <= 12 else (second, first)
+        return _to_timex(int(match["year"]), month, day)
+
+    match = _MONTH_FIRST.fullmatch(text) or _DAY_FIRST.fullmatch(text)
+    if match:
+        day = int(match["day"])
+        # "5rd" is not read as a day
+        if match["suffix"] and match["suffix"] != _ordinal_suffix(day):
+            return None
+        return _to_timex(int(match["year"]), MONTHS[match["month"]], day)
+    return None
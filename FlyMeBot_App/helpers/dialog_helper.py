@@ -1,6 +1,13 @@
 """Utility to run dialogs."""
 from botbuilder.core import StatePropertyAccessor, TurnContext
-from botbuilder.dialogs import Dialog, DialogSet, DialogTurnStatus
+from botbuilder.dialogs import (
+    ComponentDialog,
+    Dialog,
+    DialogSet,
+    DialogState,
+    DialogTurnStatus,
+    WaterfallDialog,
+)
 
 
 class DialogHelper:
@@ -18,3 +25,27 @@ class DialogHelper:
         results = await dialog_context.continue_dialog()
         if results.status == DialogTurnStatus.Empty:
             await dialog_context.begin_dialog(dialog.id)
+
+    @staticmethod
+    async def active_step(dialog: Dialog, dialog_state: DialogState) -> str:
+        """Qualified name of the innermost waterfall step waiting in the dialog stack, None if there is none."""
+        step = None
+        container = None
+        while dialog_state is not None and dialog_state.dialog_stack:
+            # The top of each stack is first: its prompts are started by the waterfall under them
+            dialogs = []
+            for instance in dialog_state.dialog_stack:
+                found = dialog if container is None else await container.find_dialog(instance.id)
+                dialogs.append(found if found is not None and found.id == instance.id else None)
+            for instance, found in zip(dialog_state.dialog_stack, dialogs):
+                if isinstance(found, WaterfallDialog):
+                    index = instance.state.get(WaterfallDialog.StepIndex)
+                    steps = found._steps  # pylint: disable=protected-access
+                    if index is not None and 0 <= index < len(steps):
+                        step = steps[index].__qualname__
+                    break
+            if not isinstance(dialogs[0], ComponentDialog):
+                break
+            container = dialogs[0]
+            dialog_state = dialog_state.dialog_stack[0].state.get(ComponentDialog.persisted_dialog_state)
+        return step
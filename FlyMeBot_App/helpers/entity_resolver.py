@@ -0,0 +1,116 @@
+"""Resolve the custom LUIS entities to their prebuilt values."""
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from botbuilder.core import RecognizerResult
+
+
+def _best_scored(instances: List[dict]) -> dict:
+    best, best_score = None, 0
+    for instance in instances:
+        if instance.get("score", 0) > best_score:
+            best, best_score = instance, instance["score"]
+    return best
+
+
+class EntityResolver:
+    """Map each custom entity (`or_city`, `str_date`, ...) to its prebuilt entity.
+
+    For each custom entity, the best scored instance is matched with the
+    prebuilt instance closest to it (sum of the start and end index
+    distances). Long prebuilt lists are sorted by position once and searched
+    by bisection instead of being scanned for every custom entity.
+    """
+
+    # Distance above which a prebuilt entity is not related to the custom one
+    MAX_DISTANCE = 100
+    # Below this many prebuilt instances, a plain scan beats building an index
+    INDEX_THRESHOLD = 16
+
+    def __init__(self, key_types: Dict[str, str]):
+        self.key_types = key_types
+
+    def resolve(self, recognizer_result: RecognizerResult) -> Dict[str, object]:
+        """Value of each resolved custom entity, keyed by entity name."""
+        entities = recognizer_result.entities or {}
+        instances = entities.get("$instance")
+        if instances is None:
+            return {}
+
+        indexes = {}
+        resolved = {}
+        for key, prebuilt in self.key_types.items():
+            if not entities.get(key) or not instances.get(key):
+                continue
+
+            selected = _best_scored(instances[key])
+            if selected is None:
+                continue
+
+            candidates = instances.get(prebuilt) or []
+            if len(candidates) < self.INDEX_THRESHOLD:
+                position = self._scan(candidates, selected)
+            else:
+                if prebuilt not in indexes:
+                    indexes[prebuilt] = self._index(candidates)
+                position = self._closest(indexes[prebuilt], selected)
+
+            values = entities.get(prebuilt)
+            if position is None or values is None or len(values) <= position:
+                continue
+
+            resolved[key] = self._value(prebuilt, values[position])
+        return resolved
+
+    def _scan(self, instances: List[dict], selected: dict) -> int:
+        start, end = selected["startIndex"], selected["endIndex"]
+        best, best_distance = None, self.MAX_DISTANCE
+        for position, instance in enumerate(instances):
+            distance = abs(instance["startIndex"] - start) + abs(instance["endIndex"] - end)
+            if distance < best_distance:
+                best, best_distance = position, distance
+        return best
+
+    @staticmethod
+    def _index(instances: List[dict]) -> Tuple[List[int], List[dict], List[int]]:
+        """Start indexes in ascending order, with the matching instances and positions."""
+        starts = [instance["startIndex"] for instance in instances]
+        positions = range(len(instances))
+        # LUIS usually lists instances in reading order: only sort when it did not.
+        if starts != sorted(starts):
+            positions = sorted(positions, key=starts.__getitem__)
+            starts = [starts[i] for i in positions]
+            instances = [instances[i] for i in positions]
+        return starts, instances, positions
+
+    def _closest(self, index: Tuple[List[int], List[dict], List[int]], selected: dict) -> int:
+        starts, instances, positions = index
+        start, end = selected["startIndex"], selected["endIndex"]
+
+        best, best_distance = None, self.MAX_DISTANCE
+        pivot = bisect_left(starts, start)
+        # Walk away from the pivot in both directions: the start distance alone
+        # bounds the total distance, so each walk stops as soon as it cannot win.
+        for candidates in (range(pivot, len(starts)), range(pivot - 1, -1, -1)):
+            for i in candidates:
+                start_distance = abs(starts[i] - start)
+                if start_distance > best_distance:
+                    break
+                distance = start_distance + abs(instances[i]["endIndex"] - end)
+                position = positions[i]
+                # Ties go to the first instance LUIS returned.
+                if distance < best_distance or (
+                    distance == best_distance and best is not None and position < best
+                ):
+                    best, best_distance = position, distance
+        return best
+
+    @staticmethod
+    def _value(prebuilt: str, value):
+        if prebuilt == "geographyV2_city":
+            return value.capitalize()
+        if prebuilt == "datetime":
+            return value["timex"][0]
+        if prebuilt == "number":
+            return value
+        return None
@@ -1,9 +1,9 @@
 from enum import Enum
 from typing import Dict
-from botbuilder.ai.luis import LuisRecognizer
-from botbuilder.core import IntentScore, TopIntent, TurnContext
+from botbuilder.core import IntentScore, Recognizer, TopIntent, TurnContext
 
 from booking_details import BookingDetails
+from .entity_resolver import EntityResolver
 
 
 class Intent(Enum):
@@ -26,6 +26,8 @@ MAP_KEY_TYPE = {
     'budget': 'number'
 }
 
+ENTITY_RESOLVER = EntityResolver(MAP_KEY_TYPE)
+
 def top_intent(intents: Dict[Intent, dict]) -> TopIntent:
     max_intent = Intent.NONE_INTENT
     max_value = 0.0
@@ -41,7 +43,7 @@ def top_intent(intents: Dict[Intent, dict]) -> TopIntent:
 class LuisHelper:
     @staticmethod
     async def execute_luis_query(
-        luis_recognizer: LuisRecognizer, turn_context: TurnContext
+        luis_recognizer: Recognizer, turn_context: TurnContext
     ) -> (Intent, object):
         """
         Returns an object with preformatted LUIS results for the bot's dialogs to consume.
@@ -56,58 +58,11 @@ class LuisHelper:
             if intent == Intent.BOOK_FLIGHT.value:
                 result = BookingDetails()
 
-                for (key, type) in MAP_KEY_TYPE.items():
-                    entity = LuisHelper._get_entity(recognizer_result, key, type)
-
+                for (key, entity) in ENTITY_RESOLVER.resolve(recognizer_result).items():
                     if entity is not None:
                         setattr(result, MAP_KEY_ATTR[key], entity)
-                
-                    
 
         except Exception as exception:
             print(exception)
 
         return intent, result
-
-    # Return the right entity in the Json
-    def _get_entity(recognizer_result, key, type):
-
-        if (recognizer_result.entities.get("$instance") is None
-            or recognizer_result.entities.get(key) is None
-            or len(recognizer_result.entities.get(key)) == 0) :
-            return None
-
-        score = 0
-        index = None
-
-        for i, entity in enumerate(recognizer_result.entities.get("$instance").get(key)):
-            if entity['score'] > score:
-                score = entity['score']
-                index = i
-
-        selected_entity = recognizer_result.entities.get("$instance").get(key)[index]
-
-        score = 100
-        index = None
-
-        for i, entity in enumerate(recognizer_result.entities.get("$instance").get(type)):
-            s = abs(entity['startIndex'] - selected_entity['startIndex']) + abs(entity['endIndex'] - selected_entity['endIndex'])
-            if s < score:
-                score = s
-                index = i
-
-
-        if (index is None
-            or recognizer_result.entities.get(type) is None
-            or len(recognizer_result.entities.get(type)) <= index):
-            return None
-        
-        return (
-            recognizer_result.entities.get(type)[index].capitalize()
-            if type == 'geographyV2_city'
-            else recognizer_result.entities.get(type)[index]["timex"][0]
-            if type == 'datetime'
-            else recognizer_result.entities.get(type)[index]
-            if type == 'number'
-            else None
-        )
\ No newline at end of file
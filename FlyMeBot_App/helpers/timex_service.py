@@ -0,0 +1,97 @@
+"""Parse the timex values of the booking dates once."""
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, NamedTuple, Optional
+
+
+class TimexInfo(NamedTuple):
+    """What the dialogs need to know about a timex value."""
+
+    timex: str
+    # Year, month and day are all known
+    definite: bool
+    # Start date of a definite value, None otherwise
+    date: Optional[date]
+    # "day", "week", "month" or "year"; None for a time or a duration alone
+    granularity: Optional[str]
+
+
+def parse_timex(timex: str) -> TimexInfo:
+    """Uncached parsing of a timex value, ie "2023-01-05", "XXXX-01-05" or "2023-01-05T10"."""
+    # Loaded with the first date of the process
+    from datatypes_date_time.timex import Timex  # pylint: disable=import-outside-toplevel
+
+    parsed = Timex(timex or "")
+    definite = "definite" in parsed.types
+    if parsed.day_of_month is not None:
+        granularity = "day"
+    elif parsed.week_of_year is not None:
+        granularity = "week"
+    elif parsed.month is not None:
+        granularity = "month"
+    elif parsed.year is not None:
+        granularity = "year"
+    else:
+        granularity = None
+
+    resolved = None
+    if definite:
+        try:
+            resolved = date(parsed.year, parsed.month, parsed.day_of_month)
+        except ValueError:
+            # Out of range day, ie "2023-02-30"
+            definite = False
+    return TimexInfo(timex, definite, resolved, granularity)
+
+
+class TimexService:
+    """`TimexInfo` of the timex values, kept in a bounded LRU cache.
+
+    A timex value does not depend on the current date, so the cached records
+    never expire. The records are immutable and shared between turns.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, TimexInfo]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def parse(self, timex: str) -> TimexInfo:
+        info = self._entries.get(timex)
+        if info is not None:
+            self._entries.move_to_end(timex)
+            self.hits += 1
+            return info
+
+        self.misses += 1
+        info = parse_timex(timex)
+        if self.max_size > 0:
+            self._entries[timex] = info
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return info
+
+    def is_definite(self, timex: str) -> bool:
+        return self.parse(timex).definite
+
+    def is_before(self, timex: str, other: str) -> bool:
+        """True when both values are definite and the first one starts on an earlier day."""
+        first, second = self.parse(timex).date, self.parse(other).date
+        return first is not None and second is not None and first < second
+
+
+# Shared by the dialogs of the process
+TIMEX_SERVICE = TimexService()
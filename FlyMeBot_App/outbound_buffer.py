@@ -0,0 +1,130 @@
+"""Per-turn buffering of the outgoing activities.
+
+Dialogs send their messages one `send_activity` at a time, and the adapter
+posts each of them to the connector. This middleware holds the activities
+of a turn and sends them with a single `send_activities` call at the end of
+the turn. With `merge_text` (off by default), consecutive plain text
+messages that only differ by their text are also merged into one message
+(one paragraph each), so the connector receives one POST for them instead
+of one per message.
+
+Ordering is kept. A typing indicator flushes the buffer right away, so it is
+shown while the bot works; delays stay between the activities around them.
+For `expectReplies` turns, the flushed activities are returned inline in the
+response, as the turn context does for any activity.
+
+A held activity is not sent yet when `send_activity` returns, so it returns
+None instead of the connector's `ResourceResponse`: the id of a message
+sent during the turn is not known to the dialog that sent it.
+"""
+from copy import copy
+from typing import Awaitable, Callable, List
+
+from botbuilder.core import Middleware, TurnContext
+from botbuilder.schema import Activity, ActivityTypes
+
+
+class OutboundBuffer(Middleware):
+    # Turn state keys
+    _BUFFER = "OutboundBuffer.buffer"
+    _FLUSHING = "OutboundBuffer.flushing"
+    # Fields of a merged message taken from both messages; the others must match
+    _MERGED_FIELDS = ("text", "speak", "input_hint")
+
+    def __init__(self, merge_text: bool = False):
+        self.merge_text = merge_text
+        self.turns = 0
+        self.flushes = 0
+        self.activities = 0
+
+    @property
+    def stats(self) -> dict:
+        return {"turns": self.turns, "flushes": self.flushes, "activities": self.activities}
+
+    async def on_turn(self, context: TurnContext, logic: Callable[[TurnContext], Awaitable]):
+        self.turns += 1
+        context.turn_state[self._BUFFER] = []
+        context.on_send_activities(self._on_send_activities)
+        try:
+            await logic()
+        finally:
+            # The messages of the error handler, sent after the middleware
+            # returned, go straight to the adapter.
+            await self.flush(context)
+            del context.turn_state[self._BUFFER]
+
+    async def _on_send_activities(
+        self, context: TurnContext, activities: List[Activity], next_send: Callable
+    ):
+        buffer = context.turn_state.get(self._BUFFER)
+        if buffer is None or context.turn_state.get(self._FLUSHING):
+            await next_send()
+            return
+
+        buffer.extend(activities)
+        # The turn context sends whatever is left in `activities` once the
+        # handlers returned.
+        activities.clear()
+        if buffer and buffer[-1].type == ActivityTypes.typing:
+            await self.flush(context)
+
+    async def flush(self, context: TurnContext):
+        """Send the buffered activities of the turn."""
+        buffer = context.turn_state.get(self._BUFFER)
+        if not buffer:
+            return
+        activities = self.merge(buffer) if self.merge_text else list(buffer)
+        buffer.clear()
+
+        self.flushes += 1
+        self.activities += len(activities)
+        context.turn_state[self._FLUSHING] = True
+        try:
+            await context.send_activities(activities)
+        finally:
+            context.turn_state[self._FLUSHING] = False
+
+    @staticmethod
+    def _is_plain_text(activity: Activity) -> bool:
+        return (
+            activity.type == ActivityTypes.message
+            and bool(activity.text)
+            and not activity.attachments
+            and not activity.suggested_actions
+            and not activity.channel_data
+            and not activity.entities
+            and activity.value is None
+            and not activity.attachment_layout
+        )
+
+    @classmethod
+    def _can_merge(cls, previous: Activity, activity: Activity) -> bool:
+        return (
+            cls._is_plain_text(previous)
+            and cls._is_plain_text(activity)
+            and all(
+                value == getattr(activity, name, None)
+                for name, value in vars(previous).items()
+                if name not in cls._MERGED_FIELDS
+            )
+        )
+
+    @classmethod
+    def merge(cls, activities: List[Activity]) -> List[Activity]:
+        """Consecutive plain text messages merged into one message, one paragraph each.
+
+        Only messages whose other fields (locale, summary, importance...) are
+        equal are merged; the merged message keeps them.
+        """
+        merged = []
+        for activity in activities:
+            previous = merged[-1] if merged else None
+            if previous is not None and cls._can_merge(previous, activity):
+                merged[-1] = copy(previous)
+                merged[-1].text = f"{previous.text}\n\n{activity.text}"
+                merged[-1].speak = " ".join(speak for speak in (previous.speak, activity.speak) if speak) or None
+                # The last message tells whether the bot waits for an answer
+                merged[-1].input_hint = activity.input_hint
+            else:
+                merged.append(activity)
+        return merged
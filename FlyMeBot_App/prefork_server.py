@@ -0,0 +1,106 @@
+"""Pre-fork multi-worker server.
+
+The application and everything it references (recognizer, dialogs, bot,
+card templates) is built once in the supervisor process. Workers are then
+forked from it and share these structures copy-on-write. Each worker listens
+on the same port with SO_REUSEPORT, so the kernel spreads connections
+between them. The supervisor restarts any worker that dies.
+"""
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Dict
+
+from aiohttp import web
+
+
+class PreforkServer:
+    def __init__(
+        self,
+        app: web.Application,
+        host: str,
+        port: int,
+        workers: int,
+        restart_delay: float = 1.0,
+    ):
+        if not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"):
+            raise RuntimeError("[PreforkServer]: fork and SO_REUSEPORT are required")
+
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.restart_delay = restart_delay
+        # pid -> (worker index, start time)
+        self._children: Dict[int, tuple] = {}
+        self._stopping = False
+
+    def run(self):
+        # Objects created so far are never collected in the workers: keeping the
+        # GC away from them avoids copying their pages on the first collection.
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        for index in range(self.workers):
+            self._spawn(index)
+        print(
+            f"[PreforkServer] {self.workers} workers listening on {self.host}:{self.port}",
+            file=sys.stderr,
+        )
+
+        while self._children:
+            pid, status = os.wait()
+            index, started = self._children.pop(pid, (None, None))
+            if index is None or self._stopping:
+                continue
+
+            print(
+                f"[PreforkServer] worker {index} (pid {pid}) exited with status {status}, restarting",
+                file=sys.stderr,
+            )
+            # Do not spin when a worker crashes at startup.
+            if time.monotonic() - started < self.restart_delay:
+                time.sleep(self.restart_delay)
+            if not self._stopping:
+                self._spawn(index)
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = (index, time.monotonic())
+            return
+
+        # Worker process
+        status = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            web.run_app(
+                self.app,
+                host=self.host,
+                port=self.port,
+                reuse_port=True,
+                print=None,
+            )
+        except BaseException:  # pylint: disable=broad-except
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)  # pylint: disable=protected-access
+
+    def _stop(self, signum, frame):  # pylint: disable=unused-argument
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
@@ -0,0 +1,16 @@
+"""Recognizers module.
+
+The LUIS recognizer (`recognizers.async_luis_recognizer`) is not imported
+here: the LUIS SDK is only loaded when LUIS is configured.
+"""
+
+from .caching_recognizer import CachingRecognizer, UtteranceRecognizer
+from .cascade_recognizer import CascadeRecognizer
+from .local_booking_recognizer import LocalBookingRecognizer
+
+__all__ = [
+    "CachingRecognizer",
+    "CascadeRecognizer",
+    "LocalBookingRecognizer",
+    "UtteranceRecognizer",
+]
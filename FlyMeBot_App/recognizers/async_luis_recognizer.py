@@ -0,0 +1,204 @@
+"""LUIS recognizer that never blocks the event loop."""
+import json
+
+import aiohttp
+from azure.cognitiveservices.language.luis.runtime.models import LuisResult
+from botbuilder.ai.luis import (
+    LuisApplication,
+    LuisPredictionOptions,
+    LuisRecognizer,
+)
+from botbuilder.ai.luis.luis_recognizer_internal import LuisRecognizerInternal
+from botbuilder.ai.luis.luis_recognizer_options_v2 import LuisRecognizerOptionsV2
+from botbuilder.ai.luis.luis_recognizer_v2 import LuisRecognizerV2
+from botbuilder.ai.luis.luis_util import LuisUtil
+from botbuilder.core import RecognizerResult, TurnContext
+
+from .caching_recognizer import UtteranceRecognizer
+
+
+class LuisClientSession:
+    """One pooled keep-alive aiohttp session shared by every LUIS call.
+
+    The session is created lazily, inside the running event loop, and must be
+    closed on shutdown with `close`.
+    """
+
+    def __init__(self, pool_size: int = 100, keepalive_timeout: float = 30.0):
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self._session: aiohttp.ClientSession = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size, keepalive_timeout=self.keepalive_timeout
+                ),
+                headers={"User-Agent": LuisUtil.get_user_agent()},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class LuisRecognizerResult(RecognizerResult):
+    """RecognizerResult with the LUIS response it was built from, for the trace."""
+
+    def __init__(self, luis_result: LuisResult, **kwargs):
+        super(LuisRecognizerResult, self).__init__(**kwargs)
+        self.luis_result = luis_result
+
+
+class AsyncLuisRecognizerV2(LuisRecognizerV2):
+    """LUIS v2 prediction call made with aiohttp instead of the blocking SDK client."""
+
+    # pylint: disable=super-init-not-called
+    def __init__(
+        self,
+        luis_application: LuisApplication,
+        luis_recognizer_options_v2: LuisRecognizerOptionsV2,
+        client_session: LuisClientSession,
+    ):
+        LuisRecognizerInternal.__init__(self, luis_application)
+        self.luis_recognizer_options_v2 = luis_recognizer_options_v2
+        self._application = luis_application
+        self._client_session = client_session
+        self._url = (
+            f"{luis_application.endpoint.rstrip('/')}/luis/v2.0/apps/"
+            f"{luis_application.application_id}"
+        )
+        self._headers = {
+            "Ocp-Apim-Subscription-Key": luis_application.endpoint_key,
+            "Accept": "application/json",
+            "Content-Type": "application/json; charset=utf-8",
+        }
+        self._params = self._query_parameters(luis_recognizer_options_v2)
+        self._timeout = aiohttp.ClientTimeout(
+            total=luis_recognizer_options_v2.timeout / 1000
+        )
+
+    @staticmethod
+    def _query_parameters(options: LuisRecognizerOptionsV2) -> dict:
+        params = {
+            "timezoneOffset": options.timezone_offset,
+            "verbose": options.include_all_intents,
+            "staging": options.staging,
+            "spellCheck": options.spell_check,
+            "bing-spell-check-subscription-key": options.bing_spell_check_subscription_key,
+            "log": options.log if options.log is not None else True,
+        }
+        return {
+            key: (str(value).lower() if isinstance(value, bool) else str(value))
+            for key, value in params.items()
+            if value is not None
+        }
+
+    async def predict(self, utterance: str) -> LuisResult:
+        """Query the LUIS endpoint, raising on HTTP errors and timeouts."""
+        async with self._client_session.session.post(
+            self._url,
+            params=self._params,
+            headers=self._headers,
+            data=json.dumps(utterance),
+            timeout=self._timeout,
+        ) as response:
+            response.raise_for_status()
+            body = await response.json()
+        return LuisResult.deserialize(body)
+
+    def build_result(self, utterance: str, luis_result: LuisResult) -> LuisRecognizerResult:
+        """The RecognizerResult of a prediction, as LuisRecognizerV2 builds it."""
+        recognizer_result = LuisRecognizerResult(
+            luis_result,
+            text=utterance,
+            altered_text=luis_result.altered_query,
+            intents=LuisUtil.get_intents(luis_result),
+            entities=LuisUtil.extract_entities_and_metadata(
+                luis_result.entities,
+                luis_result.composite_entities,
+                self.luis_recognizer_options_v2.include_instance_data
+                if self.luis_recognizer_options_v2.include_instance_data is not None
+                else True,
+            ),
+        )
+
+        LuisUtil.add_properties(luis_result, recognizer_result)
+        if self.luis_recognizer_options_v2.include_api_results:
+            recognizer_result.properties["luisResult"] = luis_result
+        return recognizer_result
+
+    async def emit_trace(self, turn_context: TurnContext, recognizer_result: LuisRecognizerResult):
+        await self._emit_trace_info(
+            turn_context,
+            recognizer_result.luis_result,
+            recognizer_result,
+            self.luis_recognizer_options_v2,
+        )
+
+    async def recognizer_internal(self, turn_context: TurnContext):
+        utterance: str = turn_context.activity.text if turn_context.activity is not None else None
+        recognizer_result = self.build_result(utterance, await self.predict(utterance))
+        await self.emit_trace(turn_context, recognizer_result)
+        return recognizer_result
+
+
+class AsyncLuisRecognizer(LuisRecognizer, UtteranceRecognizer):
+    """LuisRecognizer whose prediction calls share one pooled aiohttp session.
+
+    The result is built with the same botbuilder helpers as `LuisRecognizer`,
+    so `LuisHelper.execute_luis_query` consumes it unchanged. `predict` and
+    `report` split `recognize` for `CachingRecognizer`: the prediction of the
+    default options, then the trace and LuisResult event of a turn.
+    """
+
+    def __init__(
+        self,
+        application: LuisApplication,
+        prediction_options: LuisPredictionOptions = None,
+        client_session: LuisClientSession = None,
+    ):
+        super(AsyncLuisRecognizer, self).__init__(application, prediction_options)
+        self.client_session = client_session or LuisClientSession()
+        self._recognizer = self._build_async_recognizer(self._options)
+
+    def _build_async_recognizer(
+        self, luis_prediction_options: LuisPredictionOptions
+    ) -> AsyncLuisRecognizerV2:
+        recognizer_options = LuisRecognizerOptionsV2(
+            luis_prediction_options.bing_spell_check_subscription_key,
+            luis_prediction_options.include_all_intents,
+            luis_prediction_options.include_instance_data,
+            luis_prediction_options.log,
+            luis_prediction_options.spell_check,
+            luis_prediction_options.staging,
+            luis_prediction_options.timeout,
+            luis_prediction_options.timezone_offset,
+            self._include_api_results,
+            luis_prediction_options.telemetry_client,
+            luis_prediction_options.log_personal_information,
+        )
+        return AsyncLuisRecognizerV2(
+            self._application, recognizer_options, self.client_session
+        )
+
+    def _build_recognizer(self, luis_prediction_options: LuisPredictionOptions):
+        if luis_prediction_options is self._options:
+            return self._recognizer
+        return self._build_async_recognizer(luis_prediction_options)
+
+    async def predict(self, utterance: str) -> LuisRecognizerResult:
+        return self._recognizer.build_result(utterance, await self._recognizer.predict(utterance))
+
+    async def report(self, turn_context: TurnContext, recognizer_result: LuisRecognizerResult):
+        # As LuisRecognizer.recognize does once it has the result
+        await self._recognizer.emit_trace(turn_context, recognizer_result)
+        self.on_recognizer_result(recognizer_result, turn_context)
+
+    async def close(self):
+        await self.client_session.close()
+
@@ -0,0 +1,224 @@
+"""Utterance-level cache in front of a recognizer."""
+import asyncio
+import re
+import time
+from abc import abstractmethod
+from collections import OrderedDict
+from copy import copy
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from botbuilder.core import Recognizer, RecognizerResult, TurnContext
+from botbuilder.schema import ActivityTypes
+
+
+WORD = re.compile(r"\S+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Cache key of an utterance: case and spacing are not significant.
+
+    A text whose case folding changes its length ("Straße") is its own key:
+    entity offsets can only be mapped between texts of the same key when
+    each character folds to one character.
+    """
+    folded = text.casefold()
+    if len(folded) != len(text):
+        return text
+    return " ".join(folded.split())
+
+
+def normalized_positions(text: str) -> List[int]:
+    """Index in `text` of each character of `normalize_utterance(text)`."""
+    positions = []
+    for word in WORD.finditer(text):
+        if positions:
+            positions.append(word.start() - 1)
+        positions.extend(range(word.start(), word.end()))
+    return positions
+
+
+def end_of_day(timestamp: float) -> float:
+    day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+def has_datetime_entity(recognizer_result: RecognizerResult) -> bool:
+    """True when the result holds a date, which may be relative ("tomorrow")."""
+    entities = recognizer_result.entities or {}
+    return any(key.startswith("datetime") for key in entities if key != "$instance")
+
+
+def for_utterance(recognizer_result: RecognizerResult, text: str) -> RecognizerResult:
+    """The result of an utterance of the same key, with its text and offsets."""
+    if text == recognizer_result.text:
+        return recognizer_result
+    # Offset in the cached text -> index in the key -> offset in `text`
+    source = {
+        position: index for index, position in enumerate(normalized_positions(recognizer_result.text))
+    }
+    target = normalized_positions(text)
+
+    def move(instance: object) -> object:
+        try:
+            start = target[source[instance["startIndex"]]]
+            end = target[source[instance["endIndex"] - 1]] + 1
+        except (KeyError, IndexError, TypeError):
+            return instance
+        return dict(instance, startIndex=start, endIndex=end, text=text[start:end])
+
+    result = copy(recognizer_result)
+    result.text = text
+    result.entities = move_instances(recognizer_result.entities, move)
+    return result
+
+
+def move_instances(entities: Dict[str, object], move: Callable[[object], object]) -> Dict[str, object]:
+    """Entities with `move` applied to the instance data, composites included."""
+    if not entities:
+        return entities
+    moved = {}
+    for name, values in entities.items():
+        if name == "$instance":
+            moved[name] = {
+                key: [move(instance) for instance in instances] for key, instances in values.items()
+            }
+        elif isinstance(values, list):
+            moved[name] = [
+                move_instances(value, move) if isinstance(value, dict) and "$instance" in value else value
+                for value in values
+            ]
+        else:
+            moved[name] = values
+    return moved
+
+
+class UtteranceRecognizer(Recognizer):
+    """Recognizer whose result only depends on the text of the utterance.
+
+    `predict` runs without a turn, `report` sends the turn what recognizing
+    its utterance would have (trace, telemetry).
+    """
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        recognizer_result = await self.predict(turn_context.activity.text)
+        await self.report(turn_context, recognizer_result)
+        return recognizer_result
+
+    @abstractmethod
+    async def predict(self, utterance: str) -> RecognizerResult:
+        raise NotImplementedError()
+
+    async def report(self, turn_context: TurnContext, recognizer_result: RecognizerResult):
+        pass
+
+
+class CachingRecognizer(Recognizer):
+    """Serve repeated utterances from a bounded LRU cache with a TTL.
+
+    Identical utterances received while a prediction is pending share that
+    single call. It runs in its own task with the text of the utterance
+    only, so it completes even when the turn that started it is cancelled.
+    Each turn gets the result with its own text and entity offsets, and
+    reports it (trace, telemetry) itself.
+
+    Results holding a date expire at the end of the day since LUIS resolves
+    "tomorrow" against the current date. Cached results are shared between
+    turns with the same text and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        recognizer: UtteranceRecognizer,
+        max_size: int = 1024,
+        ttl: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        if recognizer is None:
+            raise TypeError("[CachingRecognizer]: recognizer is required")
+
+        self._recognizer = recognizer
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (expiry timestamp, RecognizerResult of the first utterance)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        activity = turn_context.activity
+        if (
+            activity is None
+            or activity.type != ActivityTypes.message
+            or not activity.text
+            or activity.text.isspace()
+        ):
+            return await self._recognizer.recognize(turn_context)
+
+        key = normalize_utterance(activity.text)
+
+        prediction = None
+        entry = self._entries.get(key)
+        if entry is not None:
+            expiry, prediction = entry
+            if expiry > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                prediction = None
+                del self._entries[key]
+
+        if prediction is None:
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                # Detached from the turn: cancelling one caller does not fail the others
+                pending = asyncio.ensure_future(self._predict(key, activity.text))
+                pending.add_done_callback(lambda task: task.cancelled() or task.exception())
+                self._pending[key] = pending
+            else:
+                self.coalesced += 1
+            prediction = await asyncio.shield(pending)
+
+        recognizer_result = for_utterance(prediction, activity.text)
+        await self._recognizer.report(turn_context, recognizer_result)
+        return recognizer_result
+
+    async def _predict(self, key: str, utterance: str) -> RecognizerResult:
+        try:
+            recognizer_result = await self._recognizer.predict(utterance)
+        finally:
+            del self._pending[key]
+        if recognizer_result is not None:
+            self._store(key, recognizer_result)
+        return recognizer_result
+
+    def _store(self, key: str, recognizer_result: RecognizerResult):
+        now = self._clock()
+        expiry = now + self.ttl
+        if has_datetime_entity(recognizer_result):
+            expiry = min(expiry, end_of_day(now))
+
+        self._entries[key] = (expiry, recognizer_result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
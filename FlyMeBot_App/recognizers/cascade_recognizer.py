@@ -0,0 +1,59 @@
+"""Recognizer trying a cheap in-process tier before a remote one."""
+from typing import Dict, Iterable
+
+from botbuilder.core import Recognizer, RecognizerResult, TurnContext
+
+
+class CascadeRecognizer(Recognizer):
+    """Answer with the local tier when it is confident, otherwise call the fallback.
+
+    The local result is kept when its top intent score reaches `threshold`
+    and every entity of `required_entities` was found. The number of turns
+    answered by each tier is counted in `stats`.
+    """
+
+    def __init__(
+        self,
+        local: Recognizer,
+        fallback: Recognizer,
+        threshold: float = 0.6,
+        required_entities: Iterable[str] = ("or_city", "dst_city"),
+    ):
+        if local is None or fallback is None:
+            raise TypeError("[CascadeRecognizer]: local and fallback recognizers are required")
+
+        self._local = local
+        self._fallback = fallback
+        self.threshold = threshold
+        self.required_entities = tuple(required_entities)
+
+        self.local_turns = 0
+        self.fallback_turns = 0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        total = self.local_turns + self.fallback_turns
+        return {
+            "local": self.local_turns,
+            "fallback": self.fallback_turns,
+            "local_ratio": self.local_turns / total if total else 0.0,
+        }
+
+    def accepts(self, recognizer_result: RecognizerResult) -> bool:
+        if recognizer_result is None or not recognizer_result.intents:
+            return False
+
+        score = recognizer_result.get_top_scoring_intent().score
+        entities = recognizer_result.entities or {}
+        return score >= self.threshold and all(
+            entities.get(key) for key in self.required_entities
+        )
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        recognizer_result = await self._local.recognize(turn_context)
+        if self.accepts(recognizer_result):
+            self.local_turns += 1
+            return recognizer_result
+
+        self.fallback_turns += 1
+        return await self._fallback.recognize(turn_context)
@@ -0,0 +1,225 @@
+"""In-process recognizer for trivially parseable booking requests.
+
+The result has the shape of a LUIS result (`$instance` metadata, custom
+`or_city`/`dst_city`/`str_date`/`end_date`/`budget` entities and the prebuilt
+`geographyV2_city`/`datetime`/`number` entities) so `LuisHelper` builds the
+same `BookingDetails` from it.
+"""
+import re
+from datetime import date
+from typing import List, Tuple
+
+from botbuilder.core import IntentScore, Recognizer, RecognizerResult, TurnContext
+from botbuilder.schema import ActivityTypes
+
+from helpers.luis_helper import Intent
+
+CITIES = frozenset(
+    """
+    amsterdam athens atlanta auckland bangkok barcelona beijing berlin bogota
+    bordeaux boston brussels budapest cairo calgary cancun casablanca chicago
+    copenhagen dakar dallas delhi denver dubai dublin edinburgh frankfurt geneva
+    hamburg havana helsinki honolulu istanbul jakarta johannesburg kiev kyiv
+    lagos lille lima lisbon london lyon madrid manila marrakech marseille
+    melbourne mexico miami milan montreal moscow mumbai munich nairobi nantes
+    naples nice oslo ottawa paris prague pyongyang quebec reykjavik rome
+    santiago seattle seoul shanghai singapore stockholm strasbourg sydney taipei
+    tchernobyl tokyo toronto toulouse tunis vancouver venice vienna warsaw
+    washington zurich
+    """.split()
+) | frozenset(
+    {
+        "buenos aires",
+        "cape town",
+        "hong kong",
+        "la paz",
+        "las vegas",
+        "los angeles",
+        "new york",
+        "rio de janeiro",
+        "san francisco",
+        "sao paulo",
+    }
+)
+
+ORIGIN_CUES = frozenset({"from", "leaving", "departing", "out of"})
+DESTINATION_CUES = frozenset({"to", "for", "towards", "into", "reach", "visit"})
+START_CUES = frozenset({"on", "from", "leaving", "departing", "starting"})
+END_CUES = frozenset({"until", "till", "to", "return", "returning", "back", "and"})
+BOOKING_CUES = re.compile(r"\b(book|booking|flight|flights|fly|flying|travel|trip|ticket|go)\b")
+
+# Anything the local tier cannot resolve itself is left to LUIS.
+UNSUPPORTED = re.compile(
+    r"\b(not|don't|dont|never|cancel|quit|help|today|tomorrow|yesterday|tonight|next|"
+    r"last|this|week|weekend|month|year|monday|tuesday|wednesday|thursday|friday|"
+    r"saturday|sunday|january|february|march|april|may|june|july|august|september|"
+    r"october|november|december|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)\b"
+)
+
+WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+AMOUNT = re.compile(
+    r"(?:[€$£]\s*(?P<prefixed>\d+(?:[.,]\d+)?))"
+    r"|(?:(?P<amount>\d+(?:[.,]\d+)?)\s*(?:€|\$|£|(?:euros?|eur|dollars?|usd|pounds?|gbp)\b))"
+)
+NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+# Span of the utterance: (start index, end index (exclusive), text)
+Span = Tuple[int, int, str]
+
+
+def _number(text: str):
+    value = float(text.replace(",", "."))
+    return int(value) if value.is_integer() else value
+
+
+class LocalBookingRecognizer(Recognizer):
+    """Regex, city gazetteer, ISO date and amount extraction.
+
+    The BookFlight score is the confidence of the extraction: a booking cue
+    and each recognized slot raise it. Utterances holding something this tier
+    cannot resolve (negations, relative or spelled dates, unparsed numbers)
+    score 0.
+    """
+
+    SLOT_WEIGHT = 0.12
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        activity = turn_context.activity
+        if activity is None or activity.type != ActivityTypes.message:
+            return None
+        return self.parse(activity.text or "")
+
+    def parse(self, text: str) -> RecognizerResult:
+        lowered = text.lower()
+        if UNSUPPORTED.search(lowered):
+            return self._result(text, 0.0, {})
+
+        words = [(match.start(), match.end(), match.group()) for match in WORD.finditer(lowered)]
+        entities = {}
+
+        cities = self._cities(words)
+        origin, destination = self._assign(words, cities, ORIGIN_CUES, DESTINATION_CUES)
+        if origin:
+            self._add(entities, "or_city", "geographyV2_city", origin, origin[2])
+        if destination:
+            self._add(entities, "dst_city", "geographyV2_city", destination, destination[2])
+
+        dates = [
+            (match.start(), match.end(), match.group())
+            for match in ISO_DATE.finditer(lowered)
+            if self._is_valid_date(match)
+        ]
+        start_date, end_date = self._assign(words, dates, START_CUES, END_CUES)
+        for key, span in (("str_date", start_date), ("end_date", end_date)):
+            if span:
+                self._add(entities, key, "datetime", span, {"type": "date", "timex": [span[2]]})
+
+        consumed = list(dates)
+        amount = AMOUNT.search(lowered)
+        if amount:
+            number_text = amount.group("prefixed") or amount.group("amount")
+            number_start = lowered.index(number_text, amount.start())
+            number_span = (number_start, number_start + len(number_text), number_text)
+            budget_span = (amount.start(), amount.end(), text[amount.start():amount.end()])
+            self._add(entities, "budget", None, budget_span, budget_span[2])
+            self._add_prebuilt(entities, "number", number_span, _number(number_text))
+            consumed.append(budget_span)
+
+        # A number that is neither a date nor an amount may be a date the
+        # local tier does not understand ("05/01/2023"): let LUIS decide.
+        for match in NUMBER.finditer(lowered):
+            if not any(start <= match.start() < end for start, end, _ in consumed):
+                return self._result(text, 0.0, {})
+
+        slots = sum(1 for key in ("or_city", "dst_city", "str_date", "end_date", "budget") if key in entities)
+        cue = BOOKING_CUES.search(lowered) is not None or bool(origin and destination)
+        score = min(1.0, (0.4 if cue else 0.0) + self.SLOT_WEIGHT * slots) if slots or cue else 0.0
+
+        return self._result(text, score, entities)
+
+    @staticmethod
+    def _result(text: str, score: float, entities: dict) -> RecognizerResult:
+        return RecognizerResult(
+            text=text,
+            intents={Intent.BOOK_FLIGHT.value: IntentScore(score)},
+            entities=entities,
+        )
+
+    @staticmethod
+    def _is_valid_date(match) -> bool:
+        try:
+            date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def _cities(words: List[Span]) -> List[Span]:
+        cities = []
+        index = 0
+        while index < len(words):
+            for size in (3, 2, 1):
+                chunk = words[index:index + size]
+                if len(chunk) < size:
+                    continue
+                name = " ".join(word for _, _, word in chunk)
+                if name in CITIES:
+                    cities.append((chunk[0][0], chunk[-1][1], name))
+                    index += size
+                    break
+            else:
+                index += 1
+        return cities
+
+    @staticmethod
+    def _cue_before(words: List[Span], span: Span) -> str:
+        preceding = [word for start, _, word in words if start < span[0]]
+        if len(preceding) >= 2 and " ".join(preceding[-2:]) in ORIGIN_CUES:
+            return " ".join(preceding[-2:])
+        return preceding[-1] if preceding else ""
+
+    @staticmethod
+    def _assign(words: List[Span], spans: List[Span], first_cues, second_cues):
+        """Split spans between a first (origin, start) and second role (destination, end).
+
+        The word preceding a span decides its role; spans without a cue are
+        assigned in reading order.
+        """
+        first = second = None
+        unassigned = []
+        for span in spans:
+            cue = LocalBookingRecognizer._cue_before(words, span)
+            if cue in first_cues and first is None:
+                first = span
+            elif cue in second_cues and second is None:
+                second = span
+            else:
+                unassigned.append(span)
+
+        for span in unassigned:
+            if first is None:
+                first = span
+            elif second is None:
+                second = span
+        return first, second
+
+    @staticmethod
+    def _add(entities: dict, key: str, prebuilt: str, span: Span, value):
+        start, end, text = span
+        instances = entities.setdefault("$instance", {})
+        instances.setdefault(key, []).append(
+            {"startIndex": start, "endIndex": end, "text": text, "type": key, "score": 1.0}
+        )
+        entities.setdefault(key, []).append(text)
+        if prebuilt:
+            LocalBookingRecognizer._add_prebuilt(entities, prebuilt, span, value)
+
+    @staticmethod
+    def _add_prebuilt(entities: dict, prebuilt: str, span: Span, value):
+        start, end, text = span
+        instances = entities.setdefault("$instance", {})
+        instances.setdefault(prebuilt, []).append(
+            {"startIndex": start, "endIndex": end, "text": text, "type": prebuilt}
+        )
+        entities.setdefault(prebuilt, []).append(value)
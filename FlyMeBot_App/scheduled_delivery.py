@@ -0,0 +1,191 @@
+"""Scheduled delivery of the activities that follow a `delay` activity.
+
+Adapters handle a `delay` activity by sleeping inside the turn, which keeps
+the inbound request (and its connection to the channel) open for the whole
+delay. This middleware takes the delays out of the turn instead: from the
+first `delay` activity of a turn on, the activities are queued and sent
+later as proactive messages, through `continue_conversation`.
+
+The activities of a conversation are delivered in the order they were sent:
+while some are pending, the later ones (of the same or following turns) are
+queued behind them. Each conversation with pending activities has one timer;
+above `max_conversations` of them new delays are dropped and the activities
+sent in the turn, so bursts degrade to immediate replies rather than an
+unbounded queue. Pending activities live in the process memory: with several
+workers, a conversation is only ordered within the worker that queued it.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Set, Tuple
+
+from botbuilder.core import BotAdapter, Middleware, TurnContext
+from botbuilder.schema import Activity, DeliveryModes
+
+logger = logging.getLogger(__name__)
+
+# Not part of `ActivityTypes`: adapters sleep `value` milliseconds
+DELAY = "delay"
+
+
+class ScheduledDelivery(Middleware):
+    # Turn state keys
+    _DELAY = "ScheduledDelivery.delay"
+    _DELIVERING = "ScheduledDelivery.delivering"
+
+    def __init__(self, adapter: BotAdapter, bot_id: str = None, max_conversations: int = 1000):
+        self.adapter = adapter
+        self.bot_id = bot_id
+        self.max_conversations = max_conversations
+        # conversation -> (seconds to wait after the previous activity, activity)
+        self._queues: Dict[str, Deque[Tuple[float, Activity]]] = {}
+        # conversation -> (reference, claims identity, oauth scope) of the last turn
+        self._references: Dict[str, tuple] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+        self._drained: List[asyncio.Future] = []
+        self.scheduled = 0
+        self.delivered = 0
+        self.failed = 0
+        self.refused = 0
+
+    @staticmethod
+    def _key(activity: Activity) -> str:
+        return f"{activity.channel_id}/{activity.conversation.id}"
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "pending_conversations": len(self._queues),
+            "pending_activities": sum(len(queue) for queue in self._queues.values()),
+            "scheduled": self.scheduled,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "refused": self.refused,
+        }
+
+    async def on_turn(self, context: TurnContext, logic: Callable[[TurnContext], Awaitable]):
+        context.on_send_activities(self._on_send_activities)
+        await logic()
+
+    async def _on_send_activities(
+        self, context: TurnContext, activities: List[Activity], next_send: Callable
+    ):
+        # Expected replies are returned in the HTTP response: nothing can be sent later
+        if context.turn_state.get(self._DELIVERING) or (
+            context.activity.delivery_mode == DeliveryModes.expect_replies
+        ):
+            await next_send()
+            return
+
+        key = self._key(context.activity)
+        delay = context.turn_state.get(self._DELAY)
+        if delay is None and key not in self._queues and all(
+            activity.type != DELAY for activity in activities
+        ):
+            await next_send()
+            return
+
+        immediate = []
+        for activity in activities:
+            if activity.type == DELAY:
+                delay = (delay or 0.0) + (activity.value or 0) / 1000
+            elif delay is None and key not in self._queues:
+                immediate.append(activity)
+            elif self._schedule(context, key, activity, delay or 0.0):
+                delay = 0.0
+            else:
+                # Too many conversations waiting: the delay is dropped
+                immediate.append(activity)
+                delay = None
+        context.turn_state[self._DELAY] = delay
+
+        # The turn context sends whatever is left in `activities` once the
+        # handlers returned: the queued ones are removed from it.
+        activities[:] = immediate
+        if immediate:
+            await next_send()
+
+    def _schedule(self, context: TurnContext, key: str, activity: Activity, delay: float) -> bool:
+        queue = self._queues.get(key)
+        if queue is None:
+            if len(self._queues) >= self.max_conversations:
+                self.refused += 1
+                return False
+            queue = self._queues[key] = deque()
+            self._arm(key, delay)
+        self._references[key] = (
+            TurnContext.get_conversation_reference(context.activity),
+            context.turn_state.get(BotAdapter.BOT_IDENTITY_KEY),
+            context.turn_state.get(BotAdapter.BOT_OAUTH_SCOPE_KEY),
+        )
+        queue.append((delay, activity))
+        self.scheduled += 1
+        return True
+
+    def _arm(self, key: str, delay: float):
+        loop = asyncio.get_event_loop()
+        self._timers[key] = loop.call_later(delay, self._start_delivery, key)
+
+    def _start_delivery(self, key: str):
+        del self._timers[key]
+        task = asyncio.ensure_future(self._deliver(key))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, key: str):
+        queue = self._queues[key]
+        # The activities due together are sent in one proactive turn
+        batch = [queue.popleft()[1]]
+        while queue and queue[0][0] <= 0:
+            batch.append(queue.popleft()[1])
+        reference, claims_identity, audience = self._references[key]
+
+        async def send(turn_context: TurnContext):
+            turn_context.turn_state[self._DELIVERING] = True
+            await turn_context.send_activities(batch)
+
+        try:
+            await self.adapter.continue_conversation(
+                reference, send, self.bot_id, claims_identity, audience
+            )
+            self.delivered += len(batch)
+        except Exception:  # pylint: disable=broad-except
+            self.failed += len(batch)
+            logger.exception("Scheduled delivery to %s failed", key)
+
+        if queue:
+            self._arm(key, queue[0][0])
+        else:
+            del self._queues[key]
+            del self._references[key]
+            if not self._queues:
+                self._notify_drained()
+
+    def _notify_drained(self):
+        for drained in self._drained:
+            if not drained.done():
+                drained.set_result(None)
+        self._drained.clear()
+
+    async def join(self):
+        """Wait until every pending activity was delivered."""
+        if self._queues:
+            drained = asyncio.get_event_loop().create_future()
+            self._drained.append(drained)
+            await drained
+
+    async def close(self):
+        """Drop the pending activities and cancel the deliveries in progress."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*list(self._deliveries), return_exceptions=True)
+        dropped = sum(len(queue) for queue in self._queues.values())
+        if dropped:
+            logger.warning("%d scheduled activities dropped at shutdown", dropped)
+        self._queues.clear()
+        self._references.clear()
+        self._notify_drained()
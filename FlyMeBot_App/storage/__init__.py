@@ -0,0 +1,39 @@
+"""Storage module."""
+from botbuilder.core import MemoryStorage, Storage
+
+from config import DefaultConfig
+from .evicting_storage import EvictingStorage
+from .sqlite_storage import SqliteStorage
+from .state_codec import StateCodec
+from .state_tracking import (
+    StateTracker,
+    TrackedConversationState,
+    TrackedUserState,
+)
+
+
+def create_storage(configuration: DefaultConfig) -> Storage:
+    """Build the storage selected by `DefaultConfig.STORAGE`."""
+    codec = StateCodec(configuration.STATE_COMPRESS_THRESHOLD)
+    if configuration.STORAGE == "memory":
+        return EvictingStorage(
+            MemoryStorage(),
+            idle_ttl=configuration.STATE_IDLE_TTL,
+            max_entries=configuration.STATE_MAX_ENTRIES,
+            max_bytes=configuration.STATE_MAX_BYTES,
+            codec=codec,
+        )
+    if configuration.STORAGE == "sqlite":
+        return SqliteStorage(configuration.STORAGE_PATH, codec=codec)
+    raise ValueError(f'"{configuration.STORAGE}" is not a supported storage.')
+
+
+__all__ = [
+    "EvictingStorage",
+    "SqliteStorage",
+    "StateCodec",
+    "StateTracker",
+    "TrackedConversationState",
+    "TrackedUserState",
+    "create_storage",
+]
@@ -0,0 +1,136 @@
+"""Storage wrapper that forgets idle conversations."""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List
+
+from botbuilder.core import Storage, StoreItem
+
+from .state_codec import StateCodec
+
+
+class EvictingStorage(Storage):
+    """Delete the items of the wrapped storage that are idle or over budget.
+
+    Each key read or written is tracked with its last access time and its
+    encoded size. Keys idle for more than `idle_ttl` seconds are deleted, then
+    the least recently used ones while the tracked keys exceed `max_entries`
+    or `max_bytes`. A limit of None (or 0) is not enforced. Eviction runs on
+    each access; the keys of the current call are only evicted when idle.
+
+    Sizes are only measured under a byte budget, which encodes each written
+    item with `codec`; `max_entries` bounds the memory without that cost.
+
+    An evicted conversation is read back as missing, so its next turn starts
+    the main dialog again.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        idle_ttl: float = None,
+        max_entries: int = None,
+        max_bytes: int = None,
+        codec: StateCodec = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super(EvictingStorage, self).__init__()
+        if storage is None:
+            raise TypeError("[EvictingStorage]: storage is required")
+
+        self._storage = storage
+        self.idle_ttl = idle_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.codec = codec or StateCodec()
+        self._clock = clock
+        # key -> (last access, size in bytes), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.bytes = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        stats = {"entries": len(self._entries), "evictions": self.evictions}
+        # Items are only sized against a byte budget
+        if self.max_bytes:
+            stats["bytes"] = self.bytes
+        return stats
+
+    async def read(self, keys: List[str]) -> Dict[str, object]:
+        now = self._clock()
+        await self._evict(now, protected=set(keys))
+
+        items = await self._storage.read(keys)
+        for key, item in items.items():
+            entry = self._entries.get(key)
+            size = entry[1] if entry is not None else self._size(item)
+            self._track(key, now, size)
+        return items
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+
+        sizes = {key: self._size(item) for key, item in changes.items()}
+        await self._storage.write(changes)
+
+        now = self._clock()
+        for key, size in sizes.items():
+            self._track(key, now, size)
+        await self._evict(now, protected=set(changes))
+
+    async def delete(self, keys: List[str]):
+        await self._storage.delete(keys)
+        self._untrack(keys)
+
+    def _size(self, item: StoreItem) -> int:
+        if not self.max_bytes:
+            return 0
+        return len(self.codec.encode(item))
+
+    def _track(self, key: str, now: float, size: int):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        self._entries[key] = (now, size)
+        self.bytes += size
+
+    def _untrack(self, keys: Iterable[str]):
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[1]
+
+    def _over_budget(self, aside: int = 0) -> bool:
+        return bool(
+            (self.max_entries and len(self._entries) + aside > self.max_entries)
+            or (self.max_bytes and self.bytes > self.max_bytes)
+        )
+
+    async def _evict(self, now: float, protected: set):
+        evicted = []
+        # Keys of the current call that are not idle, set aside until the end
+        aside = []
+        # Least recently used first: once a key is neither idle nor over
+        # budget, the following ones are not either.
+        while self._entries:
+            key, (last_access, _) = next(iter(self._entries.items()))
+            idle = self.idle_ttl and now - last_access > self.idle_ttl
+            if not idle:
+                if key in protected:
+                    aside.append((key, self._entries.pop(key)))
+                    continue
+                if not self._over_budget(len(aside)):
+                    break
+            self._untrack([key])
+            evicted.append(key)
+
+        # Back at the head, in their order
+        for key, entry in reversed(aside):
+            self._entries[key] = entry
+            self._entries.move_to_end(key, last=False)
+
+        if evicted:
+            self.evictions += len(evicted)
+            await self._storage.delete(evicted)
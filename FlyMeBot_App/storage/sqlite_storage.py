@@ -0,0 +1,202 @@
+"""Bot state storage persisted in a local SQLite database."""
+import asyncio
+import os
+import sqlite3
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from botbuilder.core import Storage, StoreItem
+
+from .state_codec import StateCodec
+
+
+def _get_e_tag(item: object) -> str:
+    if isinstance(item, dict):
+        return item.get("e_tag")
+    return getattr(item, "e_tag", None)
+
+
+def _set_e_tag(item: object, e_tag: str):
+    if isinstance(item, dict):
+        item["e_tag"] = e_tag
+    elif hasattr(item, "e_tag"):
+        item.e_tag = e_tag
+
+
+# Storages not closed yet, reopened in each forked worker
+_OPEN_STORAGES: "weakref.WeakSet[SqliteStorage]" = weakref.WeakSet()
+
+
+def _reopen_after_fork():
+    for storage in list(_OPEN_STORAGES):
+        storage._open()  # pylint: disable=protected-access
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+
+class SqliteStorage(Storage):
+    """Storage shared by every worker of the host through a SQLite file in WAL mode.
+
+    Items are stored with `StateCodec`. Concurrency is optimistic: an item
+    read with an e_tag can only be written back if nobody wrote it in
+    between, otherwise `write` raises a KeyError like `MemoryStorage` does.
+    An item without e_tag, or with "*", overwrites the stored one.
+
+    The database is only accessed from one background thread so the event loop
+    never waits on disk. Writes issued while a previous write is running are
+    committed together in a single transaction. A forked worker opens its own
+    connection and thread for each storage not closed before the fork.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, codec: StateCodec = None):
+        super(SqliteStorage, self).__init__()
+        self.path = path
+        self.timeout = timeout
+        self.codec = codec or StateCodec()
+        self._open()
+        _OPEN_STORAGES.add(self)
+
+    def _open(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-storage")
+        self._connection: sqlite3.Connection = None
+        self._pending: List[Tuple[Dict[str, StoreItem], asyncio.Future]] = []
+        self._flushing = False
+
+        self._executor.submit(self._connect).result()
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "key TEXT PRIMARY KEY, e_tag INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def read(self, keys: List[str]) -> Dict[str, object]:
+        if not keys:
+            return {}
+        return await self._run(self._read, list(keys))
+
+    def _read(self, keys: List[str]) -> Dict[str, object]:
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connection.execute(
+            f"SELECT key, e_tag, data FROM state WHERE key IN ({placeholders})", keys
+        ).fetchall()
+
+        data = {}
+        for key, e_tag, encoded in rows:
+            item = self.codec.decode(encoded)
+            _set_e_tag(item, str(e_tag))
+            data[key] = item
+        return data
+
+    async def write(self, changes: Dict[str, StoreItem]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+        if not changes:
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((changes, future))
+        if not self._flushing:
+            self._flushing = True
+            asyncio.ensure_future(self._flush())
+
+        e_tags = await future
+        # The items now match the stored version and can be written again.
+        for key, e_tag in e_tags.items():
+            _set_e_tag(changes[key], e_tag)
+
+    async def _flush(self):
+        try:
+            while self._pending:
+                batches, self._pending = self._pending, []
+                try:
+                    results = await self._run(
+                        self._write_batches, [changes for changes, _ in batches]
+                    )
+                except Exception as error:  # pylint: disable=broad-except
+                    results = [error] * len(batches)
+
+                for (_, future), result in zip(batches, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        finally:
+            self._flushing = False
+
+    def _write_batches(self, batches: List[Dict[str, StoreItem]]) -> list:
+        """Write every batch in one transaction; a conflicting batch alone is rolled back."""
+        results = []
+        cursor = self._connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for index, changes in enumerate(batches):
+                cursor.execute(f"SAVEPOINT batch{index}")
+                try:
+                    results.append(self._write_rows(cursor, changes))
+                    cursor.execute(f"RELEASE batch{index}")
+                except sqlite3.Error:
+                    raise
+                except Exception as error:  # pylint: disable=broad-except
+                    cursor.execute(f"ROLLBACK TO batch{index}")
+                    cursor.execute(f"RELEASE batch{index}")
+                    results.append(error)
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        return results
+
+    def _write_rows(self, cursor: sqlite3.Cursor, changes: Dict[str, StoreItem]) -> Dict[str, str]:
+        e_tags = {}
+        for key, item in changes.items():
+            e_tag = _get_e_tag(item)
+            if e_tag == "":
+                raise Exception("sqlite_storage.write(): etag missing")
+
+            encoded = self.codec.encode(item)
+            row = cursor.execute("SELECT e_tag FROM state WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                cursor.execute("INSERT INTO state (key, e_tag, data) VALUES (?, 1, ?)", (key, encoded))
+                e_tags[key] = "1"
+                continue
+
+            current = str(row[0])
+            if e_tag is not None and e_tag != "*" and e_tag != current:
+                raise KeyError(
+                    "Etag conflict.\nOriginal: %s\r\nCurrent: %s" % (e_tag, current)
+                )
+            cursor.execute(
+                "UPDATE state SET e_tag = e_tag + 1, data = ? WHERE key = ?", (encoded, key)
+            )
+            e_tags[key] = str(row[0] + 1)
+        return e_tags
+
+    async def delete(self, keys: List[str]):
+        keys = list(keys)
+        if keys:
+            await self._run(self._delete, keys)
+
+    def _delete(self, keys: List[str]):
+        placeholders = ",".join("?" * len(keys))
+        self._connection.execute(f"DELETE FROM state WHERE key IN ({placeholders})", keys)
+
+    def close(self):
+        _OPEN_STORAGES.discard(self)
+
+        def close_connection():
+            self._connection.close()
+
+        self._executor.submit(close_connection).result()
+        self._executor.shutdown()
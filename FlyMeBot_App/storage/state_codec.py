@@ -0,0 +1,244 @@
+"""Compact binary encoding of the bot state."""
+import importlib
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Dict, List, Tuple
+
+import msgpack
+from botbuilder.dialogs import DialogInstance, DialogState
+from botbuilder.dialogs.choices import Choice
+from botbuilder.dialogs.prompts import PromptOptions
+from botbuilder.schema import (
+    Activity,
+    Attachment,
+    CardAction,
+    ChannelAccount,
+    ConversationAccount,
+)
+
+from booking_details import BookingDetails
+
+# Classes encoded with a number instead of their name, and their attributes
+# by position instead of by name. The numbers and the field orders are
+# stored: only append here. An instance whose attributes differ from its
+# fields (a newer SDK adding one, for example) is encoded by name.
+REGISTERED_CLASSES: List[Tuple[type, Tuple[str, ...]]] = [
+    (DialogState, ("_dialog_stack",)),
+    (DialogInstance, ("id", "state")),
+    (BookingDetails, BookingDetails.__slots__),
+    (PromptOptions, ("prompt", "retry_prompt", "choices", "style", "validations", "number_of_attempts")),
+    (Choice, ("value", "action", "synonyms")),
+    # msrest models: `additional_properties` then their `_attribute_map` in botbuilder-schema 4.13
+    (
+        Activity,
+        (
+            "additional_properties",
+            "type",
+            "id",
+            "timestamp",
+            "local_timestamp",
+            "local_timezone",
+            "service_url",
+            "channel_id",
+            "from_property",
+            "conversation",
+            "recipient",
+            "text_format",
+            "attachment_layout",
+            "members_added",
+            "members_removed",
+            "reactions_added",
+            "reactions_removed",
+            "topic_name",
+            "history_disclosed",
+            "locale",
+            "text",
+            "speak",
+            "input_hint",
+            "summary",
+            "suggested_actions",
+            "attachments",
+            "entities",
+            "channel_data",
+            "action",
+            "reply_to_id",
+            "label",
+            "value_type",
+            "value",
+            "name",
+            "relates_to",
+            "code",
+            "expiration",
+            "importance",
+            "delivery_mode",
+            "listen_for",
+            "text_highlights",
+            "semantic_action",
+            "caller_id",
+        ),
+    ),
+    (ChannelAccount, ("additional_properties", "id", "name", "aad_object_id", "role")),
+    (
+        ConversationAccount,
+        (
+            "additional_properties",
+            "is_group",
+            "conversation_type",
+            "id",
+            "name",
+            "aad_object_id",
+            "role",
+            "tenant_id",
+            "properties",
+        ),
+    ),
+    (Attachment, ("additional_properties", "content_type", "content_url", "content", "name", "thumbnail_url")),
+    (
+        CardAction,
+        (
+            "additional_properties",
+            "type",
+            "title",
+            "image",
+            "text",
+            "display_text",
+            "value",
+            "channel_data",
+            "image_alt_text",
+        ),
+    ),
+]
+
+# Extension types
+_OBJECT = 1
+_ENUM = 2
+_DATETIME = 3
+_DATE = 4
+_TUPLE = 5
+_SET = 6
+
+# First byte of an encoded state
+_RAW = b"\x00"
+_COMPRESSED = b"\x01"
+
+
+class StateCodec:
+    """Encode state bags with msgpack, and zlib above `compress_threshold` bytes.
+
+    Objects are stored as their class and attributes, like jsonpickle does,
+    without repeating the attribute names of the registered classes. Encoded
+    states above the threshold are compressed: the dialog ids and step names
+    repeated along the dialog stack compress well. A threshold of None
+    disables compression.
+    """
+
+    def __init__(self, compress_threshold: int = 512, compress_level: int = 1):
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+        self._class_ids: Dict[type, int] = {}
+        self._classes: Dict[object, Tuple[type, Tuple[str, ...]]] = {}
+        for class_id, (cls, fields) in enumerate(REGISTERED_CLASSES):
+            self._class_ids[cls] = class_id
+            self._classes[class_id] = (cls, fields)
+
+    def encode(self, state: object) -> bytes:
+        data = self._pack(state)
+        if self.compress_threshold is not None and len(data) > self.compress_threshold:
+            return _COMPRESSED + zlib.compress(data, self.compress_level)
+        return _RAW + data
+
+    def decode(self, data: bytes) -> object:
+        header, body = data[:1], data[1:]
+        if header == _COMPRESSED:
+            body = zlib.decompress(body)
+        elif header != _RAW:
+            raise ValueError("[StateCodec]: unknown state header %r" % header)
+        return self._unpack(body)
+
+    def _pack(self, value: object) -> bytes:
+        # Strict types so that str enums and tuples reach `_default`
+        return msgpack.packb(value, default=self._default, use_bin_type=True, strict_types=True)
+
+    def _unpack(self, data: bytes) -> object:
+        return msgpack.unpackb(
+            data, ext_hook=self._ext_hook, raw=False, strict_map_key=False
+        )
+
+    def _default(self, value: object) -> msgpack.ExtType:
+        if isinstance(value, Enum):
+            return msgpack.ExtType(_ENUM, self._pack([self._class_ref(type(value)), value.value]))
+        if isinstance(value, datetime):
+            return msgpack.ExtType(_DATETIME, value.isoformat().encode())
+        if isinstance(value, date):
+            return msgpack.ExtType(_DATE, value.isoformat().encode())
+        if isinstance(value, tuple):
+            return msgpack.ExtType(_TUPLE, self._pack(list(value)))
+        if isinstance(value, (set, frozenset)):
+            return msgpack.ExtType(_SET, self._pack(list(value)))
+        for base in (dict, list, str, bytes, int, float):
+            if isinstance(value, base):
+                return base(value)
+
+        cls = type(value)
+        attributes = self._attributes(value)
+        class_id = self._class_ids.get(cls)
+        if class_id is not None:
+            fields = self._classes[class_id][1]
+            if attributes.keys() == set(fields):
+                values = [attributes[name] for name in fields]
+                return msgpack.ExtType(_OBJECT, self._pack([class_id, values]))
+        return msgpack.ExtType(_OBJECT, self._pack([self._class_ref(cls), attributes]))
+
+    @staticmethod
+    def _attributes(value: object) -> dict:
+        attributes = dict(getattr(value, "__dict__", ()))
+        for cls in type(value).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(value, name):
+                    attributes[name] = getattr(value, name)
+        if not attributes and not hasattr(value, "__dict__"):
+            raise TypeError("[StateCodec]: cannot encode %r" % (value,))
+        return attributes
+
+    def _class_ref(self, cls: type) -> object:
+        class_id = self._class_ids.get(cls)
+        if class_id is not None:
+            return class_id
+        return "%s:%s" % (cls.__module__, cls.__qualname__)
+
+    def _resolve(self, class_ref: object) -> type:
+        if class_ref not in self._classes:
+            module_name, qualname = class_ref.split(":")
+            cls = importlib.import_module(module_name)
+            for name in qualname.split("."):
+                cls = getattr(cls, name)
+            self._classes[class_ref] = (cls, ())
+        return self._classes[class_ref][0]
+
+    def _ext_hook(self, code: int, data: bytes) -> object:
+        if code == _DATETIME:
+            return datetime.fromisoformat(data.decode())
+        if code == _DATE:
+            return date.fromisoformat(data.decode())
+
+        value = self._unpack(data)
+        if code == _TUPLE:
+            return tuple(value)
+        if code == _SET:
+            return set(value)
+        if code == _ENUM:
+            return self._resolve(value[0])(value[1])
+        if code == _OBJECT:
+            class_ref, attributes = value
+            cls = self._resolve(class_ref)
+            if isinstance(attributes, list):
+                attributes = zip(self._classes[class_ref][1], attributes)
+            else:
+                attributes = attributes.items()
+            instance = cls.__new__(cls)
+            for name, attribute in attributes:
+                object.__setattr__(instance, name, attribute)
+            return instance
+        return msgpack.ExtType(code, data)
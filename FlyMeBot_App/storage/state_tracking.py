@@ -0,0 +1,104 @@
+"""Change tracking of the bot state bags, to only write the ones a turn changed."""
+import hashlib
+import pickle
+from collections import defaultdict
+from typing import Dict, List
+
+from botbuilder.core import BotState, ConversationState, TurnContext, UserState
+from botbuilder.core.bot_state import CachedBotState
+from jsonpickle.pickler import Pickler
+
+from telemetry import TRACER, traced
+
+
+def fingerprint(state: Dict[str, object]) -> str:
+    """Digest of a state bag, computed from its pickle.
+
+    Two equal bags can have different pickles (key order, shared references):
+    this only costs an unneeded write, never a lost one.
+    """
+    try:
+        data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        # Unpicklable values are flattened like the SDK does
+        data = str(Pickler().flatten(state)).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class FingerprintedBotState(CachedBotState):
+    """Cached state whose change detection uses `fingerprint`.
+
+    The SDK flattens the whole bag with jsonpickle when it is loaded and again
+    when it is saved; pickling it is several times cheaper.
+    """
+
+    def compute_hash(self, obj: object) -> str:
+        return fingerprint(obj)
+
+
+class TrackedStateMixin:
+    """Load the state bag in a `FingerprintedBotState`."""
+
+    async def load(self, turn_context: TurnContext, force: bool = False) -> None:
+        cached_state = self.get_cached_state(turn_context)
+        storage_key = self.get_storage_key(turn_context)
+
+        if force or not cached_state or not cached_state.state:
+            with TRACER.span(f"{type(self).__name__}.load"):
+                items = await self._storage.read([storage_key])
+            val = items.get(storage_key)
+            turn_context.turn_state[self._context_service_key] = FingerprintedBotState(val)
+
+
+class TrackedConversationState(TrackedStateMixin, ConversationState):
+    pass
+
+
+class TrackedUserState(TrackedStateMixin, UserState):
+    pass
+
+
+class StateTracker:
+    """Save the state bags changed during a turn.
+
+    A bag that was not loaded, or loaded and left unchanged, is not written.
+    The changed bags sharing a storage are written with a single
+    `Storage.write` call.
+    """
+
+    def __init__(self, *states: BotState):
+        self.states = states
+
+        self.skipped = 0
+        self.saved = 0
+        self.writes = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"skipped": self.skipped, "saved": self.saved, "writes": self.writes}
+
+    @traced()
+    async def save_changes(self, turn_context: TurnContext, force: bool = False):
+        # storage id -> (storage, changes, cached states)
+        groups: Dict[int, list] = defaultdict(lambda: [None, {}, []])
+        for state in self.states:
+            cached_state = state.get_cached_state(turn_context)
+            if cached_state is None or not (force or cached_state.is_changed):
+                self.skipped += 1
+                continue
+
+            storage = state._storage  # pylint: disable=protected-access
+            group = groups[id(storage)]
+            group[0] = storage
+            group[1][state.get_storage_key(turn_context)] = cached_state.state
+            group[2].append(cached_state)
+
+        for storage, changes, cached_states in groups.values():
+            await storage.write(changes)
+            self._written(cached_states)
+
+    def _written(self, cached_states: List[CachedBotState]):
+        self.writes += 1
+        for cached_state in cached_states:
+            cached_state.hash = cached_state.compute_hash(cached_state.state)
+            self.saved += 1
@@ -0,0 +1,90 @@
+"""Telemetry module."""
+from config import DefaultConfig
+from .client import PipelineTelemetryClient, TelemetryLogHandler, install_log_handler
+from .metrics import METRICS, LoopLagProbe, MetricsMiddleware, MetricsRegistry
+from .pipeline import TelemetryPipeline
+from .profiling import NOOP_PROFILE, PROFILER, ProcessSampler, ProfileRing, SlowTurnProfiler
+from .sinks import AppInsightsSink, JsonlFileSink, TelemetrySink
+from .tracing import (
+    TRACER,
+    ConsoleSpanExporter,
+    PipelineSpanExporter,
+    SpanExporter,
+    Tracer,
+    TracingMiddleware,
+    traced,
+)
+
+
+def create_pipeline(configuration: DefaultConfig) -> TelemetryPipeline:
+    """Build the pipeline with the sinks enabled in the configuration."""
+    sinks = []
+    if configuration.APPINSIGHTS_INSTRUMENTATION_KEY:
+        sinks.append(AppInsightsSink(configuration.APPINSIGHTS_INSTRUMENTATION_KEY))
+    if configuration.TELEMETRY_PATH:
+        sinks.append(
+            JsonlFileSink(
+                configuration.TELEMETRY_PATH,
+                max_bytes=configuration.TELEMETRY_MAX_BYTES,
+                backup_count=configuration.TELEMETRY_BACKUPS,
+            )
+        )
+    return TelemetryPipeline(
+        sinks,
+        max_queue=configuration.TELEMETRY_QUEUE_SIZE,
+        batch_size=configuration.TELEMETRY_BATCH_SIZE,
+        flush_interval=configuration.TELEMETRY_FLUSH_INTERVAL,
+    )
+
+
+def create_span_exporter(configuration: DefaultConfig) -> SpanExporter:
+    """Exporter selected by `DefaultConfig.TRACE_EXPORTER`, None when tracing is off."""
+    if configuration.TRACE_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    if configuration.TRACE_EXPORTER == "file":
+        return PipelineSpanExporter(
+            TelemetryPipeline(
+                [
+                    JsonlFileSink(
+                        configuration.TRACE_PATH,
+                        max_bytes=configuration.TELEMETRY_MAX_BYTES,
+                        backup_count=configuration.TELEMETRY_BACKUPS,
+                    )
+                ],
+                max_queue=configuration.TELEMETRY_QUEUE_SIZE,
+                batch_size=configuration.TELEMETRY_BATCH_SIZE,
+                flush_interval=configuration.TELEMETRY_FLUSH_INTERVAL,
+            )
+        )
+    if configuration.TRACE_EXPORTER:
+        raise ValueError(f'"{configuration.TRACE_EXPORTER}" is not a supported trace exporter.')
+    return None
+
+
+__all__ = [
+    "AppInsightsSink",
+    "ConsoleSpanExporter",
+    "JsonlFileSink",
+    "LoopLagProbe",
+    "METRICS",
+    "NOOP_PROFILE",
+    "MetricsMiddleware",
+    "MetricsRegistry",
+    "PipelineSpanExporter",
+    "PipelineTelemetryClient",
+    "PROFILER",
+    "ProcessSampler",
+    "ProfileRing",
+    "SlowTurnProfiler",
+    "SpanExporter",
+    "TRACER",
+    "TelemetryLogHandler",
+    "TelemetryPipeline",
+    "TelemetrySink",
+    "Tracer",
+    "TracingMiddleware",
+    "create_pipeline",
+    "create_span_exporter",
+    "install_log_handler",
+    "traced",
+]
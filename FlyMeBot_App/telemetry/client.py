@@ -0,0 +1,162 @@
+"""Bot telemetry client and log handler feeding a `TelemetryPipeline`."""
+import logging
+import time
+import traceback
+from typing import Dict
+
+from botbuilder.core import BotTelemetryClient, Severity
+from botbuilder.core.bot_telemetry_client import TelemetryDataPointType
+
+from .pipeline import TelemetryPipeline
+
+
+def _severity(severity) -> str:
+    return getattr(severity, "name", severity)
+
+
+class PipelineTelemetryClient(BotTelemetryClient):
+    """`BotTelemetryClient` queueing its events in the pipeline instead of sending them."""
+
+    def __init__(self, pipeline: TelemetryPipeline):
+        self.pipeline = pipeline
+
+    def _emit(self, kind: str, name: str, properties: Dict[str, object] = None, **fields):
+        event = {"time": time.time(), "type": kind, "name": name}
+        if properties:
+            event["properties"] = properties
+        event.update((key, value) for key, value in fields.items() if value is not None)
+        self.pipeline.emit(event)
+
+    def track_pageview(
+        self,
+        name: str,
+        url,
+        duration: int = 0,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        self._emit("pageview", name, properties, url=url, duration=duration, measurements=measurements)
+
+    def track_exception(
+        self,
+        exception_type: type = None,
+        value: Exception = None,
+        trace: traceback = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+    ) -> None:
+        if value is None:
+            return
+        self._emit(
+            "exception",
+            (exception_type or type(value)).__name__,
+            properties,
+            exception=value,
+            measurements=measurements,
+        )
+
+    def track_event(
+        self, name: str, properties: Dict[str, object] = None, measurements: Dict[str, object] = None
+    ) -> None:
+        self._emit("event", name, properties, measurements=measurements)
+
+    def track_metric(
+        self,
+        name: str,
+        value: float,
+        tel_type: TelemetryDataPointType = None,
+        count: int = None,
+        min_val: float = None,
+        max_val: float = None,
+        std_dev: float = None,
+        properties: Dict[str, object] = None,
+    ) -> None:
+        self._emit("metric", name, properties, value=value, count=count)
+
+    def track_trace(self, name, properties=None, severity: Severity = None):
+        self._emit("trace", name, properties, severity=_severity(severity))
+
+    def track_request(
+        self,
+        name: str,
+        url: str,
+        success: bool,
+        start_time: str = None,
+        duration: int = None,
+        response_code: str = None,
+        http_method: str = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+        request_id: str = None,
+    ):
+        self._emit(
+            "request",
+            name,
+            properties,
+            url=url,
+            success=success,
+            duration=duration,
+            response_code=response_code,
+            measurements=measurements,
+        )
+
+    def track_dependency(
+        self,
+        name: str,
+        data: str,
+        type_name: str = None,
+        target: str = None,
+        duration: int = None,
+        success: bool = None,
+        result_code: str = None,
+        properties: Dict[str, object] = None,
+        measurements: Dict[str, object] = None,
+        dependency_id: str = None,
+    ):
+        self._emit(
+            "dependency",
+            name,
+            properties,
+            data=data,
+            target=target,
+            duration=duration,
+            success=success,
+            measurements=measurements,
+        )
+
+    def flush(self):
+        # The pipeline writes on its own schedule: waiting here would block the turn
+        pass
+
+
+class TelemetryLogHandler(logging.Handler):
+    """Log records as trace events; `extra={"custom_dimensions": {...}}` gives their properties."""
+
+    def __init__(self, pipeline: TelemetryPipeline, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.pipeline = pipeline
+
+    def emit(self, record: logging.LogRecord):
+        event = {
+            "time": record.created,
+            "type": "trace",
+            "name": record.getMessage(),
+            "severity": record.levelname,
+            "logger": record.name,
+        }
+        properties = getattr(record, "custom_dimensions", None)
+        if properties:
+            event["properties"] = properties
+        self.pipeline.emit(event)
+
+
+def install_log_handler(pipeline: TelemetryPipeline, logger_name: str = "dialogs", level: int = logging.INFO):
+    """Send the records of a logger to the pipeline; a second call adds nothing."""
+    target = logging.getLogger(logger_name)
+    for handler in target.handlers:
+        if isinstance(handler, TelemetryLogHandler):
+            return handler
+    handler = TelemetryLogHandler(pipeline)
+    target.addHandler(handler)
+    target.setLevel(level)
+    return handler
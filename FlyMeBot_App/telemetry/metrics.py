@@ -0,0 +1,244 @@
+"""Process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept in a `MetricsRegistry` and rendered
+on each scrape. The `stats` of the bot's components (storage, recognizer
+cache, outbound buffer...) are read at scrape time through `register_stats`.
+Each worker process has its own registry: with several workers, a scrape
+reports the worker that answered it.
+"""
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from botbuilder.core import Middleware, TurnContext
+
+# Seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, object]]) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels -> [count per bucket, sum]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0]
+        counts = state[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        state[1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self._values.items():
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels(labels + [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        # (prefix, stats callable, counter keys)
+        self._stats: List[tuple] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f'"{metric.name}" is already registered as a {existing.kind}.')
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_stats(self, prefix: str, stats: Callable[[], Dict[str, float]], counters: Iterable[str] = ()):
+        """Expose each value of a `stats` dict as `<prefix>_<key>`, read at scrape time.
+
+        The keys listed in `counters` are exposed as counters (`_total`), the
+        other ones as gauges.
+        """
+        self._stats.append((prefix, stats, frozenset(counters)))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            samples = metric.samples()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        for prefix, stats, counters in self._stats:
+            for key, value in stats().items():
+                if not isinstance(value, (int, float)):
+                    continue
+                kind = "counter" if key in counters else "gauge"
+                name = f"{prefix}_{key}_total" if kind == "counter" else f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by the whole process, like `TRACER`
+METRICS = MetricsRegistry()
+
+TURN_LATENCY = METRICS.histogram(
+    "bot_turn_duration_seconds", "Duration of the turns, outgoing activities included.", ("type",)
+)
+TURN_ERRORS = METRICS.counter("bot_turn_errors_total", "Turns that raised an exception.", ("type",))
+TURNS_IN_FLIGHT = METRICS.gauge("bot_turns_in_flight", "Turns being processed.")
+RECOGNIZER_LATENCY = METRICS.histogram("bot_recognizer_duration_seconds", "Duration of the recognizer calls.")
+RECOGNIZER_ERRORS = METRICS.counter("bot_recognizer_errors_total", "Recognizer calls that raised an exception.")
+OUTBOUND_SENDS = METRICS.counter("bot_outbound_sends_total", "Calls sending activities to the channel.")
+OUTBOUND_ACTIVITIES = METRICS.counter("bot_outbound_activities_total", "Activities sent to the channel.", ("type",))
+OUTBOUND_ERRORS = METRICS.counter("bot_outbound_errors_total", "Calls sending activities that failed.")
+LOOP_LAG = METRICS.gauge("bot_event_loop_lag_seconds", "Delay of the last event loop probe past its schedule.")
+
+
+class MetricsMiddleware(Middleware):
+    """Count the turns in flight, their duration and errors."""
+
+    async def on_turn(self, context: TurnContext, logic: Callable[[TurnContext], Awaitable]):
+        kind = context.activity.type
+        TURNS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await logic()
+        except Exception:
+            TURN_ERRORS.inc(type=kind)
+            raise
+        finally:
+            TURN_LATENCY.observe(time.perf_counter() - start, type=kind)
+            TURNS_IN_FLIGHT.dec()
+
+
+class LoopLagProbe:
+    """Periodic task measuring how late the event loop runs a timer."""
+
+    def __init__(self, interval: float = 0.5, gauge: Gauge = None):
+        self.interval = interval
+        self.gauge = gauge or LOOP_LAG
+        self._task = None
+
+    async def _probe(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.gauge.set(max(0.0, loop.time() - scheduled))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._probe())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,144 @@
+"""Bounded, batched telemetry pipeline."""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Iterable, List
+
+from .sinks import TelemetrySink
+
+logger = logging.getLogger(__name__)
+
+
+class _Marker:
+    """Queue item asking the drain thread to write its batch now."""
+
+    def __init__(self, stop: bool = False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class TelemetryPipeline:
+    """Telemetry events queued in memory and written to the sinks in batches.
+
+    `emit` never blocks: when the queue holds `max_queue` events, the new ones
+    are dropped and counted. A background thread takes the events off the
+    queue and hands them to every sink in batches of up to `batch_size`
+    events, waiting at most `flush_interval` seconds for a batch to fill up.
+    The thread starts with the first event; a forked worker starts its own.
+    """
+
+    def __init__(
+        self,
+        sinks: Iterable[TelemetrySink] = (),
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+    ):
+        self.sinks: List[TelemetrySink] = list(sinks)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self._closed = False
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._queue = queue.Queue(self.max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    def emit(self, event: dict) -> bool:
+        """Queue an event, False when it was dropped."""
+        if not self.sinks or self._closed:
+            return False
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.emitted += 1
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._drain, name="telemetry", daemon=True)
+                self._thread.start()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while not isinstance(item, _Marker):
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    item = None
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    item = None
+                    break
+
+            if batch:
+                self._write(batch)
+            if isinstance(item, _Marker):
+                item.done.set()
+                if item.stop:
+                    return
+
+    def _write(self, batch: List[dict]):
+        self.batches += 1
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+                self.written += len(batch)
+            except Exception:  # pylint: disable=broad-except
+                self.failed += len(batch)
+                logger.exception("Telemetry sink %s failed", type(sink).__name__)
+
+    def _send_marker(self, stop: bool, timeout: float) -> bool:
+        if self._thread is None:
+            return True
+        marker = _Marker(stop)
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write the events queued so far, False if it took more than `timeout`."""
+        return self._send_marker(False, timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Write the queued events, stop the thread and close the sinks."""
+        self._closed = True
+        if self._send_marker(True, timeout) and self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        for sink in self.sinks:
+            sink.close()
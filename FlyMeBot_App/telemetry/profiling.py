@@ -0,0 +1,274 @@
+"""Sampling profiles of the slow turns and of the whole process.
+
+A turn still running after `ENROL_FRACTION` of `threshold` is enrolled, and
+a background thread samples the stacks of the enrolled turns every
+`interval` seconds: the stack of the running frames when the event loop is
+running the turn, the chain of awaited coroutines otherwise. When a turn
+lasts more than `threshold` seconds, its samples are written to a
+`ProfileRing` with the turn's conversation id and dialog step; the samples
+of the other turns are dropped. Turns that end early are never sampled.
+Stacks are kept in the collapsed format of flame graph tools: one
+`root;...;leaf count` line per stack.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Samples kept for a turn: a turn that hangs stops being sampled past it
+MAX_TURN_SAMPLES = 10000
+# Part of the threshold a turn lasts before it is sampled
+ENROL_FRACTION = 0.5
+
+
+def _label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _frame_stack(frame, root=None) -> List[str]:
+    """Labels of a frame and its callers up to `root` included, root first."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        if frame is root:
+            break
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _await_stack(coroutine) -> List[str]:
+    """Labels of a suspended coroutine and the ones it awaits, ending with `(waiting)`."""
+    labels = []
+    while coroutine is not None:
+        frame = getattr(coroutine, "cr_frame", None) or getattr(coroutine, "gi_frame", None)
+        if frame is None:
+            labels.append("(waiting)")
+            break
+        labels.append(_label(frame.f_code))
+        coroutine = getattr(coroutine, "cr_await", None) or getattr(coroutine, "gi_yieldfrom", None)
+    return labels
+
+
+def collapse(stacks: Dict[str, int]) -> str:
+    """Collapsed stacks text, the most sampled first."""
+    return "".join(f"{stack} {count}\n" for stack, count in Counter(stacks).most_common())
+
+
+class ProfileRing:
+    """The last `max_profiles` profiles, one JSON file each in `directory`."""
+
+    PREFIX = "slow-turn-"
+
+    def __init__(self, directory: str, max_profiles: int = 50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._sequence = 0
+
+    def write(self, profile: dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(profile["time"]))
+        path = os.path.join(self.directory, f"{self.PREFIX}{stamp}-{os.getpid()}-{self._sequence:06d}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(profile, file, ensure_ascii=False, indent=1)
+        self._trim()
+        return path
+
+    def paths(self) -> List[str]:
+        """Profiles on disk, oldest first."""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.startswith(self.PREFIX)]
+        except FileNotFoundError:
+            return []
+        stamped = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stamped.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                # Trimmed meanwhile by another write
+                continue
+        return [path for _, path in sorted(stamped)]
+
+    def _trim(self):
+        paths = self.paths()
+        for path in paths[: max(0, len(paths) - self.max_profiles)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Trimmed by another worker
+                pass
+
+
+class TurnProfile:
+    __slots__ = (
+        "conversation_id",
+        "activity_id",
+        "attributes",
+        "task",
+        "loop",
+        "thread_id",
+        "start",
+        "stacks",
+        "samples",
+    )
+
+    def __init__(self, conversation_id: str, activity_id: str):
+        self.conversation_id = conversation_id
+        self.activity_id = activity_id
+        self.attributes: Dict[str, object] = {}
+        self.task = asyncio.current_task()
+        self.loop = asyncio.get_event_loop()
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.stacks = Counter()
+        self.samples = 0
+
+    def set_attribute(self, key: str, value: object):
+        self.attributes[key] = value
+
+    def sample(self, frames: Dict[int, object]):
+        if self.samples >= MAX_TURN_SAMPLES:
+            return
+        coroutine = self.task.get_coro()
+        if asyncio.current_task(self.loop) is self.task:
+            stack = _frame_stack(frames.get(self.thread_id), getattr(coroutine, "cr_frame", None))
+        else:
+            stack = _await_stack(coroutine)
+        if stack:
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+
+class _NoopProfile:
+    def set_attribute(self, key: str, value: object):
+        pass
+
+
+NOOP_PROFILE = _NoopProfile()
+
+
+class SlowTurnProfiler:
+    def __init__(self, ring: ProfileRing = None, threshold: float = 0.0, interval: float = 0.005):
+        self.configure(ring, threshold, interval)
+        self.captured = 0
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def configure(self, ring: ProfileRing = None, threshold: float = 0.0, interval: float = 0.005):
+        self.ring = ring
+        self.threshold = threshold if ring is not None else 0.0
+        self.interval = interval
+
+    def _reset(self):
+        # Guards the list of enrolled turns; `_sampling` is held by the thread while it walks their stacks
+        self._lock = threading.Lock()
+        self._sampling = threading.Lock()
+        self._turns: List[TurnProfile] = []
+        self._active = threading.Event()
+        self._thread = None
+
+    @contextlib.asynccontextmanager
+    async def profile_turn(self, conversation_id: str, activity_id: str):
+        """Sample the current task; its profile is written when it lasts more than `threshold`."""
+        if self.threshold <= 0 or asyncio.current_task() is None:
+            yield NOOP_PROFILE
+            return
+        profile = TurnProfile(conversation_id, activity_id)
+        enrolment = profile.loop.call_later(self.threshold * ENROL_FRACTION, self._enrol, profile)
+        try:
+            yield profile
+        finally:
+            duration = time.perf_counter() - profile.start
+            enrolment.cancel()
+            with self._lock:
+                if profile in self._turns:
+                    self._turns.remove(profile)
+                    if not self._turns:
+                        self._active.clear()
+            if duration >= self.threshold:
+                await self._capture(profile, duration)
+
+    def _enrol(self, profile: TurnProfile):
+        with self._lock:
+            self._turns.append(profile)
+            self._active.set()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample, name="turn-profiler", daemon=True)
+            self._thread.start()
+
+    def _sample(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                turns = list(self._turns)
+            # Without `_lock`: the event loop does not wait for the stack walks
+            with self._sampling:
+                frames = sys._current_frames()  # pylint: disable=protected-access
+                for profile in turns:
+                    profile.sample(frames)
+                del frames
+
+    async def _capture(self, profile: TurnProfile, duration: float):
+        self.captured += 1
+        with self._sampling:
+            # The thread may still be sampling the turn
+            stacks = collapse(profile.stacks).splitlines()
+        record = {
+            "time": time.time(),
+            "conversation_id": profile.conversation_id,
+            "activity_id": profile.activity_id,
+            "duration_ms": duration * 1000,
+            "interval_ms": self.interval * 1000,
+            "sampled_after_ms": self.threshold * ENROL_FRACTION * 1000,
+            "samples": profile.samples,
+            **profile.attributes,
+            "stacks": stacks,
+        }
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.ring.write, record)
+
+
+# Configured by the application, like `TRACER`
+PROFILER = SlowTurnProfiler()
+
+
+class ProcessSampler:
+    """Time-boxed sampling of the stacks of every thread of the process, one at a time."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._running = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._running.locked()
+
+    def sample(self, duration: float) -> Optional[str]:
+        """Collapsed stacks, each rooted at its thread name; None when a profile is already running."""
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            stacks = Counter()
+            own = threading.get_ident()
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                time.sleep(self.interval)
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                    if ident == own:
+                        continue
+                    stack = [names.get(ident, f"thread-{ident}")] + _frame_stack(frame)
+                    stacks[";".join(stack)] += 1
+            return collapse(stacks)
+        finally:
+            self._running.release()
@@ -0,0 +1,101 @@
+"""Destinations of the telemetry events."""
+import json
+import os
+from datetime import datetime, timezone
+from typing import List
+
+
+class TelemetrySink:
+    """Receives the events of the pipeline in batches, from its thread."""
+
+    def write(self, events: List[dict]):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+class JsonlFileSink(TelemetrySink):
+    """One JSON object per line in a local file, rotated like `RotatingFileHandler`.
+
+    When the file would grow past `max_bytes`, it is renamed `<path>.1` (the
+    older files shifting to `.2`, `.3`...) and only `backup_count` of them are
+    kept.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+
+    @staticmethod
+    def _line(event: dict) -> str:
+        record = dict(event)
+        record["time"] = datetime.fromtimestamp(event["time"], timezone.utc).isoformat()
+        return json.dumps(record, default=repr, ensure_ascii=False) + "\n"
+
+    def write(self, events: List[dict]):
+        data = "".join(self._line(event) for event in events).encode("utf-8")
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        if self.max_bytes and self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count:
+            for index in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{index}"):
+                    os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "wb")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class AppInsightsSink(TelemetrySink):
+    """Application Insights, one upload per batch."""
+
+    def __init__(self, instrumentation_key: str):
+        # Only loaded when an instrumentation key is configured
+        from applicationinsights import TelemetryClient  # pylint: disable=import-outside-toplevel
+
+        self.client = TelemetryClient(instrumentation_key)
+
+    def write(self, events: List[dict]):
+        for event in events:
+            kind = event["type"]
+            properties = event.get("properties")
+            if kind == "trace":
+                self.client.track_trace(event["name"], properties, event.get("severity"))
+            elif kind == "exception":
+                error = event["exception"]
+                self.client.track_exception(type(error), error, error.__traceback__, properties)
+            elif kind == "metric":
+                self.client.track_metric(event["name"], event["value"], properties=properties)
+            elif kind == "request":
+                self.client.track_request(
+                    event["name"],
+                    event["url"],
+                    event["success"],
+                    duration=event.get("duration"),
+                    response_code=event.get("response_code"),
+                    properties=properties,
+                )
+            elif kind == "dependency":
+                self.client.track_dependency(
+                    event["name"],
+                    event.get("data"),
+                    duration=event.get("duration"),
+                    success=event.get("success"),
+                    properties=properties,
+                )
+            else:
+                self.client.track_event(event["name"], properties, event.get("measurements"))
+        self.client.flush()
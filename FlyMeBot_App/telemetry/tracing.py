@@ -0,0 +1,226 @@
+"""Per-turn tracing spans.
+
+`TracingMiddleware` opens the root span of each turn, tagged with its
+conversation and activity ids; `TRACER.span(...)` and the `traced` decorator
+open child spans within it. Only a `sample_rate` fraction of the turns is
+traced: in the other ones a span is a shared no-op object. The spans of a
+sampled turn are handed to the exporter together when the turn ends.
+"""
+import functools
+import logging
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional, TextIO
+
+from botbuilder.core import Middleware, TurnContext
+
+from .pipeline import TelemetryPipeline
+
+logger = logging.getLogger(__name__)
+
+
+class SpanExporter:
+    """Receives the spans of a sampled turn, ordered by start."""
+
+    def export(self, spans: List[dict]):
+        raise NotImplementedError()
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Print each traced turn as an indented tree of spans."""
+
+    def __init__(self, stream: TextIO = None):
+        self.stream = stream
+
+    def export(self, spans: List[dict]):
+        root = spans[0]
+        lines = [
+            f"trace {root['trace_id']} conversation={root['conversation_id']} activity={root['activity_id']}"
+        ]
+        depths = {}
+        for span in spans:
+            depth = depths.get(span["parent_id"], -1) + 1
+            depths[span["span_id"]] = depth
+            error = f" ({span['error']})" if "error" in span else ""
+            lines.append(f"{'  ' * (depth + 1)}{span['name']} {span['duration_ms']:.2f} ms{error}")
+        (self.stream or sys.stderr).write("\n".join(lines) + "\n")
+
+
+class PipelineSpanExporter(SpanExporter):
+    """Queue the spans in a telemetry pipeline, one "span" event each."""
+
+    def __init__(self, pipeline: TelemetryPipeline):
+        self.pipeline = pipeline
+
+    def export(self, spans: List[dict]):
+        for span in spans:
+            self.pipeline.emit(dict(span, type="span"))
+
+
+class _Trace:
+    __slots__ = ("trace_id", "conversation_id", "activity_id", "spans", "next_id")
+
+    def __init__(self, conversation_id: str, activity_id: str):
+        self.trace_id = uuid.uuid4().hex
+        self.conversation_id = conversation_id
+        self.activity_id = activity_id
+        self.spans: List["Span"] = []
+        self.next_id = 0
+
+
+_CURRENT: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+
+
+class Span:
+    __slots__ = (
+        "tracer",
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "attributes",
+        "start",
+        "duration",
+        "error",
+        "_started",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", trace: _Trace, name: str, parent_id: int, attributes: Dict[str, object]):
+        self.tracer = tracer
+        self.trace = trace
+        trace.next_id += 1
+        self.span_id = trace.next_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value: object):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = _CURRENT.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.duration = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _CURRENT.reset(self._token)
+        self.trace.spans.append(self)
+        if self.parent_id is None:
+            self.tracer.export(self.trace)
+        return False
+
+    def to_dict(self) -> dict:
+        span = {
+            "time": self.start,
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "duration_ms": self.duration * 1000,
+            "conversation_id": self.trace.conversation_id,
+            "activity_id": self.trace.activity_id,
+        }
+        if self.attributes:
+            span["attributes"] = self.attributes
+        if self.error:
+            span["error"] = self.error
+        return span
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: object):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        return False
+
+
+class _Untraced(_NoopSpan):
+    """Scope of a turn that is not sampled: the spans of an enclosing turn do not leak into it."""
+
+    def __enter__(self) -> "_Untraced":
+        self._token = _CURRENT.set(None)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        _CURRENT.reset(self._token)
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(self, exporter: SpanExporter = None, sample_rate: float = 0.0):
+        self.configure(exporter, sample_rate)
+        self.traces = 0
+
+    def configure(self, exporter: SpanExporter = None, sample_rate: float = 0.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate if exporter is not None else 0.0
+
+    def start_turn(self, conversation_id: str, activity_id: str, **attributes):
+        """Root span of a turn, traced with a `sample_rate` probability."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return _Untraced()
+        return Span(self, _Trace(conversation_id, activity_id), "turn", None, attributes)
+
+    def span(self, name: str, **attributes):
+        """Child span of the current one, a no-op when the turn is not traced."""
+        parent = _CURRENT.get()
+        if parent is None:
+            return NOOP_SPAN
+        return Span(self, parent.trace, name, parent.span_id, attributes)
+
+    def export(self, trace: _Trace):
+        self.traces += 1
+        spans = sorted(trace.spans, key=lambda span: span._started)  # pylint: disable=protected-access
+        try:
+            self.exporter.export([span.to_dict() for span in spans])
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Span export failed")
+
+
+# Configured by the application (see `create_span_exporter`)
+TRACER = Tracer()
+
+
+def traced(name: str = None):
+    """Run a coroutine function in a span named after it."""
+
+    def decorate(function: Callable[..., Awaitable]):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        async def traced_function(*args, **kwargs):
+            with TRACER.span(span_name):
+                return await function(*args, **kwargs)
+
+        return traced_function
+
+    return decorate
+
+
+class TracingMiddleware(Middleware):
+    """Open the root span of every turn."""
+
+    def __init__(self, tracer: Tracer = None):
+        self.tracer = tracer or TRACER
+
+    async def on_turn(self, context: TurnContext, logic: Callable[[TurnContext], Awaitable]):
+        activity = context.activity
+        conversation_id = activity.conversation.id if activity.conversation else None
+        with self.tracer.start_turn(conversation_id, activity.id, type=activity.type):
+            await logic()
@@ -0,0 +1,50 @@
+import json
+import math
+import os
+
+from botbuilder.schema import Activity
+from msrest.serialization import DeserializationError
+
+from helpers.activity_decoder import ActivityDecoder, loads
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "resources", "activities_sample.json")
+
+UNUSUAL = [
+    # Coerced by msrest
+    {"type": "message", "text": 5, "historyDisclosed": "true"},
+    {"type": "message", "from": {"id": "user", "name": None}, "membersAdded": [None]},
+    {"type": "message", "textHighlights": [{"text": "Paris", "occurrence": True}]},
+]
+
+
+def test_parity_with_deserialize():
+    """Vérifie que les activités du corpus sont décodées comme par `Activity().deserialize`
+    """
+    with open(SAMPLE, "rb") as file:
+        corpus = loads(file.read())
+    decoder = ActivityDecoder()
+    for body in corpus:
+        expected = Activity().deserialize(json.loads(json.dumps(body)))
+        activity = decoder.decode(body)
+        assert activity == expected, body["id"]
+        assert activity.serialize() == expected.serialize(), body["id"]
+    assert decoder.stats == {"fast": len(corpus), "fallback": 0}
+
+
+def test_unusual_payloads():
+    """Vérifie que les valeurs convertissant msrest et les erreurs passent par `deserialize`
+    """
+    decoder = ActivityDecoder()
+    for body in UNUSUAL:
+        assert decoder.decode(body) == Activity().deserialize(body), body
+    assert decoder.stats == {"fast": 1, "fallback": 2}
+
+    try:
+        decoder.decode({"type": "message", "timestamp": "yesterday"})
+    except DeserializationError:
+        pass
+    else:
+        assert False, "invalid timestamp decoded"
+
+    assert math.isnan(loads(b'{"value": NaN}')["value"])
+    assert loads('{"text": "Zürich"}'.encode("utf-16")) == {"text": "Zürich"}
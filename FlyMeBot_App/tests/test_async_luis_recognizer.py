@@ -0,0 +1,110 @@
+import asyncio
+import time
+from copy import copy
+
+import aiohttp
+from aiounittest import async_test
+from botbuilder.ai.luis import LuisApplication, LuisPredictionOptions
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes
+
+from benchmarks.fake_luis import APP_ID, ENDPOINT_KEY, BackgroundServer, FakeLuis
+from helpers.luis_helper import LuisHelper
+from recognizers import CachingRecognizer
+from recognizers.async_luis_recognizer import AsyncLuisRecognizer
+
+UTTERANCE = "book a flight from paris to berlin on 2023-01-05 until 2023-01-12 with a budget of 500 euros"
+
+
+def turn_context(text: str) -> TurnContext:
+    adapter = TestAdapter()
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = text
+    return TurnContext(adapter, activity)
+
+
+@async_test
+async def test_async_luis_booking_details():
+    """Vérifie que le résultat LUIS asynchrone alimente LuisHelper
+    """
+    with BackgroundServer(FakeLuis().app()) as server:
+        recognizer = AsyncLuisRecognizer(
+            LuisApplication(APP_ID, ENDPOINT_KEY, server.url), LuisPredictionOptions()
+        )
+        intent, details = await LuisHelper.execute_luis_query(
+            recognizer, turn_context(UTTERANCE)
+        )
+        await recognizer.close()
+
+    assert intent == "BookFlight"
+    assert details.origin == "Paris"
+    assert details.destination == "Berlin"
+    assert details.start_date == "2023-01-05"
+    assert details.end_date == "2023-01-12"
+    assert details.budget == 500
+
+
+@async_test
+async def test_async_luis_concurrent_calls():
+    """Vérifie que les appels LUIS concurrents ne s'exécutent pas l'un après l'autre
+    """
+    with BackgroundServer(FakeLuis(latency=0.2).app()) as server:
+        recognizer = AsyncLuisRecognizer(
+            LuisApplication(APP_ID, ENDPOINT_KEY, server.url), LuisPredictionOptions()
+        )
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(recognizer.recognize(turn_context(UTTERANCE)) for _ in range(10))
+        )
+        elapsed = time.perf_counter() - start
+        await recognizer.close()
+
+    assert all(result.get_top_scoring_intent().intent == "BookFlight" for result in results)
+    assert elapsed < 1.0
+
+
+@async_test
+async def test_async_luis_timeout():
+    """Vérifie le délai d'attente par appel
+    """
+    with BackgroundServer(FakeLuis(latency=1.0).app()) as server:
+        recognizer = AsyncLuisRecognizer(
+            LuisApplication(APP_ID, ENDPOINT_KEY, server.url),
+            LuisPredictionOptions(timeout=100),
+        )
+        try:
+            await recognizer.recognize(turn_context(UTTERANCE))
+            timed_out = False
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            timed_out = True
+        await recognizer.close()
+
+    assert timed_out
+
+
+@async_test
+async def test_cached_luis_result_traced_per_turn():
+    """Vérifie que chaque tour servi par le cache reçoit sa propre trace LUIS, avec ses positions d'entités
+    """
+    with BackgroundServer(FakeLuis().app()) as server:
+        recognizer = AsyncLuisRecognizer(
+            LuisApplication(APP_ID, ENDPOINT_KEY, server.url), LuisPredictionOptions()
+        )
+        cache = CachingRecognizer(recognizer)
+        contexts = [turn_context(UTTERANCE), turn_context(UTTERANCE.upper())]
+        for context in contexts:
+            context.adapter.send_trace_activities = True
+        results = [await cache.recognize(context) for context in contexts]
+        await recognizer.close()
+
+    assert cache.stats["hits"] == 1
+    for context, result in zip(contexts, results):
+        [trace] = context.adapter.activity_buffer
+        assert trace.type == ActivityTypes.trace
+        assert trace.value["recognizerResult"]["text"] == context.activity.text
+        for instances in result.entities["$instance"].values():
+            for instance in instances:
+                start, end = instance["startIndex"], instance["endIndex"]
+                assert instance["text"] == context.activity.text[start:end]
@@ -0,0 +1,131 @@
+import time
+
+from aiounittest import async_test
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage
+from botbuilder.schema import Activity, ActivityTypes
+from botframework.connector.auth import ChannelValidation
+from botframework.connector.auth.jwt_token_extractor import JwtTokenExtractor
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from auth_cache import AuthCache, OpenIdKeyStore
+from benchmarks.fake_luis import BackgroundServer
+from benchmarks.fake_openid import METADATA_PATH, FakeOpenId
+
+APP_ID = "0b1c2d3e-4f5a-6b7c-8d9e-0f1a2b3c4d5e"
+SERVICE_URL = "https://smba.trafficmanager.net/emea/"
+TURNS = 200
+
+
+def activity() -> Activity:
+    return Activity(type=ActivityTypes.message, channel_id="msteams", service_url=SERVICE_URL, text="hi")
+
+
+def adapter(auth_cache: AuthCache = None) -> AdapterWithErrorHandler:
+    settings = BotFrameworkAdapterSettings(APP_ID, "password")
+    return AdapterWithErrorHandler(settings, ConversationState(MemoryStorage()), auth_cache=auth_cache)
+
+
+async def rejected(bot_adapter: AdapterWithErrorHandler, token: str) -> bool:
+    try:
+        # pylint: disable=protected-access
+        await bot_adapter._authenticate_request(activity(), f"Bearer {token}")
+    except Exception:  # pylint: disable=broad-except
+        return True
+    return False
+
+
+async def cpu_per_turn(bot_adapter: AdapterWithErrorHandler, token: str) -> float:
+    start = time.process_time()
+    for _ in range(TURNS):
+        # pylint: disable=protected-access
+        identity = await bot_adapter._authenticate_request(activity(), f"Bearer {token}")
+        assert identity.get_claim_value("aud") == APP_ID
+    return (time.process_time() - start) / TURNS
+
+
+class OpenIdStandIn:
+    """The channel token validation pointed at a local OpenID endpoint."""
+
+    def __init__(self, openid: FakeOpenId):
+        self.server = BackgroundServer(openid.app())
+        self.store = None
+
+    async def __aenter__(self) -> OpenIdKeyStore:
+        self.server.__enter__()
+        ChannelValidation.open_id_metadata_endpoint = self.server.url + METADATA_PATH
+        self.store = OpenIdKeyStore(ChannelValidation.open_id_metadata_endpoint)
+        self.store.install()
+        await self.store.refresh()
+        return self.store
+
+    async def __aexit__(self, *exc_info):
+        await self.store.close()
+        JwtTokenExtractor.metadataCache.pop(self.store.url, None)
+        ChannelValidation.open_id_metadata_endpoint = None
+        self.server.__exit__(*exc_info)
+
+
+@async_test
+async def test_cached_validation_cpu():
+    """Vérifie que le cache des jetons réduit le temps CPU d'authentification par tour
+    """
+    openid = FakeOpenId()
+    key_id = openid.add_key()
+    async with OpenIdStandIn(openid) as store:
+        token = openid.token(key_id, APP_ID, SERVICE_URL)
+        uncached = await cpu_per_turn(adapter(), token)
+        auth_cache = AuthCache([store])
+        cached = await cpu_per_turn(adapter(auth_cache), token)
+
+    assert auth_cache.stats["misses"] == 1
+    assert auth_cache.stats["hits"] == TURNS - 1
+    # The key set was fetched once, before the first turn
+    assert openid.keys_calls == 1
+    assert cached < uncached / 3, (cached, uncached)
+
+
+@async_test
+async def test_rejected_tokens():
+    """Vérifie que les jetons expirés, révoqués ou d'une autre audience restent refusés
+    """
+    openid = FakeOpenId()
+    key_id = openid.add_key()
+    other_key_id = openid.add_key()
+    now = [time.time()]
+    async with OpenIdStandIn(openid) as store:
+        auth_cache = AuthCache([store], clock=lambda: now[0])
+        bot_adapter = adapter(auth_cache)
+
+        assert await rejected(bot_adapter, openid.token(key_id, "another-bot", SERVICE_URL))
+        # Past the 5 minutes of clock tolerance
+        assert await rejected(bot_adapter, openid.token(key_id, APP_ID, SERVICE_URL, lifetime=-600))
+        assert auth_cache.stats["size"] == 0
+
+        # Validated again once expired
+        token = openid.token(key_id, APP_ID, SERVICE_URL, lifetime=60)
+        assert not await rejected(bot_adapter, token)
+        assert not await rejected(bot_adapter, token)
+        now[0] += 61
+        assert not await rejected(bot_adapter, token)
+        assert auth_cache.stats["expired"] == 1
+
+        # Rejected as soon as the key set no longer holds its signing key
+        token = openid.token(key_id, APP_ID, SERVICE_URL)
+        other_token = openid.token(other_key_id, APP_ID, SERVICE_URL)
+        assert not await rejected(bot_adapter, token)
+        assert not await rejected(bot_adapter, other_token)
+        openid.revoke(key_id)
+        await store.refresh()
+        assert await rejected(bot_adapter, token)
+        assert not await rejected(bot_adapter, other_token)
+        assert auth_cache.stats["revoked"] == 1
+
+        # Another service URL is checked against the token's claim
+        other_service = Activity(type=ActivityTypes.message, channel_id="msteams", service_url="https://evil/")
+        try:
+            # pylint: disable=protected-access
+            await bot_adapter._authenticate_request(other_service, f"Bearer {other_token}")
+        except PermissionError:
+            pass
+        else:
+            assert False, "service URL not checked"
@@ -0,0 +1,166 @@
+import asyncio
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import IntentScore, RecognizerResult, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes
+
+from recognizers import CachingRecognizer, UtteranceRecognizer
+
+
+class CountingRecognizer(UtteranceRecognizer):
+    def __init__(self, entities: dict = None, latency: float = 0.0):
+        self.calls = 0
+        self.entities = entities or {}
+        self.latency = latency
+        self.reports = []
+
+    async def predict(self, utterance: str) -> RecognizerResult:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return RecognizerResult(
+            text=utterance,
+            intents={"BookFlight": IntentScore(0.9)},
+            entities=self.entities,
+        )
+
+    async def report(self, turn_context: TurnContext, recognizer_result: RecognizerResult):
+        self.reports.append((turn_context, recognizer_result))
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def turn_context(text: str) -> TurnContext:
+    adapter = TestAdapter()
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = text
+    return TurnContext(adapter, activity)
+
+
+@async_test
+async def test_cache_hit_on_normalized_utterance():
+    """Vérifie qu'une phrase répétée n'appelle LUIS qu'une fois
+    """
+    inner = CountingRecognizer()
+    cache = CachingRecognizer(inner)
+
+    await cache.recognize(turn_context("Book a flight"))
+    await cache.recognize(turn_context("  book   A FLIGHT "))
+
+    assert inner.calls == 1
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+@async_test
+async def test_cache_ttl_and_lru_eviction():
+    """Vérifie l'expiration et l'éviction LRU
+    """
+    inner = CountingRecognizer()
+    clock = Clock(1000.0)
+    cache = CachingRecognizer(inner, max_size=2, ttl=60, clock=clock)
+
+    await cache.recognize(turn_context("paris"))
+    await cache.recognize(turn_context("berlin"))
+    await cache.recognize(turn_context("paris"))
+    await cache.recognize(turn_context("madrid"))
+    assert cache.stats["evictions"] == 1
+
+    # "berlin" was the least recently used entry
+    await cache.recognize(turn_context("berlin"))
+    assert inner.calls == 4
+
+    clock.now += 61
+    await cache.recognize(turn_context("madrid"))
+    assert inner.calls == 5
+
+
+@async_test
+async def test_cache_coalesces_concurrent_utterances():
+    """Vérifie que des phrases identiques simultanées partagent un seul appel
+    """
+    inner = CountingRecognizer(latency=0.05)
+    cache = CachingRecognizer(inner)
+
+    results = await asyncio.gather(
+        *(cache.recognize(turn_context("I want to go to Paris")) for _ in range(5))
+    )
+
+    assert inner.calls == 1
+    assert cache.stats["coalesced"] == 4
+    assert all(result is results[0] for result in results)
+    # Each turn reports its own recognition
+    assert len({id(context) for context, _ in inner.reports}) == 5
+
+
+@async_test
+async def test_cache_cancelled_caller_does_not_fail_others():
+    """Vérifie que l'annulation du tour à l'origine d'un appel partagé n'annule pas les autres tours
+    """
+    inner = CountingRecognizer(latency=0.05)
+    cache = CachingRecognizer(inner)
+
+    leader = asyncio.ensure_future(cache.recognize(turn_context("I want to go to Paris")))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(cache.recognize(turn_context("I want to go to Paris")))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    result = await follower
+    assert result.text == "I want to go to Paris"
+    assert leader.cancelled()
+    assert inner.calls == 1
+    assert cache.stats["size"] == 1
+    assert [result for _, result in inner.reports] == [result]
+
+
+@async_test
+async def test_cache_relative_dates_expire_at_end_of_day():
+    """Vérifie que les dates ("tomorrow") ne survivent pas au changement de jour
+    """
+    inner = CountingRecognizer(entities={"datetime": [{"type": "date", "timex": ["2023-01-06"]}]})
+    clock = Clock(1672959600.0)
+    cache = CachingRecognizer(inner, ttl=7 * 24 * 3600, clock=clock)
+
+    await cache.recognize(turn_context("fly tomorrow"))
+    clock.now += 60
+    await cache.recognize(turn_context("fly tomorrow"))
+    assert inner.calls == 1
+
+    clock.now += 24 * 3600
+    await cache.recognize(turn_context("fly tomorrow"))
+    assert inner.calls == 2
+
+
+@async_test
+async def test_cache_hit_keeps_caller_text_and_offsets():
+    """Vérifie qu'une phrase servie depuis le cache garde son texte et la position de ses entités
+    """
+    inner = CountingRecognizer(
+        entities={
+            "dst_city": ["paris"],
+            "$instance": {"dst_city": [{"startIndex": 10, "endIndex": 15, "text": "Paris", "type": "dst_city"}]},
+        }
+    )
+    cache = CachingRecognizer(inner)
+
+    first = await cache.recognize(turn_context("Flight to Paris"))
+    context = turn_context("  FLIGHT  to paris")
+    result = await cache.recognize(context)
+
+    assert inner.calls == 1
+    assert first.entities["$instance"]["dst_city"][0]["text"] == "Paris"
+    assert result.text == "  FLIGHT  to paris"
+    assert result.entities["dst_city"] == ["paris"]
+    assert result.entities["$instance"]["dst_city"] == [
+        {"startIndex": 13, "endIndex": 18, "text": "paris", "type": "dst_city"}
+    ]
+    assert inner.reports[-1] == (context, result)
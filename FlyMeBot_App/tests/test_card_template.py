@@ -0,0 +1,47 @@
+from helpers.card_template import CardTemplate
+
+
+def test_render_fills_placeholders():
+    """Vérifie le remplissage des champs de la carte
+    """
+    template = CardTemplate({
+        "type": "AdaptiveCard",
+        "body": [
+            {"type": "TextBlock", "text": "${origin}"},
+            {"type": "TextBlock", "text": "From ${origin} to ${destination}"},
+            {"type": "Image", "url": "http://example.com/plane.png"},
+        ],
+    })
+
+    card = template.render({"origin": "Paris", "destination": "Berlin"})
+
+    assert card["body"][0]["text"] == "Paris"
+    assert card["body"][1]["text"] == "From Paris to Berlin"
+    assert card["body"][2]["url"] == "http://example.com/plane.png"
+
+
+def test_render_does_not_alter_template():
+    """Vérifie que deux rendus successifs sont indépendants
+    """
+    template = CardTemplate({"body": [{"text": "${budget}"}]})
+
+    first = template.render({"budget": "500 €"})
+    second = template.render({"budget": 1000})
+
+    assert first["body"][0]["text"] == "500 €"
+    assert second["body"][0]["text"] == "1000"
+
+
+def test_booked_flight_card():
+    """Vérifie la carte de réservation
+    """
+    card = CardTemplate.from_resource("bookedFlightCard.json").render({
+        "origin": "Paris",
+        "destination": "Berlin",
+        "start_date": "2023-01-05",
+        "end_date": "2023-01-12",
+        "budget": "500 €",
+    })
+
+    assert "${" not in str(card)
+    assert card["body"][2]["text"] == "2023-01-05"
@@ -0,0 +1,70 @@
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import IntentScore, Recognizer, RecognizerResult, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes
+
+from helpers.luis_helper import LuisHelper
+from recognizers import CascadeRecognizer, LocalBookingRecognizer
+
+
+class FallbackRecognizer(Recognizer):
+    def __init__(self):
+        self.calls = 0
+
+    async def recognize(self, turn_context: TurnContext) -> RecognizerResult:
+        self.calls += 1
+        return RecognizerResult(
+            text=turn_context.activity.text, intents={"None": IntentScore(0.9)}, entities={}
+        )
+
+
+def turn_context(text: str) -> TurnContext:
+    adapter = TestAdapter()
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = text
+    return TurnContext(adapter, activity)
+
+
+@async_test
+async def test_local_tier_builds_booking_details():
+    """Vérifie que le niveau local produit les mêmes BookingDetails que LUIS
+    """
+    fallback = FallbackRecognizer()
+    cascade = CascadeRecognizer(LocalBookingRecognizer(), fallback)
+
+    intent, details = await LuisHelper.execute_luis_query(
+        cascade,
+        turn_context("book a flight from Paris to Berlin on 2023-01-05 until 2023-01-12 with 500€"),
+    )
+
+    assert fallback.calls == 0
+    assert intent == "BookFlight"
+    assert details.origin == "Paris"
+    assert details.destination == "Berlin"
+    assert details.start_date == "2023-01-05"
+    assert details.end_date == "2023-01-12"
+    assert details.budget == 500
+    assert cascade.stats["local"] == 1
+
+
+@async_test
+async def test_fallback_when_local_tier_is_unsure():
+    """Vérifie l'appel à LUIS quand le niveau local ne peut pas décider
+    """
+    fallback = FallbackRecognizer()
+    cascade = CascadeRecognizer(LocalBookingRecognizer(), fallback)
+
+    for text in (
+        "book a flight",
+        "I want to go to Paris tomorrow",
+        "from Paris to Berlin on 05/01/2023",
+        "I don't want to fly from Paris to Berlin",
+    ):
+        await cascade.recognize(turn_context(text))
+
+    assert fallback.calls == 4
+    assert cascade.stats["fallback"] == 4
+    assert cascade.stats["local"] == 0
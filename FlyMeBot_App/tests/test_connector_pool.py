@@ -0,0 +1,107 @@
+import asyncio
+
+from aiounittest import async_test
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState, MemoryStorage, TurnContext
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+from botframework.connector.auth import ClaimsIdentity
+
+from adapter_with_error_handler import AdapterWithErrorHandler
+from benchmarks.bench_connector import APP_ID, SimulatedCredentials
+from benchmarks.fake_connector import FakeConnector
+from benchmarks.fake_luis import BackgroundServer
+from connector_pool import ConnectorPool, ServiceTokenCache
+
+TURNS = 50
+
+
+def pooled_adapter(credentials: SimulatedCredentials, pool: ConnectorPool) -> AdapterWithErrorHandler:
+    settings = BotFrameworkAdapterSettings(APP_ID, "password", app_credentials=credentials)
+    return AdapterWithErrorHandler(settings, ConversationState(MemoryStorage()), connector_pool=pool)
+
+
+async def turn(bot_adapter: AdapterWithErrorHandler, service_url: str, logic):
+    activity = Activity(
+        type=ActivityTypes.message,
+        channel_id="msteams",
+        service_url=service_url,
+        conversation=ConversationAccount(id="conversation"),
+        from_property=ChannelAccount(id="user"),
+        recipient=ChannelAccount(id=APP_ID),
+        text="hi",
+    )
+    identity = ClaimsIdentity({"aud": APP_ID, "ver": "1.0"}, True)
+    await bot_adapter.process_activity_with_identity(activity, identity, logic)
+
+
+async def echo(context: TurnContext):
+    await context.send_activity(f"echo: {context.activity.text}")
+
+
+@async_test
+async def test_pooled_replies():
+    """Vérifie que les réponses réutilisent la connexion et le jeton du pool
+    """
+    connector = FakeConnector(tokens=["unused"])
+    credentials = SimulatedCredentials(connector, lifetime=3600, latency=0, msal_margin=0)
+    pool = ConnectorPool()
+    bot_adapter = pooled_adapter(credentials, pool)
+    with BackgroundServer(connector.app()) as server:
+        for _ in range(TURNS):
+            await turn(bot_adapter, server.url, echo)
+        await pool.close()
+
+    assert connector.unauthorized == 0
+    assert [reply.text for reply in connector.replies["conversation"]] == ["echo: hi"] * TURNS
+    assert len(connector.connections) == 1
+    assert pool.stats["connections"] == 1
+    # Only the first reply waited for its token
+    assert credentials.fetches == 1
+    assert pool.tokens.stats["waits"] == 1
+    assert pool.tokens.stats["hits"] == TURNS - 1
+
+
+@async_test
+async def test_token_refreshed_in_background():
+    """Vérifie que le jeton est renouvelé avant son expiration, sans faire attendre les envois
+    """
+    connector = FakeConnector(tokens=["unused"])
+    # Refreshed inside the margin where the credentials fetch a new token
+    credentials = SimulatedCredentials(connector, lifetime=1.0, latency=0, msal_margin=0.7)
+    tokens = ServiceTokenCache(refresh_margin=0.6, retry_interval=0.1)
+    pool = ConnectorPool(tokens=tokens)
+    bot_adapter = pooled_adapter(credentials, pool)
+    with BackgroundServer(connector.app()) as server:
+        tokens.prefetch(credentials)
+        for _ in range(8):
+            await asyncio.sleep(0.2)
+            await turn(bot_adapter, server.url, echo)
+        await pool.close()
+
+    assert connector.unauthorized == 0
+    assert len(connector.replies["conversation"]) == 8
+    assert credentials.fetches >= 3
+    assert tokens.stats["waits"] == 0
+
+
+@async_test
+async def test_error_replies_in_one_call():
+    """Vérifie que les messages d'erreur fusionnés sont envoyés en un seul appel au connecteur
+    """
+    conversation_state = ConversationState(MemoryStorage())
+
+    async def fail(context: TurnContext):
+        await conversation_state.load(context)
+        raise RuntimeError("boom")
+
+    connector = FakeConnector(tokens=["unused"])
+    credentials = SimulatedCredentials(connector, lifetime=3600, latency=0, msal_margin=0)
+    pool = ConnectorPool()
+    settings = BotFrameworkAdapterSettings(APP_ID, "password", app_credentials=credentials)
+    bot_adapter = AdapterWithErrorHandler(settings, conversation_state, merge_text=True, connector_pool=pool)
+    with BackgroundServer(connector.app()) as server:
+        await turn(bot_adapter, server.url, fail)
+        await pool.close()
+
+    assert connector.calls == 1
+    [reply] = connector.replies["conversation"]
+    assert reply.text.startswith("The bot encountered an error or bug.")
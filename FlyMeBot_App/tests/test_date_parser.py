@@ -0,0 +1,59 @@
+from recognizers_date_time import recognize_datetime
+
+from helpers.date_parser import parse_explicit_date
+
+EXPLICIT = [
+    "01/05/2023",
+    "1/5/2023",
+    "13/01/2023",
+    "12-31-2024",
+    "2023-01-05",
+    "2023/1/5",
+    "January 5, 2023",
+    "Jan 5 2023",
+    "jan. 5, 2023",
+    "Sept 5 2023",
+    "December 31st 2023",
+    "May 2nd, 2024",
+    "5 January 2023",
+    "05 jan 2023",
+    "5th of January 2023",
+    "the 23rd of march, 2023",
+    "  FEBRUARY 29 2024! ",
+    "01/05/2023.",
+]
+
+LEFT_TO_RECOGNIZER = [
+    "tomorrow",
+    "January 5",
+    "01.05.2023",
+    "01/05/23",
+    "02/30/2023",
+    "13/13/2023",
+    "on 01/05/2023",
+    "1/5/2023 please",
+    "the 5rd of May 2023",
+    "20230105",
+    "",
+]
+
+
+def test_parity_with_recognizer():
+    """Vérifie que l'analyse rapide donne les résolutions du reconnaisseur complet
+    """
+    for text in EXPLICIT:
+        timex = parse_explicit_date(text)
+        assert timex is not None, text
+        results = recognize_datetime(text, "English")
+        assert [result.resolution["values"] for result in results] == [
+            [{"timex": timex, "type": "date", "value": timex}]
+        ], text
+
+
+def test_undecided_replies():
+    """Vérifie que les réponses relatives, ambiguës ou dans une autre culture passent au reconnaisseur complet
+    """
+    for text in LEFT_TO_RECOGNIZER:
+        assert parse_explicit_date(text) is None, text
+    assert parse_explicit_date("01/05/2023", "en-US") == "2023-01-05"
+    assert parse_explicit_date("01/05/2023", "fr-FR") is None
@@ -0,0 +1,36 @@
+import json
+import os
+import random
+
+from benchmarks.bench_entity_resolver import legacy_resolve, repeated_payload
+from benchmarks.fake_luis import RECORDINGS_DIR
+from helpers.luis_helper import ENTITY_RESOLVER
+
+
+def load_payload() -> dict:
+    with open(os.path.join(RECORDINGS_DIR, "luis_book_flight.json"), encoding="utf-8") as recording:
+        return json.load(recording)
+
+
+def test_resolve_recorded_payload():
+    """Vérifie la résolution des entités d'une réponse LUIS enregistrée
+    """
+    resolved = ENTITY_RESOLVER.resolve(repeated_payload(load_payload(), 1))
+
+    assert resolved == {
+        "or_city": "Paris",
+        "dst_city": "Berlin",
+        "str_date": "2023-01-05",
+        "end_date": "2023-01-12",
+        "budget": 500,
+    }
+
+
+def test_resolve_matches_previous_implementation():
+    """Vérifie la parité avec l'ancienne recherche, y compris sur des instances non triées
+    """
+    recognizer_result = repeated_payload(load_payload(), 32)
+    instances = recognizer_result.entities["$instance"]
+    random.Random(4).shuffle(instances["datetime"])
+
+    assert ENTITY_RESOLVER.resolve(recognizer_result) == legacy_resolve(recognizer_result)
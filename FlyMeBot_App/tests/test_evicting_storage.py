@@ -0,0 +1,130 @@
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import (
+    ConversationState,
+    MemoryStorage,
+    MessageFactory,
+    TurnContext,
+    UserState,
+)
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.dialogs import WaterfallDialog, WaterfallStepContext
+from botbuilder.dialogs.prompts import PromptOptions, TextPrompt
+from botbuilder.schema import ActivityTypes
+
+from bots import DialogBot
+from dialogs import MainDialog
+from storage import EvictingStorage
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class LuisDisabled:
+    is_configured = False
+
+
+async def ask_origin(step_context: WaterfallStepContext):
+    return await step_context.prompt(
+        TextPrompt.__name__, PromptOptions(prompt=MessageFactory.text("Where from?"))
+    )
+
+
+async def ask_destination(step_context: WaterfallStepContext):
+    return await step_context.prompt(
+        TextPrompt.__name__, PromptOptions(prompt=MessageFactory.text("Where to?"))
+    )
+
+
+@async_test
+async def test_evicting_storage_idle_ttl_and_budget():
+    """Vérifie l'éviction des conversations inactives puis des moins récentes au-delà du budget
+    """
+    clock = Clock()
+    memory = MemoryStorage()
+    storage = EvictingStorage(memory, idle_ttl=60, max_entries=2, clock=clock)
+
+    await storage.write({"a": {"step": 1}})
+    clock.now = 30
+    await storage.write({"b": {"step": 1}})
+    # "a" is read again, "b" becomes the least recently used key
+    await storage.read(["a"])
+    await storage.write({"c": {"step": 1}})
+    assert sorted(memory.memory) == ["a", "c"]
+
+    # Nothing accessed "a" for more than a minute
+    clock.now = 100
+    assert await storage.read(["a", "c"]) == {}
+    assert storage.stats == {"entries": 0, "evictions": 3}
+
+
+@async_test
+async def test_evicting_storage_byte_budget():
+    """Vérifie le respect du budget en octets
+    """
+    storage = EvictingStorage(MemoryStorage(), max_bytes=100)
+    for index in range(10):
+        await storage.write({f"conversation{index}": {"text": "x" * 40}})
+
+    assert storage.stats["entries"] == 2
+    assert 0 < storage.stats["bytes"] <= 100
+    assert storage.stats["evictions"] == 8
+
+
+@async_test
+async def test_evicted_conversation_restarts():
+    """Vérifie qu'une conversation oubliée reprend au début du dialogue principal
+    """
+    clock = Clock()
+    storage = EvictingStorage(MemoryStorage(), idle_ttl=60, clock=clock)
+    booking_dialog = WaterfallDialog("BookingDialog", [ask_origin, ask_destination])
+    dialog = MainDialog(LuisDisabled(), booking_dialog)
+    bot = DialogBot(ConversationState(storage), UserState(storage), dialog, None)
+    adapter = TestAdapter(bot.on_turn)
+
+    async def turn(text: str) -> list:
+        activity = copy(adapter.template)
+        activity.type = ActivityTypes.message
+        activity.text = text
+        await adapter.run_pipeline(TurnContext(adapter, activity), bot.on_turn)
+        replies = []
+        while adapter.activity_buffer:
+            replies.append(adapter.activity_buffer.pop(0).text)
+        return replies
+
+    first = await turn("hi")
+    assert first[0].startswith("NOTE: LUIS is not configured")
+    assert first[-1] == "Where from?"
+
+    # Waiting at the origin prompt
+    clock.now = 30
+    assert await turn("Paris") == ["Where to?"]
+
+    clock.now = 1000
+    assert await turn("Paris") == first
+    assert storage.evictions == 1
+
+
+@async_test
+async def test_evicting_storage_keeps_accessed_keys():
+    """Vérifie que les clés de l'appel en cours restent suivies, dans leur ordre, quand le budget est dépassé
+    """
+    memory = MemoryStorage()
+    storage = EvictingStorage(memory, max_entries=2)
+    await storage.write({"a": {"step": 1}})
+    await storage.write({"b": {"step": 1}})
+    await storage.write({"c": {"step": 1}, "d": {"step": 1}})
+    assert sorted(memory.memory) == ["c", "d"]
+
+    # "c" and "d" are read while over budget: both stay, "c" still the least recently used
+    storage.max_entries = 1
+    await storage.read(["c", "d"])
+    await storage.write({"e": {"step": 1}})
+    assert sorted(memory.memory) == ["e"]
+    assert storage.stats["evictions"] == 4
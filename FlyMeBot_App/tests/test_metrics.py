@@ -0,0 +1,78 @@
+import asyncio
+import time
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes
+
+from telemetry import LoopLagProbe, MetricsMiddleware, MetricsRegistry
+from telemetry.metrics import TURN_ERRORS, TURN_LATENCY, TURNS_IN_FLIGHT
+
+
+def test_registry_renders_prometheus_text():
+    """Vérifie le format d'exposition Prometheus des compteurs, histogrammes et statistiques
+    """
+    registry = MetricsRegistry()
+    sends = registry.counter("bot_sends_total", "Sends.", ("type",))
+    latency = registry.histogram("bot_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    sends.inc(type="message")
+    sends.inc(2, type="typing")
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value)
+    registry.register_stats("bot_cache", lambda: {"hits": 3, "size": 10, "name": "x"}, counters=("hits",))
+
+    assert registry.render().splitlines() == [
+        "# HELP bot_sends_total Sends.",
+        "# TYPE bot_sends_total counter",
+        'bot_sends_total{type="message"} 1',
+        'bot_sends_total{type="typing"} 2',
+        "# HELP bot_latency_seconds Latency.",
+        "# TYPE bot_latency_seconds histogram",
+        'bot_latency_seconds_bucket{le="0.1"} 1',
+        'bot_latency_seconds_bucket{le="1.0"} 2',
+        'bot_latency_seconds_bucket{le="+Inf"} 3',
+        "bot_latency_seconds_sum 3.55",
+        "bot_latency_seconds_count 3",
+        "# TYPE bot_cache_hits_total counter",
+        "bot_cache_hits_total 3",
+        "# TYPE bot_cache_size gauge",
+        "bot_cache_size 10",
+    ]
+
+
+@async_test
+async def test_turn_metrics_and_loop_lag():
+    """Vérifie la mesure des tours, de leurs erreurs et du retard de la boucle d'événements
+    """
+    adapter = TestAdapter()
+    adapter.use(MetricsMiddleware())
+    turns = TURN_LATENCY.count(type=ActivityTypes.message)
+    errors = TURN_ERRORS.value(type=ActivityTypes.message)
+
+    async def failing(turn_context: TurnContext):
+        assert TURNS_IN_FLIGHT.value() == 1
+        raise ValueError("bug")
+
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    adapter.on_turn_error = None
+    try:
+        await adapter.run_pipeline(TurnContext(adapter, activity), failing)
+    except ValueError:
+        pass
+    assert TURN_LATENCY.count(type=ActivityTypes.message) == turns + 1
+    assert TURN_ERRORS.value(type=ActivityTypes.message) == errors + 1
+    assert TURNS_IN_FLIGHT.value() == 0
+
+    registry = MetricsRegistry()
+    lag = registry.gauge("lag_seconds", "Lag.")
+    probe = LoopLagProbe(0.05, lag)
+    probe.start()
+    await asyncio.sleep(0.01)
+    # Blocks the event loop past the probe's timer
+    time.sleep(0.2)
+    await asyncio.sleep(0.01)
+    await probe.stop()
+    assert lag.value() >= 0.1
@@ -0,0 +1,103 @@
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import CardFactory, MessageFactory, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import Activity, ActivityTypes, DeliveryModes, Entity, HeroCard, InputHints
+
+from outbound_buffer import OutboundBuffer
+
+
+class CountingAdapter(TestAdapter):
+    def __init__(self):
+        super().__init__()
+        self.send_calls = []
+
+    async def send_activities(self, context, activities):
+        # The turn context calls the adapter even when a middleware held every activity
+        if activities:
+            self.send_calls.append([activity.type for activity in activities])
+        return await super().send_activities(context, activities)
+
+
+async def tardis(turn_context: TurnContext):
+    await turn_context.send_activity(MessageFactory.text("Wait a second...", input_hint=InputHints.ignoring_input))
+    await turn_context.send_activity(MessageFactory.text("I'll call the Doctor", input_hint=InputHints.ignoring_input))
+    await turn_context.send_activity(
+        MessageFactory.attachment(CardFactory.hero_card(HeroCard(title="Did someone call the Doctor ?")))
+    )
+    await turn_context.send_activity(MessageFactory.text("What is your budget?", input_hint=InputHints.expecting_input))
+
+
+def message(adapter: TestAdapter, delivery_mode: str = None) -> TurnContext:
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = "2023-01-01"
+    activity.delivery_mode = delivery_mode
+    return TurnContext(adapter, activity)
+
+
+@async_test
+async def test_turn_activities_sent_together():
+    """Vérifie l'envoi groupé des messages d'un tour, les textes consécutifs étant fusionnés
+    """
+    adapter = CountingAdapter()
+    adapter.use(OutboundBuffer(merge_text=True))
+
+    await adapter.run_pipeline(message(adapter), tardis)
+
+    assert adapter.send_calls == [[ActivityTypes.message] * 3]
+    sent = adapter.activity_buffer
+    assert sent[0].text == "Wait a second...\n\nI'll call the Doctor"
+    assert sent[0].input_hint == InputHints.ignoring_input
+    assert sent[1].attachments[0].content.title == "Did someone call the Doctor ?"
+    assert sent[2].text == "What is your budget?"
+    assert sent[2].input_hint == InputHints.expecting_input
+
+
+@async_test
+async def test_typing_flushes_and_expect_replies():
+    """Vérifie qu'un indicateur de saisie part aussitôt et que les réponses attendues restent en ligne
+    """
+    adapter = CountingAdapter()
+    adapter.use(OutboundBuffer())
+
+    async def typing_then_answer(turn_context: TurnContext):
+        await turn_context.send_activity("Let me check")
+        await turn_context.send_activity(Activity(type=ActivityTypes.typing))
+        assert len(adapter.send_calls) == 1
+        await turn_context.send_activity("Done")
+
+    await adapter.run_pipeline(message(adapter), typing_then_answer)
+    assert adapter.send_calls == [[ActivityTypes.message, ActivityTypes.typing], [ActivityTypes.message]]
+
+    adapter.send_calls.clear()
+    context = message(adapter, DeliveryModes.expect_replies)
+    await adapter.run_pipeline(context, tardis)
+    assert adapter.send_calls == []
+    assert [reply.type for reply in context.buffered_reply_activities] == [ActivityTypes.message] * 4
+
+
+def test_merge_keeps_other_fields():
+    """Vérifie que seuls les messages ne différant que par leur texte sont fusionnés
+    """
+    mention = MessageFactory.text("Hello")
+    mention.entities = [Entity(type="mention")]
+    urgent = [MessageFactory.text("Your flight"), MessageFactory.text("is cancelled")]
+    for activity in urgent:
+        activity.importance = "urgent"
+    choice = MessageFactory.text("Pick one")
+    choice.value = {"choice": 1}
+
+    merged = OutboundBuffer.merge(
+        [mention, MessageFactory.text("there")] + urgent + [MessageFactory.text("Noted"), choice]
+    )
+
+    assert [activity.text for activity in merged] == [
+        "Hello",
+        "there",
+        "Your flight\n\nis cancelled",
+        "Noted",
+        "Pick one",
+    ]
+    assert merged[2].importance == "urgent"
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import tempfile
+import time
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes, ConversationAccount
+
+from bots import DialogBot
+from dialogs import BookingDialog, MainDialog
+from storage import TrackedConversationState, TrackedUserState
+from telemetry import PROFILER, ProfileRing, SlowTurnProfiler
+
+
+class LuisDisabled:
+    is_configured = False
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def slow_turn(profiler: SlowTurnProfiler, conversation_id: str):
+    async with profiler.profile_turn(conversation_id, "activity-1") as profile:
+        profile.set_attribute("dialog_step", "BookingDialog.origin_step")
+        await asyncio.sleep(0.05)
+        busy(0.05)
+
+
+@async_test
+async def test_slow_turns_ring():
+    """Vérifie la capture des tours lents, leurs piles échantillonnées et la rotation des profils
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        ring = ProfileRing(directory, max_profiles=2)
+        profiler = SlowTurnProfiler(ring, threshold=0.08, interval=0.002)
+
+        async with profiler.profile_turn("fast", "activity-1"):
+            await asyncio.sleep(0.01)
+        assert ring.paths() == []
+
+        await asyncio.gather(slow_turn(profiler, "slow-1"), slow_turn(profiler, "slow-2"))
+        await slow_turn(profiler, "slow-3")
+        assert profiler.captured == 3
+        paths = ring.paths()
+        assert len(paths) == 2
+
+        with open(paths[-1], encoding="utf-8") as file:
+            profile = json.load(file)
+        assert profile["conversation_id"] == "slow-3"
+        assert profile["dialog_step"] == "BookingDialog.origin_step"
+        assert profile["duration_ms"] >= 80
+        stacks = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in profile["stacks"]}
+        assert sum(stacks.values()) == profile["samples"]
+        # Running frames, then the awaited sleep
+        assert any("slow_turn" in stack and stack.endswith("busy (test_profiling.py:22)") for stack in stacks)
+        assert any("slow_turn" in stack and stack.endswith("(waiting)") for stack in stacks)
+
+
+@async_test
+async def test_dialog_step_tag():
+    """Vérifie que le profil d'un tour porte l'étape de dialogue qui reçoit le message
+    """
+    storage = MemoryStorage()
+    dialog = MainDialog(LuisDisabled(), BookingDialog())
+    bot = DialogBot(TrackedConversationState(storage), TrackedUserState(storage), dialog, None)
+    adapter = TestAdapter(bot.on_turn)
+    with tempfile.TemporaryDirectory() as directory:
+        ring = ProfileRing(directory)
+        # Every turn is slow
+        PROFILER.configure(ring, threshold=1e-9, interval=0.002)
+        try:
+            for text in ("hi", "Paris"):
+                activity = copy(adapter.template)
+                activity.type = ActivityTypes.message
+                activity.conversation = ConversationAccount(id="conversation-1")
+                activity.text = text
+                await adapter.run_pipeline(TurnContext(adapter, activity), bot.on_turn)
+        finally:
+            PROFILER.configure()
+
+        profiles = []
+        for path in ring.paths():
+            with open(path, encoding="utf-8") as file:
+                profiles.append(json.load(file))
+    assert [profile["conversation_id"] for profile in profiles] == ["conversation-1"] * 2
+    assert [profile["dialog_step"] for profile in profiles] == [None, "BookingDialog.origin_step"]
@@ -0,0 +1,80 @@
+import time
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import Activity, ActivityTypes, ConversationAccount
+
+from scheduled_delivery import ScheduledDelivery
+
+
+async def coffee_gag(turn_context: TurnContext):
+    await turn_context.send_activity(f"wait {turn_context.activity.text}")
+    await turn_context.send_activity(Activity(type="delay", value=100))
+    await turn_context.send_activity("sorry")
+    await turn_context.send_activity(Activity(type="delay", value=50))
+    await turn_context.send_activity("ready")
+
+
+async def echo(turn_context: TurnContext):
+    await turn_context.send_activity(f"echo {turn_context.activity.text}")
+
+
+def replies(adapter: TestAdapter) -> list:
+    texts = [activity.text for activity in adapter.activity_buffer]
+    adapter.activity_buffer.clear()
+    return texts
+
+
+async def turn(adapter: TestAdapter, logic, text: str, conversation_id: str = "conversation"):
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.conversation = ConversationAccount(id=conversation_id)
+    activity.text = text
+    await adapter.run_pipeline(TurnContext(adapter, activity), logic)
+
+
+@async_test
+async def test_delayed_activities_leave_the_turn_in_order():
+    """Vérifie que les messages qui suivent un délai sont envoyés après le tour, dans l'ordre
+    """
+    adapter = TestAdapter()
+    delivery = ScheduledDelivery(adapter)
+    adapter.use(delivery)
+
+    start = time.perf_counter()
+    await turn(adapter, coffee_gag, "a minute")
+    assert time.perf_counter() - start < 0.05
+    assert replies(adapter) == ["wait a minute"]
+
+    # The answer to a message sent meanwhile waits for the pending ones
+    await turn(adapter, echo, "hello")
+    assert replies(adapter) == []
+
+    await delivery.join()
+    assert time.perf_counter() - start >= 0.15
+    assert replies(adapter) == ["sorry", "ready", "echo hello"]
+    assert delivery.stats["pending_conversations"] == 0
+    assert delivery.stats["delivered"] == 3
+
+    await turn(adapter, echo, "again")
+    assert replies(adapter) == ["echo again"]
+
+
+@async_test
+async def test_delays_dropped_above_max_conversations():
+    """Vérifie qu'au-delà du nombre de conversations en attente, les délais sont ignorés
+    """
+    adapter = TestAdapter()
+    delivery = ScheduledDelivery(adapter, max_conversations=1)
+    adapter.use(delivery)
+
+    await turn(adapter, coffee_gag, "1", "first")
+    assert replies(adapter) == ["wait 1"]
+    await turn(adapter, coffee_gag, "2", "second")
+    assert replies(adapter) == ["wait 2", "sorry", "ready"]
+    assert delivery.refused == 2
+
+    await delivery.join()
+    assert replies(adapter) == ["sorry", "ready"]
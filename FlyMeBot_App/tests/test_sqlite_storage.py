@@ -0,0 +1,131 @@
+import asyncio
+import os
+import tempfile
+
+from aiounittest import async_test
+
+from booking_details import BookingDetails
+from storage import SqliteStorage
+
+
+def new_storage(directory: str) -> SqliteStorage:
+    return SqliteStorage(os.path.join(directory, "state.sqlite3"))
+
+
+@async_test
+async def test_sqlite_storage_round_trip():
+    """Vérifie l'écriture puis la relecture de l'état d'une conversation
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        storage = new_storage(directory)
+        await storage.write({"conversation": {"options": BookingDetails(destination="Paris")}})
+        storage.close()
+
+        # A restart keeps the conversation
+        storage = new_storage(directory)
+        items = await storage.read(["conversation", "unknown"])
+        storage.close()
+
+    assert list(items) == ["conversation"]
+    assert items["conversation"]["options"].destination == "Paris"
+    assert items["conversation"]["e_tag"] == "1"
+
+
+@async_test
+async def test_sqlite_storage_etag_conflict():
+    """Vérifie le refus d'une écriture faite sur une version périmée
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        first, second = new_storage(directory), new_storage(directory)
+        await first.write({"conversation": {"step": 0}})
+
+        stale = (await second.read(["conversation"]))["conversation"]
+        fresh = (await first.read(["conversation"]))["conversation"]
+        fresh["step"] = 1
+        await first.write({"conversation": fresh})
+
+        stale["step"] = 2
+        try:
+            await second.write({"conversation": stale})
+            conflict = False
+        except KeyError:
+            conflict = True
+
+        # The e_tag of a written item is refreshed so it can be saved again
+        fresh["step"] = 3
+        await first.write({"conversation": fresh})
+        items = await second.read(["conversation"])
+        first.close()
+        second.close()
+
+    assert conflict
+    assert items["conversation"]["step"] == 3
+
+
+@async_test
+async def test_sqlite_storage_delete():
+    """Vérifie la suppression d'un état
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        storage = new_storage(directory)
+        await storage.write({"conversation": {"step": 0}, "user": {}})
+        await storage.delete(["conversation"])
+        items = await storage.read(["conversation", "user"])
+        storage.close()
+
+    assert list(items) == ["user"]
+
+
+@async_test
+async def test_sqlite_storage_concurrent_writes():
+    """Vérifie les écritures simultanées regroupées en transactions
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        storage = new_storage(directory)
+        await asyncio.gather(
+            *(storage.write({f"conversation{index}": {"step": index}}) for index in range(20))
+        )
+        items = await storage.read([f"conversation{index}" for index in range(20)])
+        storage.close()
+
+    assert [items[f"conversation{index}"]["step"] for index in range(20)] == list(range(20))
+
+
+@async_test
+async def test_sqlite_storage_reopened_after_fork():
+    """Vérifie qu'un processus forké ne rouvre que les stockages encore ouverts
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        closed = SqliteStorage(os.path.join(directory, "closed.sqlite3"))
+        closed.close()
+        storage = new_storage(directory)
+        await storage.write({"conversation": {"step": 1}})
+
+        opened = []
+        original = SqliteStorage._open  # pylint: disable=protected-access
+
+        def record_open(instance):
+            opened.append(instance)
+            original(instance)
+
+        SqliteStorage._open = record_open  # pylint: disable=protected-access
+        try:
+            pid = os.fork()
+            if pid == 0:
+                # Child: its own connection to the live storage only, and
+                # never back into pytest, whatever happens
+                # pylint: disable=protected-access
+                code = 2
+                try:
+                    items = storage._executor.submit(storage._read, ["conversation"]).result()
+                    code = 0 if opened == [storage] and items["conversation"]["step"] == 1 else 1
+                except BaseException:  # pylint: disable=broad-except
+                    code = 2
+                finally:
+                    os._exit(code)
+        finally:
+            SqliteStorage._open = original  # pylint: disable=protected-access
+        _, status = os.waitpid(pid, 0)
+        storage.close()
+
+    assert os.WEXITSTATUS(status) == 0
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from botbuilder.core import MessageFactory
+from botbuilder.dialogs import DialogInstance, DialogState
+from botbuilder.dialogs.prompts import PromptOptions
+from botbuilder.schema import Activity, ActivityTypes, InputHints
+
+from booking_details import BookingDetails
+from storage import StateCodec
+
+
+def booking_state() -> dict:
+    prompt = DialogInstance()
+    prompt.id = "TextPrompt"
+    prompt.state = {
+        "options": PromptOptions(
+            prompt=MessageFactory.text("Where do you want to go?", input_hint=InputHints.expecting_input)
+        ),
+        "state": {},
+    }
+    booking = DialogInstance()
+    booking.id = "BookingDialog"
+    booking.state = {
+        "dialogs": DialogState([prompt]),
+        "options": BookingDetails(origin="Paris", budget=500),
+        "values": {"instanceId": "5f3c", "stepIndex": 1, "started": datetime(2023, 1, 5, 10, 30)},
+        "span": (3, 8),
+    }
+    return {"DialogState": DialogState([booking]), "e_tag": "1"}
+
+
+def test_state_codec_round_trip():
+    """Vérifie que l'état d'une conversation est relu à l'identique
+    """
+    for codec in (StateCodec(), StateCodec(compress_threshold=None)):
+        state = codec.decode(codec.encode(booking_state()))
+
+        booking = state["DialogState"].dialog_stack[0]
+        assert booking.id == "BookingDialog"
+        assert booking.state["options"].to_dict() == BookingDetails(origin="Paris", budget=500).to_dict()
+        assert booking.state["values"]["started"] == datetime(2023, 1, 5, 10, 30)
+        assert booking.state["span"] == (3, 8)
+
+        prompt = booking.state["dialogs"].dialog_stack[0].state["options"].prompt
+        assert prompt.text == "Where do you want to go?"
+        assert prompt.type is ActivityTypes.message
+        assert prompt.input_hint is InputHints.expecting_input
+        assert state["e_tag"] == "1"
+
+
+def test_state_codec_compresses_large_states():
+    """Vérifie que seuls les états au-delà du seuil sont compressés
+    """
+    codec = StateCodec(compress_threshold=512)
+    small = {"step": 1}
+    large = {"steps": [booking_state() for _ in range(10)]}
+
+    assert codec.encode(small)[:1] == b"\x00"
+    assert codec.encode(large)[:1] == b"\x01"
+    assert len(codec.encode(large)) < len(StateCodec(compress_threshold=None).encode(large)) / 2
+    assert codec.decode(codec.encode(small)) == small
+
+
+def test_state_codec_ignores_sdk_attribute_order():
+    """Vérifie qu'un état stocké se relit à l'identique quand le SDK réordonne ou ajoute des attributs
+    """
+    stored = StateCodec().encode(booking_state())
+
+    attribute_map = Activity._attribute_map  # pylint: disable=protected-access
+    try:
+        Activity._attribute_map = {  # pylint: disable=protected-access
+            "new_field": {"key": "newField", "type": "str"},
+            **dict(reversed(list(attribute_map.items()))),
+        }
+        state = StateCodec().decode(stored)
+    finally:
+        Activity._attribute_map = attribute_map  # pylint: disable=protected-access
+
+    booking = state["DialogState"].dialog_stack[0]
+    prompt = booking.state["dialogs"].dialog_stack[0].state["options"].prompt
+    assert prompt.text == "Where do you want to go?"
+    assert prompt.type is ActivityTypes.message
+    assert prompt.input_hint is InputHints.expecting_input
@@ -0,0 +1,80 @@
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes
+
+from booking_details import BookingDetails
+from storage import StateTracker, TrackedConversationState, TrackedUserState
+
+
+class CountingStorage(MemoryStorage):
+    def __init__(self):
+        super(CountingStorage, self).__init__()
+        self.write_calls = []
+
+    async def write(self, changes):
+        self.write_calls.append(sorted(changes))
+        await super(CountingStorage, self).write(changes)
+
+
+def new_turn(adapter: TestAdapter) -> TurnContext:
+    activity = copy(adapter.template)
+    activity.type = ActivityTypes.message
+    activity.text = "hi"
+    return TurnContext(adapter, activity)
+
+
+@async_test
+async def test_state_tracker_skips_unchanged_states():
+    """Vérifie qu'un tour sans modification de l'état n'écrit rien
+    """
+    adapter = TestAdapter()
+    storage = CountingStorage()
+    conversation_state = TrackedConversationState(storage)
+    tracker = StateTracker(conversation_state, TrackedUserState(storage))
+    details = conversation_state.create_property("details")
+
+    turn = new_turn(adapter)
+    await details.set(turn, BookingDetails(destination="Paris"))
+    await tracker.save_changes(turn)
+
+    # Same state read back and left as is: no write
+    turn = new_turn(adapter)
+    assert (await details.get(turn)).destination == "Paris"
+    await tracker.save_changes(turn)
+
+    # Changed value of a nested object: written again
+    turn = new_turn(adapter)
+    (await details.get(turn)).origin = "Berlin"
+    await tracker.save_changes(turn)
+
+    assert len(storage.write_calls) == 2
+    assert tracker.stats == {"skipped": 4, "saved": 2, "writes": 2}
+
+
+@async_test
+async def test_state_tracker_batches_changed_states():
+    """Vérifie que les états de la conversation et de l'utilisateur sont écrits en un seul appel
+    """
+    adapter = TestAdapter()
+    storage = CountingStorage()
+    conversation_state = TrackedConversationState(storage)
+    user_state = TrackedUserState(storage)
+    tracker = StateTracker(conversation_state, user_state)
+
+    turn = new_turn(adapter)
+    await conversation_state.create_property("step").set(turn, 1)
+    await user_state.create_property("name").set(turn, "Ada")
+    await tracker.save_changes(turn)
+
+    assert storage.write_calls == [
+        sorted(
+            [
+                conversation_state.get_storage_key(turn),
+                user_state.get_storage_key(turn),
+            ]
+        )
+    ]
+    assert tracker.stats == {"skipped": 0, "saved": 2, "writes": 1}
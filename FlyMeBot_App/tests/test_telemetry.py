@@ -0,0 +1,72 @@
+import json
+import logging
+import threading
+
+from telemetry import (
+    JsonlFileSink,
+    PipelineTelemetryClient,
+    TelemetryLogHandler,
+    TelemetryPipeline,
+    TelemetrySink,
+    install_log_handler,
+)
+
+
+class BlockedSink(TelemetrySink):
+    def __init__(self):
+        self.gate = threading.Event()
+        self.batches = []
+
+    def write(self, events):
+        self.gate.wait(5)
+        self.batches.append(events)
+
+
+def test_pipeline_writes_jsonl(tmp_path):
+    """Vérifie l'écriture des événements et des journaux dans le fichier JSONL, avec rotation
+    """
+    path = str(tmp_path / "telemetry.jsonl")
+    pipeline = TelemetryPipeline([JsonlFileSink(path, max_bytes=400, backup_count=2)], flush_interval=0.01)
+    client = PipelineTelemetryClient(pipeline)
+    logger = logging.getLogger("tests.telemetry")
+    try:
+        assert install_log_handler(pipeline, "tests.telemetry") is install_log_handler(pipeline, "tests.telemetry")
+        assert sum(isinstance(handler, TelemetryLogHandler) for handler in logger.handlers) == 1
+
+        client.track_trace("Unhappy user", {"origin": "Paris"}, "ERROR")
+        logger.error("not satisfied", extra={"custom_dimensions": {"destination": "Berlin"}})
+        assert pipeline.flush()
+        with open(path, encoding="utf-8") as lines:
+            events = [json.loads(line) for line in lines]
+        assert [(event["name"], event["severity"], event["properties"]) for event in events] == [
+            ("Unhappy user", "ERROR", {"origin": "Paris"}),
+            ("not satisfied", "ERROR", {"destination": "Berlin"}),
+        ]
+
+        for index in range(20):
+            client.track_event("booking", {"index": index})
+            pipeline.flush()
+        pipeline.close()
+        assert (tmp_path / "telemetry.jsonl.2").exists()
+        assert not (tmp_path / "telemetry.jsonl.3").exists()
+        assert pipeline.stats["written"] == 22
+    finally:
+        logger.handlers.clear()
+
+
+def test_pipeline_drops_under_pressure():
+    """Vérifie que la file bornée ne bloque pas et compte les événements perdus
+    """
+    sink = BlockedSink()
+    pipeline = TelemetryPipeline([sink], max_queue=5, batch_size=5, flush_interval=0.01)
+
+    for index in range(50):
+        pipeline.emit({"time": 0, "type": "event", "name": str(index)})
+    # The drain thread holds at most one batch while the sink is blocked
+    assert pipeline.dropped >= 50 - 5 - 5
+    assert pipeline.emitted + pipeline.dropped == 50
+
+    sink.gate.set()
+    pipeline.close()
+    assert sum(len(batch) for batch in sink.batches) == pipeline.emitted
+    assert all(len(batch) <= 5 for batch in sink.batches)
@@ -0,0 +1,60 @@
+from copy import copy
+from datetime import date
+
+from aiounittest import async_test
+from botbuilder.core import MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes, ConversationAccount
+
+from bots import DialogBot
+from dialogs import BookingDialog, MainDialog
+from helpers.timex_service import TimexInfo, TimexService
+from storage import TrackedConversationState, TrackedUserState
+
+
+class LuisDisabled:
+    is_configured = False
+
+
+def test_parse_and_compare():
+    """Vérifie l'analyse mémorisée des timex et la comparaison des dates, ISO ou non
+    """
+    service = TimexService(max_size=2)
+    assert service.parse("2023-01-05") == TimexInfo("2023-01-05", True, date(2023, 1, 5), "day")
+    assert service.parse("XXXX-01-05") == TimexInfo("XXXX-01-05", False, None, "day")
+    assert service.parse("2023-01-05T10") == TimexInfo("2023-01-05T10", True, date(2023, 1, 5), "day")
+    assert service.parse("2023-02-30").definite is False
+    assert service.parse("2023-01").granularity == "month"
+    assert service.parse("T10") == TimexInfo("T10", False, None, None)
+
+    assert service.is_before("2023-01-03", "2023-01-05T10")
+    assert not service.is_before("2023-01-05", "2023-01-05T10")
+    # Nothing to compare with an ambiguous date
+    assert not service.is_before("XXXX-01-03", "2023-01-05")
+
+    service.parse("2023-01-03")
+    assert service.parse("2023-01-03") is service.parse("2023-01-03")
+    assert service.stats["size"] == 2
+    assert service.stats["hits"] >= 2
+    assert service.stats["evictions"] > 0
+
+
+@async_test
+async def test_return_date_before_datetime_departure():
+    """Vérifie qu'une date de départ avec une heure ne fait plus échouer l'étape du budget
+    """
+    storage = MemoryStorage()
+    dialog = MainDialog(LuisDisabled(), BookingDialog())
+    bot = DialogBot(TrackedConversationState(storage), TrackedUserState(storage), dialog, None)
+    adapter = TestAdapter(bot.on_turn)
+    for text in ("hi", "Paris", "London", "January 5th 2023 at 10am", "January 3rd 2023"):
+        activity = copy(adapter.template)
+        activity.type = ActivityTypes.message
+        activity.conversation = ConversationAccount(id="conversation-1")
+        activity.text = text
+        await adapter.run_pipeline(TurnContext(adapter, activity), bot.on_turn)
+
+    texts = [activity.text or "" for activity in adapter.activity_buffer]
+    assert any("prior to your departure date (2023-01-05T10)" in text for text in texts)
+    # Budget prompt
+    assert texts[-1].endswith("(example: 3.14€)")
@@ -0,0 +1,74 @@
+from copy import copy
+
+from aiounittest import async_test
+from botbuilder.core import MemoryStorage, TurnContext
+from botbuilder.core.adapters import TestAdapter
+from botbuilder.schema import ActivityTypes, ConversationAccount
+
+from bots import DialogBot
+from dialogs import BookingDialog, MainDialog
+from storage import TrackedConversationState, TrackedUserState
+from telemetry import SpanExporter, Tracer, TracingMiddleware
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+
+class LuisDisabled:
+    is_configured = False
+
+
+async def run_turns(tracer: Tracer, texts: list):
+    storage = MemoryStorage()
+    dialog = MainDialog(LuisDisabled(), BookingDialog())
+    bot = DialogBot(TrackedConversationState(storage), TrackedUserState(storage), dialog, None)
+    adapter = TestAdapter(bot.on_turn)
+    adapter.use(TracingMiddleware(tracer))
+    for text in texts:
+        activity = copy(adapter.template)
+        activity.type = ActivityTypes.message
+        activity.conversation = ConversationAccount(id="conversation-1")
+        activity.id = f"activity-{text}"
+        activity.text = text
+        await adapter.run_pipeline(TurnContext(adapter, activity), bot.on_turn)
+
+
+@async_test
+async def test_sampled_turn_spans():
+    """Vérifie l'arbre des spans d'un tour échantillonné, regroupés par conversation et activité
+    """
+    exporter = ListExporter()
+    await run_turns(Tracer(exporter, sample_rate=1.0), ["hi", "Paris"])
+
+    assert len(exporter.traces) == 2
+    spans = exporter.traces[0]
+    by_name = {span["name"]: span for span in spans}
+    assert spans[0]["name"] == "turn"
+    assert spans[0]["parent_id"] is None
+    assert {span["conversation_id"] for span in spans} == {"conversation-1"}
+    assert {span["activity_id"] for span in spans} == {"activity-hi"}
+    assert by_name["DialogBot.on_message_activity"]["parent_id"] == spans[0]["span_id"]
+    run_dialog = by_name["DialogExtensions.run_dialog"]
+    assert by_name["TrackedConversationState.load"]["parent_id"] == run_dialog["span_id"]
+    assert by_name["MainDialog.intro_step"]["duration_ms"] <= run_dialog["duration_ms"]
+    assert "StateTracker.save_changes" in by_name
+
+    # LUIS is not configured: the booking dialog starts right away
+    assert by_name["BookingDialog.origin_step"]["parent_id"] == by_name["MainDialog.act_step"]["span_id"]
+    assert "BookingDialog.destination_step" in [span["name"] for span in exporter.traces[1]]
+
+
+@async_test
+async def test_unsampled_turns_not_exported():
+    """Vérifie qu'aucun span n'est produit pour les tours non échantillonnés
+    """
+    exporter = ListExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    await run_turns(tracer, ["hi", "Paris"])
+    assert exporter.traces == []
+    assert tracer.traces == 0